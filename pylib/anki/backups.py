@@ -0,0 +1,176 @@
+# Copyright: Ankitects Pty Ltd and contributors
+# License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+
+"""Incremental collection backups.
+
+A backup is a small manifest listing the chunks of the collection file.
+Chunks are stored once in a shared folder, named by the sha1 of their
+content, so a backup only adds the parts of the file that changed since
+the previous ones. A backup can be turned back into a .colpkg file, to be
+restored with the usual import code.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import zipfile
+import zlib
+from typing import Any, Dict, Iterator, List, Set
+
+# Backup store
+##########################################################################
+
+
+class BackupStore:
+    """The chunks folder and the manifests of a backup folder.
+
+    dir -- the folder containing the manifests
+    chunkSize -- the size of a chunk. It is a multiple of any SQLite page
+    size, so that an unchanged page always falls in an unchanged chunk.
+    """
+
+    chunkSize = 256 * 1024
+    # backups and cleanups of the same folder must not overlap, or a
+    # cleanup could remove the chunks of a backup being written
+    _locks: Dict[str, Any] = {}
+    _locksLock = threading.Lock()
+
+    def __init__(self, dir: str) -> None:
+        self.dir = dir
+        self.chunksDir = os.path.join(dir, "chunks")
+        with self._locksLock:
+            self.lock = self._locks.setdefault(os.path.abspath(dir), threading.RLock())
+
+    # Writing
+    ######################################################################
+
+    def backup(self, colPath: str, manifestPath: str) -> None:
+        """Save the collection at colPath as a new backup, described by the
+        manifest at manifestPath.
+
+        The collection is first copied with SQLite's backup API, so the copy
+        is consistent even if the collection is opened again meanwhile."""
+        with self.lock:
+            (fd, snapshot) = tempfile.mkstemp(dir=self.dir, suffix=".tmp")
+            os.close(fd)
+            try:
+                self._snapshot(colPath, snapshot)
+                chunks = []
+                size = 0
+                with open(snapshot, "rb") as file:
+                    for chunk in iter(lambda: file.read(self.chunkSize), b""):
+                        chunks.append(self._addChunk(chunk))
+                        size += len(chunk)
+            finally:
+                os.unlink(snapshot)
+            manifest = dict(
+                version=1, size=size, chunkSize=self.chunkSize, chunks=chunks
+            )
+            self._writeAtomically(manifestPath, json.dumps(manifest).encode("utf8"))
+
+    def _snapshot(self, colPath: str, snapshotPath: str) -> None:
+        src = sqlite3.connect(colPath)
+        try:
+            dst = sqlite3.connect(snapshotPath)
+            try:
+                src.backup(dst)
+            finally:
+                dst.close()
+        finally:
+            src.close()
+
+    def _addChunk(self, chunk: bytes) -> str:
+        "Store chunk if it's not already there, returning its checksum."
+        checksum = hashlib.sha1(chunk).hexdigest()
+        path = self._chunkPath(checksum)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._writeAtomically(path, zlib.compress(chunk))
+        return checksum
+
+    def _writeAtomically(self, path: str, data: bytes) -> None:
+        (fd, tmppath) = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(tmppath, path)
+
+    def _chunkPath(self, checksum: str) -> str:
+        return os.path.join(self.chunksDir, checksum[:2], checksum)
+
+    # Reading
+    ######################################################################
+
+    def manifestChunks(self, manifestPath: str) -> List[str]:
+        with open(manifestPath, "rb") as file:
+            return json.loads(file.read().decode("utf8"))["chunks"]
+
+    def collectionData(self, manifestPath: str) -> Iterator[bytes]:
+        "The content of the collection saved in the backup, chunk by chunk."
+        for checksum in self.manifestChunks(manifestPath):
+            with open(self._chunkPath(checksum), "rb") as file:
+                yield zlib.decompress(file.read())
+
+    def writeColpkg(self, manifestPath: str, colpkgPath: str) -> None:
+        "Write the backup as a .colpkg file, as created by legacy backups."
+        with zipfile.ZipFile(colpkgPath, "w", zipfile.ZIP_DEFLATED) as zip:
+            with zip.open("collection.anki2", "w", force_zip64=True) as file:
+                for chunk in self.collectionData(manifestPath):
+                    file.write(chunk)
+            zip.writestr("media", "{}")
+
+    # Cleaning up
+    ######################################################################
+
+    def backupNames(self) -> List[str]:
+        "The file names of the backups of the folder, oldest first."
+        names = [
+            name
+            for name in os.listdir(self.dir)
+            if re.match(r"backup-\d{4}-\d{2}-.+\.(colpkg|colbak)$", name)
+        ]
+        names.sort()
+        return names
+
+    def removeOldBackups(self, nbacks: int) -> List[str]:
+        """Remove the oldest backups, keeping nbacks of them, then the chunks
+        no remaining backup uses. Returns the file names of the remaining
+        backups.
+
+        Everything happens under the lock, so a backup being written
+        elsewhere is either complete and listed, or not started yet."""
+        with self.lock:
+            backups = self.backupNames()
+            while len(backups) > nbacks:
+                path = os.path.join(self.dir, backups.pop(0))
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            self.removeUnusedChunks()
+            return backups
+
+    def removeUnusedChunks(self) -> int:
+        """Remove the chunks no manifest of the folder refers to. Returns the
+        number of chunks removed."""
+        with self.lock:
+            used: Set[str] = set()
+            for name in os.listdir(self.dir):
+                if name.endswith(".colbak"):
+                    used.update(self.manifestChunks(os.path.join(self.dir, name)))
+            removed = 0
+            if not os.path.exists(self.chunksDir):
+                return removed
+            for entry in os.scandir(self.chunksDir):
+                if not entry.is_dir():
+                    continue
+                for chunk in os.scandir(entry.path):
+                    if chunk.name not in used:
+                        os.unlink(chunk.path)
+                        removed += 1
+            return removed
@@ -5,7 +5,7 @@ from __future__ import annotations
 
 import pprint
 import time
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 import anki  # pylint: disable=unused-import
 from anki import hooks
@@ -28,7 +28,63 @@ from anki.sound import AVTag
 
 
 class Card:
+    """A card. The fields of the backend card are only decoded when first
+    read, so that building many cards stays cheap, and the backend card is
+    dropped once they all have been. Attributes other than the ones below
+    can still be set, and are kept in __dict__."""
+
+    __slots__ = (
+        "col",
+        "timerStarted",
+        "_render_output",
+        "_note",
+        "_backend_card",
+        "_unread",
+        "id",
+        "nid",
+        "did",
+        "ord",
+        "mod",
+        "usn",
+        "type",
+        "queue",
+        "due",
+        "ivl",
+        "factor",
+        "reps",
+        "lapses",
+        "left",
+        "odue",
+        "odid",
+        "flags",
+        "data",
+        "__dict__",
+        "__weakref__",
+    )
+
+    # attribute -> field of the backend card it's decoded from
+    _backendFields = dict(
+        nid="nid",
+        did="did",
+        ord="ord",
+        mod="mtime",
+        usn="usn",
+        type="ctype",
+        queue="queue",
+        due="due",
+        ivl="ivl",
+        factor="factor",
+        reps="reps",
+        lapses="lapses",
+        left="left",
+        odue="odue",
+        odid="odid",
+        flags="flags",
+        data="data",
+    )
+
     _note: Optional[Note]
+    _backend_card: Optional[BackendCard]
     timerStarted: Optional[float]
     lastIvl: int
     ord: int
@@ -38,41 +94,56 @@ class Card:
     ) -> None:
         self.col = col.weakref()
         self.timerStarted = None
-        self._render_output: Optional[anki.template.TemplateRenderOutput] = None
         if id:
             # existing card
-            self.id = id
-            self.load()
+            c = self.col.backend.get_card(id)
+            assert c
+            self._set_backend_card(c)
         else:
             # new card with defaults
-            self._load_from_backend_card(BackendCard())
+            self._set_backend_card(BackendCard())
+
+    @classmethod
+    def from_backend_card(cls, col: anki.collection.Collection, c: BackendCard) -> Card:
+        "A card the backend has already fetched."
+        card = cls.__new__(cls)
+        card.col = col.weakref()
+        card.timerStarted = None
+        card._set_backend_card(c)
+        return card
 
     def load(self) -> None:
         c = self.col.backend.get_card(self.id)
         assert c
         self._load_from_backend_card(c)
 
-    def _load_from_backend_card(self, c: BackendCard) -> None:
+    def _set_backend_card(self, c: BackendCard) -> None:
+        "Use c for a card whose fields have not been read yet."
         self._render_output = None
         self._note = None
+        self._backend_card = c
+        self._unread = len(self._backendFields)
         self.id = c.id
-        self.nid = c.nid
-        self.did = c.did
-        self.ord = c.ord
-        self.mod = c.mtime
-        self.usn = c.usn
-        self.type = c.ctype
-        self.queue = c.queue
-        self.due = c.due
-        self.ivl = c.ivl
-        self.factor = c.factor
-        self.reps = c.reps
-        self.lapses = c.lapses
-        self.left = c.left
-        self.odue = c.odue
-        self.odid = c.odid
-        self.flags = c.flags
-        self.data = c.data
+
+    def _load_from_backend_card(self, c: BackendCard) -> None:
+        "Use c, replacing the fields already read."
+        self._set_backend_card(c)
+        for name, field in self._backendFields.items():
+            setattr(self, name, getattr(c, field))
+        self._backend_card = None
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for attributes which are not set yet
+        field = self._backendFields.get(name)
+        if field is None:
+            raise AttributeError(name)
+        value = getattr(self._backend_card, field)
+        setattr(self, name, value)
+        self._unread -= 1
+        if not self._unread:
+            # everything was decoded
+            self._backend_card = None
+        return value
 
     def _bugcheck(self) -> None:
         if (
@@ -186,13 +257,16 @@ class Card:
     def isEmpty(self) -> bool:
         return False
 
+    def _repr_dict(self) -> Dict[str, Any]:
+        "The fields of the card, and any other attribute set on it."
+        d = dict(id=self.id)
+        for name in self._backendFields:
+            d[name] = getattr(self, name)
+        d.update(self.__dict__)
+        return d
+
     def __repr__(self) -> str:
-        d = dict(self.__dict__)
-        # remove non-useful elements
-        del d["_note"]
-        del d["_render_output"]
-        del d["col"]
-        del d["timerStarted"]
+        d = self._repr_dict()
         return f"{super().__repr__()} {pprint.pformat(d, width=300)}"
 
     def userFlag(self) -> int:
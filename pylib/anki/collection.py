@@ -26,7 +26,15 @@ from anki.lang import _
 from anki.media import MediaManager, media_paths_from_col_path
 from anki.models import ModelManager
 from anki.notes import Note
-from anki.rsbackend import TR, DBError, FormatTimeSpanContext, Progress, RustBackend, pb
+from anki.rsbackend import (
+    TR,
+    DBError,
+    FormatTimeSpanContext,
+    Progress,
+    RustBackend,
+    backend_pool,
+    pb,
+)
 from anki.sched import Scheduler as V1Scheduler
 from anki.schedv2 import Scheduler as V2Scheduler
 from anki.tags import TagManager
@@ -119,6 +127,8 @@ class Collection:
 
     sched: Union[V1Scheduler, V2Scheduler]
     _undo: List[Any]
+    # whether the backend comes from the backend pool
+    _pooledBackend = False
 
     def __init__(
         self,
@@ -316,22 +326,27 @@ class Collection:
             else:
                 self.db.rollback()
             self.models._clear_cache()
+            self.decks._clear_cache()
             self.backend.close_collection(downgrade_to_schema11=downgrade)
             self.db = None
             self.media.close()
             self._closeLog()
+            if self._pooledBackend:
+                backend_pool.release(self.backend)
 
     def close_for_full_sync(self) -> None:
         # save and cleanup, but backend will take care of collection close
         if self.db:
             self.save(trx=False)
             self.models._clear_cache()
+            self.decks._clear_cache()
             self.db = None
             self.media.close()
             self._closeLog()
 
     def rollback(self) -> None:
         self.db.rollback()
+        self.decks._clear_cache()
         self.db.begin()
 
     def reopen(self, after_full_sync=False) -> None:
@@ -416,6 +431,32 @@ class Collection:
         """The note object whose id is id."""
         return Note(self, id=id)
 
+    def get_cards(self, ids: Sequence[int], with_notes: bool = False) -> List[Card]:
+        """The cards whose ids are ids, in the same order, fetched in a single
+        backend call.
+
+        with_notes -- also fetch their notes in a second call, so that
+        card.note() doesn't call the backend. Cards of a same note share the
+        Note object."""
+        cards = [
+            Card.from_backend_card(self, c)
+            for c in self.backend.get_cards(card_ids=ids)
+        ]
+        if with_notes and cards:
+            nids = list(dict.fromkeys(card.nid for card in cards))
+            notes = {note.id: note for note in self.get_notes(nids)}
+            for card in cards:
+                card._note = notes[card.nid]
+        return cards
+
+    def get_notes(self, ids: Sequence[int]) -> List[Note]:
+        """The notes whose ids are ids, in the same order, fetched in a single
+        backend call."""
+        return [
+            Note.from_backend_note(self, n)
+            for n in self.backend.get_notes(note_ids=ids)
+        ]
+
     # Utils
     ##########################################################################
 
@@ -768,6 +809,7 @@ select id from notes where mid = ?) limit 1"""
         self.save(trx=False)
         try:
             problems = list(self.backend.check_database())
+            self.decks._clear_cache()
             ok = not problems
             problems.append(self.tr(TR.DATABASE_CHECK_REBUILT))
         except DBError as e:
@@ -842,14 +884,30 @@ select id from notes where mid = ?) limit 1"""
 
     def setUserFlag(self, flag: int, cids: List[int]) -> None:
         assert 0 <= flag <= 7
-        self.db.execute(
-            "update cards set flags = (flags & ~?) | ?, usn=?, mod=? where id in %s"
-            % ids2str(cids),
-            0b111,
-            flag,
-            self.usn(),
-            intTime(),
-        )
+        with self.db.id_set(cids) as scids:
+            self.db.execute(
+                "update cards set flags = (flags & ~?) | ?, usn=?, mod=? where id in %s"
+                % scids,
+                0b111,
+                flag,
+                self.usn(),
+                intTime(),
+            )
+
+
+def auxiliary_collection(path: str) -> Collection:
+    """Open a collection used temporarily, such as the source of an import
+    or the target of an export, with a backend from the backend pool. The
+    backend goes back to the pool when the collection is closed, and must
+    not be used afterwards."""
+    backend = backend_pool.take()
+    try:
+        col = Collection(path, backend=backend)
+    except:
+        backend_pool.release(backend)
+        raise
+    col._pooledBackend = True
+    return col
 
 
 # legacy name
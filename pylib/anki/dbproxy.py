@@ -3,8 +3,22 @@
 
 from __future__ import annotations
 
+import itertools
 import re
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
 import anki
 
@@ -25,6 +39,8 @@ class DBProxy:
         self._backend = backend
         self.mod = False
         self.last_begin_at = 0
+        # the numbers of the id tables in use by id_set()
+        self._id_tables: Set[int] = set()
 
     # Transactions
     ###############
@@ -45,11 +61,7 @@ class DBProxy:
     def _query(
         self, sql: str, *args: ValueForDB, first_row_only: bool = False, **kwargs
     ) -> List[Row]:
-        # mark modified?
-        s = sql.strip().lower()
-        for stmt in "insert", "update", "delete":
-            if s.startswith(stmt):
-                self.mod = True
+        self._mark_modified(sql)
         sql, args2 = emulate_named_args(sql, args, kwargs)
         # fetch rows
         return self._backend.db_query(sql, args2, first_row_only)
@@ -81,16 +93,143 @@ class DBProxy:
     # with .all()
     execute = all
 
+    def all_in_batches(
+        self, sql: str, *args: ValueForDB, batch_size: int = 1000, **kwargs
+    ) -> Iterator[Row]:
+        """Like .all(), but the rows are sent to Python and converted
+        batch_size at a time, so they don't all have to be held as Python
+        objects at once.
+
+        The backend still runs the whole query up front and holds all its
+        rows until they're fetched. Changes made to the database while
+        looping are not reflected in the rows."""
+        sql, args2 = emulate_named_args(sql, args, kwargs)
+        cursor = self._backend.db_open_cursor(sql, args2)
+        try:
+            while True:
+                rows = self._backend.db_fetch(cursor, batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            self._backend.db_close_cursor(cursor)
+
+    @contextmanager
+    def batch(self) -> Iterator[DBBatch]:
+        """Queue up queries, and send them to the backend in one call
+        when the block exits. Results are then available in
+        batch.results, in the order the queries were added.
+
+        with col.db.batch() as batch:
+            batch.scalar("select count() from cards")
+            batch.all("select id from decks")
+        count, decks = batch.results"""
+        batch = DBBatch()
+        yield batch
+        if not batch._queries:
+            return
+        for query in batch._queries:
+            self._mark_modified(query["sql"])
+        results = self._backend.db_batch(batch._queries)
+        batch.results = [
+            convert(rows) for convert, rows in zip(batch._converters, results)
+        ]
+
+    @contextmanager
+    def id_set(self, ids: Iterable[int]) -> Iterator[str]:
+        """Send ids to the backend as a temporary table, and yield SQL
+        that can be used in place of ids2str(ids):
+
+        with col.db.id_set(cids) as scids:
+            col.db.execute(f"update cards set ... where id in {scids}")
+
+        Unlike ids2str(), the SQL doesn't grow with the number of ids, and
+        is the same whatever the ids, so the backend can reuse its prepared
+        statements. Sets can be nested; the table is only valid inside the
+        block, and is emptied when leaving it."""
+        table = 0
+        while table in self._id_tables:
+            table += 1
+        self._id_tables.add(table)
+        try:
+            self._backend.db_set_ids(table, list(ids))
+            yield f"(select id from temp.ids{table})"
+        finally:
+            # don't keep the ids in the connection until the table is reused
+            self._backend.db_set_ids(table, [])
+            self._id_tables.discard(table)
+
+    def statement_cache_stats(self) -> Tuple[int, int]:
+        """(hits, misses) of the backend's prepared statement cache,
+        for statements run through this proxy."""
+        hits, misses = self._backend.db_statement_cache_stats()
+        return hits, misses
+
+    def _mark_modified(self, sql: str) -> None:
+        s = sql.strip().lower()
+        for stmt in "insert", "update", "delete":
+            if s.startswith(stmt):
+                self.mod = True
+
     # Updates
     ################
 
-    def executemany(self, sql: str, args: Iterable[Sequence[ValueForDB]]) -> None:
+    def executemany(
+        self, sql: str, args: Iterable[Sequence[ValueForDB]], batch_size: int = 1000,
+    ) -> None:
+        """Run sql once for each set of args.
+
+        If args is not a list, it is consumed and sent to the backend
+        batch_size items at a time, so a generator can be passed to
+        avoid building all the rows up front."""
         self.mod = True
         if isinstance(args, list):
-            list_args = args
-        else:
-            list_args = list(args)
-        self._backend.db_execute_many(sql, list_args)
+            self._backend.db_execute_many(sql, args)
+            return
+        it = iter(args)
+        while True:
+            batch = list(itertools.islice(it, batch_size))
+            if not batch:
+                break
+            self._backend.db_execute_many(sql, batch)
+
+
+class DBBatch:
+    """Queries collected by DBProxy.batch().
+
+    The methods mirror the DBProxy ones, but return nothing; their
+    results are placed in .results when the batch is run."""
+
+    def __init__(self) -> None:
+        self._queries: List[Dict[str, Any]] = []
+        self._converters: List[Callable[[List[Row]], Any]] = []
+        self.results: List[Any] = []
+
+    def _add(
+        self,
+        sql: str,
+        args: Tuple,
+        kwargs: Dict[str, Any],
+        first_row_only: bool,
+        convert: Callable[[List[Row]], Any],
+    ) -> None:
+        sql, args2 = emulate_named_args(sql, args, kwargs)
+        self._queries.append(dict(sql=sql, args=args2, first_row_only=first_row_only))
+        self._converters.append(convert)
+
+    def all(self, sql: str, *args: ValueForDB, **kwargs) -> None:
+        self._add(sql, args, kwargs, False, lambda rows: rows)
+
+    def list(self, sql: str, *args: ValueForDB, **kwargs) -> None:
+        self._add(sql, args, kwargs, False, lambda rows: [x[0] for x in rows])
+
+    def first(self, sql: str, *args: ValueForDB, **kwargs) -> None:
+        self._add(sql, args, kwargs, True, lambda rows: rows[0] if rows else None)
+
+    def scalar(self, sql: str, *args: ValueForDB, **kwargs) -> None:
+        self._add(sql, args, kwargs, True, lambda rows: rows[0][0] if rows else None)
+
+    execute = all
 
 
 # convert kwargs to list format
@@ -5,7 +5,7 @@ from __future__ import annotations
 
 import copy
 import pprint
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
 
 import anki  # pylint: disable=unused-import
 import anki.backend_pb2 as pb
@@ -56,6 +56,78 @@ class DecksDictProxy:
         self._col.decks.have(item)
 
 
+class DeckIndex:
+    """The deck hierarchy, by id and by name.
+
+    It is built from the deck names, and then kept up to date by the deck
+    manager when decks are added, renamed and removed, so that finding the
+    parents or children of a deck doesn't need to look at every deck.
+
+    names -- the name of each deck id
+    ids -- the id of each deck, by lowercased name
+    parentIds -- the ancestors of each deck, from the top level one down
+    childIds -- the descendants of each deck
+    """
+
+    def __init__(self, names: Iterable[Tuple[int, str]]) -> None:
+        self.names: Dict[int, str] = {}
+        self.ids: Dict[str, int] = {}
+        self.parentIds: Dict[int, Tuple[int, ...]] = {}
+        self.childIds: Dict[int, Set[int]] = {}
+        # parents first
+        for did, name in sorted(names, key=lambda item: item[1].count("::")):
+            self.add(did, name)
+
+    @staticmethod
+    def key(name: str) -> str:
+        return name.lower()
+
+    def id(self, name: str) -> Optional[int]:
+        return self.ids.get(self.key(name))
+
+    def sortedIds(self, dids: Iterable[int]) -> List[int]:
+        "dids, in the order of the deck list."
+        return sorted(dids, key=lambda did: self.key(self.names[did]).split("::"))
+
+    def add(self, did: int, name: str) -> None:
+        "Add a deck whose parents are already in the index."
+        self.names[did] = name
+        self.ids[self.key(name)] = did
+        parentIds: Tuple[int, ...] = ()
+        path = name.split("::")[:-1]
+        # the nearest existing ancestor
+        while path:
+            pid = self.id("::".join(path))
+            if pid is not None:
+                parentIds = self.parentIds[pid] + (pid,)
+                break
+            path.pop()
+        self.parentIds[did] = parentIds
+        self.childIds[did] = set()
+        for pid in parentIds:
+            self.childIds[pid].add(did)
+
+    def remove(self, did: int) -> None:
+        "Remove a deck and its children."
+        for child in [did] + list(self.childIds[did]):
+            name = self.names.pop(child)
+            if self.ids.get(self.key(name)) == child:
+                del self.ids[self.key(name)]
+            for pid in self.parentIds.pop(child):
+                if pid in self.childIds:
+                    self.childIds[pid].discard(child)
+            del self.childIds[child]
+
+    def rename(self, did: int, name: str) -> None:
+        "Rename a deck and its children, whose new parents are in the index."
+        oldName = self.names[did]
+        children = [(child, self.names[child]) for child in self.childIds[did]]
+        self.remove(did)
+        self.add(did, name)
+        for child, childName in sorted(children, key=lambda c: c[1].count("::")):
+            self.add(child, name + childName[len(oldName) :])
+
+
 class DeckManager:
     # Registry save/load
     #############################################################
@@ -63,6 +135,7 @@ class DeckManager:
     def __init__(self, col: anki.collection.Collection) -> None:
         self.col = col.weakref()
         self.decks = DecksDictProxy(col)
+        self._clear_cache()
 
     def save(self, deckOrOption: Dict = None) -> None:
         "Can be called with either a deck or a deck configuration."
@@ -86,6 +159,60 @@ class DeckManager:
         del d["col"]
         return f"{super().__repr__()} {pprint.pformat(d, width=300)}"
 
+    # Cache
+    #############################################################
+
+    # Decoded decks and deck configurations, by id. Like note types, the
+    # cached dicts are the ones handed to callers, so a caller mutating one
+    # must save it.
+    _deckCache: Dict[int, Dict] = {}
+    _confCache: Dict[int, Dict] = {}
+    # built when first needed
+    _index: Optional[DeckIndex] = None
+
+    def _clear_deck_cache(self) -> None:
+        "Forget the decks. Needed after changing decks behind our back."
+        self._deckCache = {}
+        self._index = None
+
+    def _clear_config_cache(self) -> None:
+        self._confCache = {}
+
+    def _clear_cache(self) -> None:
+        self._clear_deck_cache()
+        self._clear_config_cache()
+
+    def _deck_index(self) -> DeckIndex:
+        if self._index is None:
+            self._index = DeckIndex(
+                (deck.id, deck.name) for deck in self.all_names_and_ids()
+            )
+        return self._index
+
+    def _update_index(self, did: int, name: str) -> None:
+        "Record the new or renamed deck did, after saving it."
+        index = self._index
+        if index is None or index.names.get(did) == name:
+            return
+        # the backend may have adjusted the name, and created missing parents
+        name = self.get_legacy(did)["name"]
+        path = self.path(name)
+        moved = index.childIds.get(did, set()) | {did}
+        for depth in range(1, len(path)):
+            parentName = "::".join(path[:depth])
+            pid = index.id(parentName)
+            if pid is None:
+                pid = self.col.backend.get_deck_id_by_name(parentName)
+                index.add(pid, parentName)
+            elif pid in moved:
+                # moved below itself; start again from the backend
+                self._index = None
+                return
+        if did in index.names:
+            index.rename(did, name)
+        else:
+            index.add(did, name)
+
     # Deck save/load
     #############################################################
 
@@ -108,7 +235,17 @@ class DeckManager:
         if isinstance(did, str):
             did = int(did)
         assert cardsToo and childrenToo
+        # children are removed too; the index is updated below
+        index = self._index
+        self._clear_deck_cache()
         self.col.backend.remove_deck(did)
+        self._index = index
+        if index is not None and did in index.names:
+            if did == 1 or 1 in index.childIds[did]:
+                # the default deck is renamed rather than removed
+                self._index = None
+            else:
+                index.remove(did)
 
     def all_names_and_ids(
         self, skip_empty_default=False, include_filtered=True
@@ -119,16 +256,23 @@ class DeckManager:
         )
 
     def id_for_name(self, name: str) -> Optional[int]:
+        id = self._deck_index().id(name)
+        if id is not None:
+            return id
         try:
             return self.col.backend.get_deck_id_by_name(name)
         except NotFoundError:
             return None
 
     def get_legacy(self, did: int) -> Optional[Dict]:
-        try:
-            return from_json_bytes(self.col.backend.get_deck_legacy(did))
-        except NotFoundError:
-            return None
+        deck = self._deckCache.get(did)
+        if deck is None:
+            try:
+                deck = from_json_bytes(self.col.backend.get_deck_legacy(did))
+            except NotFoundError:
+                return None
+            self._deckCache[did] = deck
+        return deck
 
     def have(self, id: int) -> bool:
         return not self.get_legacy(int(id))
@@ -156,6 +300,20 @@ class DeckManager:
                 return match
         return None
 
+    def find_deck_in_tree_by_path(
+        self, node: DeckTreeNode, deck_id: int
+    ) -> Optional[DeckTreeNode]:
+        "Like find_deck_in_tree(), only looking below the deck's parents."
+        index = self._deck_index()
+        for did in index.parentIds.get(deck_id, ()) + (deck_id,):
+            for child in node.children:
+                if child.deck_id == did:
+                    node = child
+                    break
+            else:
+                return None
+        return node
+
     def all(self) -> List:
         "All decks. Expensive; prefer all_names_and_ids()"
         return self.get_all_legacy()
@@ -211,12 +369,15 @@ class DeckManager:
 
     def update(self, deck: Dict[str, Any], preserve_usn=True) -> None:
         "Add or update an existing deck. Used for syncing and merging."
+        # a rename also renames the children
+        self._clear_deck_cache()
         try:
             deck["id"] = self.col.backend.add_or_update_deck_legacy(
                 deck=to_json_bytes(deck), preserve_usn_and_mtime=preserve_usn
             )
         except anki.rsbackend.DeckIsFilteredError:
             raise DeckRenameError("deck was filtered")
+        self._update_index(deck["id"], deck["name"])
 
     def rename(self, deck: Dict[str, Any], newName: str) -> None:
         "Rename deck prefix to NAME if not exists. Updates children."
@@ -285,12 +446,17 @@ class DeckManager:
         return deck
 
     def get_config(self, conf_id: int) -> Any:
-        try:
-            return from_json_bytes(self.col.backend.get_deck_config_legacy(conf_id))
-        except NotFoundError:
-            return None
+        conf = self._confCache.get(conf_id)
+        if conf is None:
+            try:
+                conf = from_json_bytes(self.col.backend.get_deck_config_legacy(conf_id))
+            except NotFoundError:
+                return None
+            self._confCache[conf_id] = conf
+        return conf
 
     def update_config(self, conf: Dict[str, Any], preserve_usn=False) -> None:
+        self._clear_config_cache()
         conf["id"] = self.col.backend.add_or_update_deck_config_legacy(
             config=to_json_bytes(conf), preserve_usn_and_mtime=preserve_usn
         )
@@ -322,6 +488,7 @@ class DeckManager:
             if str(deck["conf"]) == str(id):
                 deck["conf"] = 1
                 self.save(deck)
+        self._clear_config_cache()
         self.col.backend.remove_deck_config(id)
 
     def setConf(self, grp: Dict[str, Any], id: int) -> None:
@@ -445,21 +612,24 @@ class DeckManager:
 
     def children(self, did: int) -> List[Tuple[Any, Any]]:
         "All children of did, as (name, id)."
-        name = self.get(did)["name"]
-        actv = []
-        for deck in self.all_names_and_ids():
-            if deck.name.startswith(name + "::"):
-                actv.append((deck.name, deck.id))
-        return actv
+        index = self._deck_index()
+        did = self.get(did)["id"]
+        return [
+            (index.names[child], child)
+            for child in index.sortedIds(index.childIds[did])
+        ]
 
     def child_ids(self, parent_name: str) -> Iterable[int]:
-        prefix = parent_name + "::"
-        return (d.id for d in self.all_names_and_ids() if d.name.startswith(prefix))
+        index = self._deck_index()
+        did = index.id(parent_name)
+        if did is None:
+            return []
+        return index.sortedIds(index.childIds[did])
 
     def deck_and_child_ids(self, deck_id: int) -> List[int]:
-        parent_name = self.get_legacy(deck_id)["name"]
+        index = self._deck_index()
         out = [deck_id]
-        out.extend(self.child_ids(parent_name))
+        out.extend(index.sortedIds(index.childIds[deck_id]))
         return out
 
     def childDids(self, did: int, childMap: Dict[int, Any]) -> List:
@@ -473,58 +643,47 @@ class DeckManager:
         return arr
 
     def childMap(self) -> Dict[Any, Dict[Any, dict]]:
-        nameMap = self.nameMap()
-        childMap = {}
+        index = self._deck_index()
+        childMap: Dict[int, Dict[int, Any]] = {}
 
-        # go through all decks, sorted by name
-        for deck in sorted(self.all(), key=self.key):
+        # go through all decks, sorted by name, so parents come first
+        for did in index.sortedIds(index.names):
             node: Dict[int, Any] = {}
-            childMap[deck["id"]] = node
+            childMap[did] = node
 
-            # add note to immediate parent
-            immediateParent = self.immediate_parent(deck["name"])
-            if immediateParent is not None:
-                pid = nameMap[immediateParent]["id"]
-                childMap[pid][deck["id"]] = node
+            # add node to immediate parent
+            parentIds = index.parentIds[did]
+            if parentIds:
+                childMap[parentIds[-1]][did] = node
 
         return childMap
 
     def parents(self, did: int, nameMap: Optional[Any] = None) -> List:
         "All parents of did."
-        # get parent and grandparent names
-        ancestorsNames: List[str] = []
-        for part in self.immediate_parent_path(self.get(did)["name"]):
-            if not ancestorsNames:
-                ancestorsNames.append(part)
-            else:
-                ancestorsNames.append(ancestorsNames[-1] + "::" + part)
-        # convert to objects
-        for index, ancestor in enumerate(ancestorsNames):
-            if nameMap:
-                deck = nameMap[ancestor]
-            else:
-                deck = self.get(self.id(ancestor))
-            ancestorsNames[index] = deck
-        return ancestorsNames
+        index = self._deck_index()
+        parentIds = index.parentIds.get(self.get(did)["id"], ())
+        if nameMap:
+            return [nameMap[index.names[pid]] for pid in parentIds]
+        return [self.get(pid) for pid in parentIds]
 
     def parentsByName(self, name: str) -> List:
         "All existing parents of name"
-        if "::" not in name:
-            return []
-        names = self.immediate_parent_path(name)
-        head = []
-        ancestorsNames = []
-
-        while names:
-            head.append(names.pop(0))
-            deck = self.byName("::".join(head))
-            if deck:
-                ancestorsNames.append(deck)
-
-        return ancestorsNames
+        index = self._deck_index()
+        path = self.immediate_parent_path(name)
+        ancestors = []
+        for depth in range(1, len(path) + 1):
+            did = index.id("::".join(path[:depth]))
+            if did is not None:
+                ancestors.append(self.get(did))
+        return ancestors
 
     def nameMap(self) -> dict:
-        return dict((deck["name"], deck) for deck in self.all())
+        index = self._deck_index()
+        if len(self._deckCache) < len(index.names):
+            # one call rather than one per deck
+            for deck in self.get_all_legacy():
+                self._deckCache.setdefault(deck["id"], deck)
+        return dict((deck["name"], deck) for deck in map(self.get_legacy, index.names))
 
     # Dynamic decks
     ##########################################################################
@@ -7,14 +7,17 @@ import re
 import shutil
 import unicodedata
 import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from io import BufferedWriter
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
 from zipfile import ZipFile
 
 from anki import hooks
-from anki.collection import Collection
+from anki.collection import Collection, auxiliary_collection
 from anki.lang import _
-from anki.utils import ids2str, namedtmp, splitFields, stripHTML
+from anki.template import render_existing_cards
+from anki.utils import namedtmp, splitFields, stripHTML
 
 
 class Exporter:
@@ -105,25 +108,24 @@ class TextCardExporter(Exporter):
     key = _("Cards in Plain Text")
     ext = ".txt"
     includeHTML = True
+    # cards loaded and rendered per backend call
+    renderBatchSize = 1000
 
     def __init__(self, col) -> None:
         Exporter.__init__(self, col)
 
     def doExport(self, file) -> None:
         ids = sorted(self.cardIds())
-        strids = ids2str(ids)
 
         def esc(cardContent):
             # strip off the repeated question in answer if exists
             cardContent = re.sub("(?si)^.*<hr id=answer>\n*", "", cardContent)
             return self.processText(cardContent)
 
-        out = ""
-        for cid in ids:
-            card = self.col.getCard(cid)
-            out += esc(card.q())
-            out += "\t" + esc(card.a()) + "\n"
-        file.write(out.encode("utf-8"))
+        for i in range(0, len(ids), self.renderBatchSize):
+            cards = render_existing_cards(self.col, ids[i : i + self.renderBatchSize])
+            out = "".join(esc(card.q()) + "\t" + esc(card.a()) + "\n" for card in cards)
+            file.write(out.encode("utf-8"))
 
 
 # Notes as TSV
@@ -144,14 +146,16 @@ class TextNoteExporter(Exporter):
     def doExport(self, file: BufferedWriter) -> None:
         cardIds = self.cardIds()
         data = []
-        for id, flds, tags in self.col.db.execute(
-            """
+        with self.col.db.id_set(cardIds) as scids:
+            rows = self.col.db.execute(
+                """
 select guid, flds, tags from notes
 where id in
 (select nid from cards
 where cards.id in %s)"""
-            % ids2str(cardIds)
-        ):
+                % scids
+            )
+        for id, flds, tags in rows:
             row = []
             # note id
             if self.includeID:
@@ -201,44 +205,61 @@ class AnkiExporter(Exporter):
             os.unlink(path)
         except (IOError, OSError):
             pass
-        self.dst = Collection(path)
+        self.dst = auxiliary_collection(path)
         self.src = self.col
         # find cards
         cids = self.cardIds()
         # copy cards, noting used nids
         nids = {}
-        data = []
-        for row in self.src.db.execute(
-            "select * from cards where id in " + ids2str(cids)
-        ):
-            nids[row[1]] = True
-            data.append(row)
-            # clear flags
-            row = list(row)
-            row[-2] = 0
-        self.dst.db.executemany(
-            "insert into cards values (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)", data
-        )
-        # notes
-        strnids = ids2str(list(nids.keys()))
-        notedata = []
-        for row in self.src.db.all("select * from notes where id in " + strnids):
-            # remove system tags if not exporting scheduling info
-            if not self.includeSched:
-                row = list(row)
-                row[5] = self.removeSystemTags(row[5])
-            notedata.append(row)
-        self.dst.db.executemany(
-            "insert into notes values (?,?,?,?,?,?,?,?,?,?,?)", notedata
-        )
-        # models used by the notes
-        mids = self.dst.db.list("select distinct mid from notes where id in " + strnids)
-        # card history and revlog
-        if self.includeSched:
-            data = self.src.db.all("select * from revlog where cid in " + ids2str(cids))
+
+        def cardRows(scids):
+            for row in self.src.db.all_in_batches(
+                "select * from cards where id in " + scids
+            ):
+                nids[row[1]] = True
+                yield row
+
+        with self.src.db.id_set(cids) as scids:
             self.dst.db.executemany(
-                "insert into revlog values (?,?,?,?,?,?,?,?,?)", data
+                "insert into cards values (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                cardRows(scids),
             )
+        # notes, noting used media
+        media = {}
+        self.mediaDir = self.src.media.dir()
+
+        def noteRows(snids):
+            for row in self.src.db.all_in_batches(
+                "select * from notes where id in " + snids
+            ):
+                # remove system tags if not exporting scheduling info
+                if not self.includeSched:
+                    row = list(row)
+                    row[5] = self.removeSystemTags(row[5])
+                if self.includeMedia:
+                    for file in self.src.media.filesInStr(row[2], row[6]):
+                        # skip files in subdirs
+                        if file != os.path.basename(file):
+                            continue
+                        media[file] = True
+                yield row
+
+        with self.src.db.id_set(nids) as snids:
+            self.dst.db.executemany(
+                "insert into notes values (?,?,?,?,?,?,?,?,?,?,?)", noteRows(snids)
+            )
+        # models used by the notes, which are the only ones in the new
+        # collection
+        mids = self.dst.db.list("select distinct mid from notes")
+        # card history and revlog
+        if self.includeSched:
+            with self.src.db.id_set(cids) as scids:
+                self.dst.db.executemany(
+                    "insert into revlog values (?,?,?,?,?,?,?,?,?)",
+                    self.src.db.all_in_batches(
+                        "select * from revlog where cid in " + scids
+                    ),
+                )
         else:
             # need to reset card state
             self.dst.sched.resetCards(cids)
@@ -268,18 +289,8 @@ class AnkiExporter(Exporter):
         for dc in self.src.decks.allConf():
             if dc["id"] in dconfs:
                 self.dst.decks.update_config(dc)
-        # find used media
-        media = {}
-        self.mediaDir = self.src.media.dir()
+        # find media used by the templates
         if self.includeMedia:
-            for row in notedata:
-                flds = row[6]
-                mid = row[2]
-                for file in self.src.media.filesInStr(mid, flds):
-                    # skip files in subdirs
-                    if file != os.path.basename(file):
-                        continue
-                    media[file] = True
             if self.mediaDir:
                 for fname in os.listdir(self.mediaDir):
                     path = os.path.join(self.mediaDir, fname)
@@ -327,6 +338,10 @@ class AnkiPackageExporter(AnkiExporter):
 
     key = _("Anki Deck Package")
     ext = ".apkg"
+    # number of threads reading media files; None for the executor default
+    mediaWorkers: Optional[int] = None
+    # larger files are streamed into the zip instead of being read ahead
+    mediaReadAheadLimit = 16 * 1024 * 1024
 
     def __init__(self, col: Collection) -> None:
         AnkiExporter.__init__(self, col)
@@ -364,22 +379,68 @@ class AnkiPackageExporter(AnkiExporter):
         return media
 
     def _exportMedia(self, zip: ZipFile, files: List[str], fdir: str) -> Dict[str, str]:
-        media = {}
-        for index, file in enumerate(files):
-            cStr = str(index)
-            mpath = os.path.join(fdir, file)
-            if os.path.isdir(mpath):
-                continue
-            if os.path.exists(mpath):
-                if re.search(r"\.svg$", file, re.IGNORECASE):
-                    zip.write(mpath, cStr, zipfile.ZIP_DEFLATED)
-                else:
-                    zip.write(mpath, cStr, zipfile.ZIP_STORED)
-                media[cStr] = unicodedata.normalize("NFC", file)
-                hooks.media_files_did_export(index)
-
+        """Add FILES from FDIR to ZIP, returning the zip name -> filename map.
+
+        Worker threads read the files ahead, while this thread writes them
+        to the zip in order."""
+        media: Dict[str, str] = {}
+        window = 2 * (self.mediaWorkers or os.cpu_count() or 1)
+        pending: Deque[Tuple[int, str, str, Future]] = deque()
+        with ThreadPoolExecutor(max_workers=self.mediaWorkers) as executor:
+            for index, file in enumerate(files):
+                mpath = os.path.join(fdir, file)
+                pending.append(
+                    (index, file, mpath, executor.submit(self._readMedia, mpath))
+                )
+                if len(pending) >= window:
+                    self._writeMedia(zip, media, *pending.popleft())
+            while pending:
+                self._writeMedia(zip, media, *pending.popleft())
         return media
 
+    def _readMedia(
+        self, path: str
+    ) -> Tuple[Optional[zipfile.ZipInfo], Optional[bytes]]:
+        """Zip header and contents for the file at PATH.
+
+        The header is None if the file is missing or a folder. Contents are
+        None if the file is too large to be held in memory."""
+        try:
+            if os.path.isdir(path):
+                return None, None
+            info = zipfile.ZipInfo.from_file(path)
+            if info.file_size > self.mediaReadAheadLimit:
+                return info, None
+            with open(path, "rb") as file:
+                return info, file.read()
+        except (IOError, OSError):
+            return None, None
+
+    def _writeMedia(
+        self,
+        zip: ZipFile,
+        media: Dict[str, str],
+        index: int,
+        file: str,
+        mpath: str,
+        read: Future,
+    ) -> None:
+        info, data = read.result()
+        if info is None:
+            return
+        cStr = str(index)
+        if re.search(r"\.svg$", file, re.IGNORECASE):
+            compression = zipfile.ZIP_DEFLATED
+        else:
+            compression = zipfile.ZIP_STORED
+        if data is None:
+            zip.write(mpath, cStr, compression)
+        else:
+            info.filename = cStr
+            zip.writestr(info, data, compression)
+        media[cStr] = unicodedata.normalize("NFC", file)
+        hooks.media_files_did_export(index)
+
     def prepareMedia(self) -> None:
         # chance to move each file in self.mediaFiles into place before media
         # is zipped up
@@ -389,7 +450,7 @@ class AnkiPackageExporter(AnkiExporter):
     # data they don't understand
     def _addDummyCollection(self, zip) -> None:
         path = namedtmp("dummy.anki2")
-        col = Collection(path)
+        col = auxiliary_collection(path)
         note = col.newNote()
         note[_("Front")] = "This file requires a newer version of Anki."
         col.addNote(note)
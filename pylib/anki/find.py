@@ -6,7 +6,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Optional, Set
 
 from anki.hooks import *
-from anki.utils import ids2str, splitFields, stripHTMLMedia
+from anki.utils import splitFields, stripHTMLMedia
 
 if TYPE_CHECKING:
     from anki.collection import Collection
@@ -88,19 +88,20 @@ def findDupes(
                     break
         return fields[mid]
 
-    for nid, mid, flds in col.db.all(
-        "select id, mid, flds from notes where id in " + ids2str(col.findNotes(search))
-    ):
-        flds = splitFields(flds)
-        ord = ordForMid(mid)
-        if ord is None:
-            continue
-        val = flds[ord]
-        val = stripHTMLMedia(val)
-        # empty does not count as duplicate
-        if not val:
-            continue
-        vals.setdefault(val, []).append(nid)
-        if len(vals[val]) == 2:
-            dupes.append((val, vals[val]))
+    with col.db.id_set(col.findNotes(search)) as snids:
+        for nid, mid, flds in col.db.all_in_batches(
+            "select id, mid, flds from notes where id in " + snids
+        ):
+            flds = splitFields(flds)
+            ord = ordForMid(mid)
+            if ord is None:
+                continue
+            val = flds[ord]
+            val = stripHTMLMedia(val)
+            # empty does not count as duplicate
+            if not val:
+                continue
+            vals.setdefault(val, []).append(nid)
+            if len(vals[val]) == 2:
+                dupes.append((val, vals[val]))
     return dupes
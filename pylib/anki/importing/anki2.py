@@ -2,10 +2,12 @@
 # License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
 
 import os
+import shutil
 import unicodedata
-from typing import Any, Dict, List, Optional, Tuple
+from hashlib import sha1
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple
 
-from anki.collection import Collection
+from anki.collection import Collection, auxiliary_collection
 from anki.consts import *
 from anki.decks import DeckManager
 from anki.importing.base import Importer
@@ -17,6 +19,61 @@ MID = 2
 MOD = 3
 
 
+class MediaIndex:
+    """Sizes and checksums of the media files of a collection, for an import.
+
+    Each is computed at most once per file, and checksums are only computed
+    when sizes are equal. Files are streamed rather than read in full.
+
+    size -- size of a file, or None if it is missing
+    open -- a file object to read a file from, or None if it is missing
+    """
+
+    def __init__(
+        self,
+        size: Callable[[str], Optional[int]],
+        open: Callable[[str], Optional[IO[bytes]]],
+    ) -> None:
+        self._size = size
+        self._open = open
+        self._sizes: Dict[str, Optional[int]] = {}
+        self._checksums: Dict[str, Optional[str]] = {}
+
+    def size(self, fname: str) -> Optional[int]:
+        if fname not in self._sizes:
+            self._sizes[fname] = self._size(fname)
+        return self._sizes[fname]
+
+    def checksum(self, fname: str) -> Optional[str]:
+        if fname not in self._checksums:
+            self._checksums[fname] = self._checksum(fname)
+        return self._checksums[fname]
+
+    def _checksum(self, fname: str) -> Optional[str]:
+        file = self._open(fname)
+        if file is None:
+            return None
+        hash = sha1()
+        with file:
+            for chunk in iter(lambda: file.read(65536), b""):
+                hash.update(chunk)
+        return hash.hexdigest()
+
+    def same(self, fname: str, other: "MediaIndex", otherName: str) -> bool:
+        "True if FNAME here has the same content as OTHERNAME of OTHER."
+        if self.size(fname) != other.size(otherName):
+            return False
+        return self.checksum(fname) == other.checksum(otherName)
+
+    def copied(self, fname: str, other: "MediaIndex", otherName: str) -> None:
+        "Record that OTHERNAME of OTHER was written here as FNAME."
+        self._sizes[fname] = other.size(otherName)
+        if otherName in other._checksums:
+            self._checksums[fname] = other._checksums[otherName]
+        else:
+            self._checksums.pop(fname, None)
+
+
 class Anki2Importer(Importer):
 
     """
@@ -37,6 +94,9 @@ class Anki2Importer(Importer):
     allowUpdate = True
     src: Collection
     dst: Collection
+    # built for each import
+    _srcMedia: MediaIndex
+    _dstMedia: MediaIndex
 
     def __init__(self, col: Collection, file: str) -> None:
         super().__init__(col, file)
@@ -60,7 +120,7 @@ class Anki2Importer(Importer):
         self.mustResetLearning = False
 
         self.dst = self.col
-        self.src = Collection(self.file)
+        self.src = auxiliary_collection(self.file)
 
         if not importingV2 and self.col.schedVer() != 1:
             # any scheduling included?
@@ -69,6 +129,8 @@ class Anki2Importer(Importer):
 
     def _import(self) -> None:
         self._decks = {}
+        self._srcMedia = MediaIndex(self._srcMediaSize, self._srcMediaOpen)
+        self._dstMedia = MediaIndex(self._dstMediaSize, self._dstMediaOpen)
         if self.deckPrefix:
             id = self.dst.decks.id(self.deckPrefix)
             self.dst.decks.select(id)
@@ -90,7 +152,7 @@ class Anki2Importer(Importer):
         # build guid -> (id,mod,mid) hash & map of existing note ids
         self._notes: Dict[str, Tuple[int, int, int]] = {}
         existing = {}
-        for id, guid, mod, mid in self.dst.db.execute(
+        for id, guid, mod, mid in self.dst.db.all_in_batches(
             "select id, guid, mod, mid from notes"
         ):
             self._notes[guid] = (id, mod, mid)
@@ -109,7 +171,7 @@ class Anki2Importer(Importer):
         dupesIdentical = []
         dupesIgnored = []
         total = 0
-        for note in self.src.db.execute("select * from notes"):
+        for note in self.src.db.all_in_batches("select * from notes"):
             total += 1
             # turn the db result into a mutable list
             note = list(note)
@@ -323,7 +385,7 @@ class Anki2Importer(Importer):
         # build map of (guid, ord) -> cid and used id cache
         self._cards: Dict[Tuple[str, int], int] = {}
         existing = {}
-        for guid, ord, cid in self.dst.db.execute(
+        for guid, ord, cid in self.dst.db.all_in_batches(
             "select note.guid, card.ord, card.id from cards card, notes note "
             "where card.nid = note.id"
         ):
@@ -331,8 +393,8 @@ class Anki2Importer(Importer):
             self._cards[(guid, ord)] = cid
         # loop through src
         cards = []
-        revlog = []
-        cnt = 0
+        # src card id -> id in dst
+        cidMap: Dict[int, int] = {}
         usn = self.dst.usn()
         aheadBy = self.src.sched.today - self.dst.sched.today
         for (
@@ -356,7 +418,7 @@ class Anki2Importer(Importer):
             odid,
             flags,
             data,
-        ) in self.src.db.execute(
+        ) in self.src.db.all_in_batches(
             "select note.guid, note.mid, card.* from cards card, notes note "
             "where card.nid = note.id"
         ):
@@ -372,10 +434,12 @@ class Anki2Importer(Importer):
                 # fixme: in future, could update if newer mod time
                 continue
             # doesn't exist. strip off note info, and save src id for later
+            srcCid = scid
             # ensure the card id is unique
             while scid in existing:
                 scid += 999
             existing[scid] = True
+            cidMap[srcCid] = scid
             # update cid, nid, etc
             nid = self._notes[guid][0]
             did = self._did(did)
@@ -426,25 +490,30 @@ class Anki2Importer(Importer):
                     data,
                 )
             )
-            # we need to import revlog, rewriting card ids and bumping usn
-            for rev in self.src.db.execute("select * from revlog where cid = ?", scid):
-                rev = list(rev)
-                rev[1] = scid
-                rev[2] = self.dst.usn()
-                revlog.append(rev)
-            cnt += 1
         # apply
         self.dst.db.executemany(
             """
 insert or ignore into cards values (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
             cards,
         )
+        # we need to import revlog, rewriting card ids and bumping usn
         self.dst.db.executemany(
             """
 insert or ignore into revlog values (?,?,?,?,?,?,?,?,?)""",
-            revlog,
+            self._revlogRows(cidMap, usn),
         )
 
+    def _revlogRows(self, cidMap: Dict[int, int], usn: int) -> Iterator[List[Any]]:
+        "Revlog entries of the imported cards, in a single pass over src."
+        for rev in self.src.db.all_in_batches("select * from revlog"):
+            cid = cidMap.get(rev[1])
+            if cid is None:
+                continue
+            rev = list(rev)
+            rev[1] = cid
+            rev[2] = usn
+            yield rev
+
     # Media
     ######################################################################
 
@@ -474,10 +543,6 @@ insert or ignore into revlog values (?,?,?,?,?,?,?,?,?)""",
         "Data for FNAME in src collection."
         return self._mediaData(fname, self.src.media.dir())
 
-    def _dstMediaData(self, fname: str) -> bytes:
-        "Data for FNAME in dst collection."
-        return self._mediaData(fname, self.dst.media.dir())
-
     def _writeDstMedia(self, fname: str, data: bytes) -> None:
         path = os.path.join(self.dst.media.dir(), unicodedata.normalize("NFC", fname))
         try:
@@ -487,29 +552,68 @@ insert or ignore into revlog values (?,?,?,?,?,?,?,?,?)""",
             # the user likely used subdirectories
             pass
 
+    def _srcMediaSize(self, fname: str) -> Optional[int]:
+        return self._mediaSize(fname, self.src.media.dir())
+
+    def _dstMediaSize(self, fname: str) -> Optional[int]:
+        return self._mediaSize(fname, self.dst.media.dir())
+
+    def _mediaSize(self, fname: str, dir: str) -> Optional[int]:
+        try:
+            return os.path.getsize(os.path.join(dir, fname))
+        except (IOError, OSError):
+            return None
+
+    def _srcMediaOpen(self, fname: str) -> Optional[IO[bytes]]:
+        return self._mediaOpen(fname, self.src.media.dir())
+
+    def _dstMediaOpen(self, fname: str) -> Optional[IO[bytes]]:
+        return self._mediaOpen(fname, self.dst.media.dir())
+
+    def _mediaOpen(self, fname: str, dir: str) -> Optional[IO[bytes]]:
+        try:
+            return open(os.path.join(dir, fname), "rb")
+        except (IOError, OSError):
+            return None
+
+    def _copySrcMedia(self, fname: str, dstName: str) -> None:
+        "Stream FNAME from src into the dst media folder as DSTNAME."
+        src = self._srcMediaOpen(fname)
+        if src is None:
+            return
+        dstName = unicodedata.normalize("NFC", dstName)
+        path = os.path.join(self.dst.media.dir(), dstName)
+        try:
+            with src, open(path, "wb") as file_object:
+                shutil.copyfileobj(src, file_object)
+        except (OSError, IOError):
+            # the user likely used subdirectories
+            return
+        self._dstMedia.copied(dstName, self._srcMedia, fname)
+
     def _mungeMedia(self, mid: int, fieldsStr: str) -> str:
         fields = splitFields(fieldsStr)
 
         def repl(match):
             fname = match.group("fname")
-            srcData = self._srcMediaData(fname)
-            dstData = self._dstMediaData(fname)
-            if not srcData:
+            if not self._srcMedia.size(fname):
                 # file was not in source, ignore
                 return match.group(0)
+            # files are written to dst with normalized names
+            dstName = unicodedata.normalize("NFC", fname)
             # if model-local file exists from a previous import, use that
             name, ext = os.path.splitext(fname)
             lname = "%s_%s%s" % (name, mid, ext)
-            if self.dst.media.have(lname):
+            if self.dst.media.have(unicodedata.normalize("NFC", lname)):
                 return match.group(0).replace(fname, lname)
             # if missing or the same, pass unmodified
-            elif not dstData or srcData == dstData:
-                # need to copy?
-                if not dstData:
-                    self._writeDstMedia(fname, srcData)
+            elif not self._dstMedia.size(dstName):
+                self._copySrcMedia(fname, dstName)
+                return match.group(0)
+            elif self._dstMedia.same(dstName, self._srcMedia, fname):
                 return match.group(0)
             # exists but does not match, so we need to dedupe
-            self._writeDstMedia(lname, srcData)
+            self._copySrcMedia(fname, lname)
             return match.group(0).replace(fname, lname)
 
         for i in range(len(fields)):
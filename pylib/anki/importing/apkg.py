@@ -5,7 +5,7 @@ import json
 import os
 import unicodedata
 import zipfile
-from typing import Any, Dict, Optional
+from typing import IO, Any, Dict, Optional
 
 from anki.importing.anki2 import Anki2Importer
 from anki.utils import tmpfile
@@ -57,3 +57,17 @@ class AnkiPackageImporter(Anki2Importer):
                 self.nameToNum[fname]
             )  # pytype: disable=attribute-error
         return None
+
+    def _srcMediaSize(self, fname: str) -> Optional[int]:
+        if fname in self.nameToNum:
+            return self.zip.getinfo(
+                self.nameToNum[fname]
+            ).file_size  # pytype: disable=attribute-error
+        return None
+
+    def _srcMediaOpen(self, fname: str) -> Optional[IO[bytes]]:
+        if fname in self.nameToNum:
+            return self.zip.open(
+                self.nameToNum[fname]
+            )  # pytype: disable=attribute-error
+        return None
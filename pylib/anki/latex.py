@@ -3,11 +3,17 @@
 
 from __future__ import annotations
 
+import hashlib
 import html
+import json
 import os
 import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from typing import Any, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import anki
 from anki import hooks
@@ -15,7 +21,7 @@ from anki.lang import _
 from anki.models import NoteType
 from anki.rsbackend import pb
 from anki.template import TemplateRenderContext, TemplateRenderOutput
-from anki.utils import call, isMac, namedtmp, tmpdir
+from anki.utils import call, isMac, tmpdir
 
 pngCommands = [
     ["latex", "-interaction=nonstopmode", "tmp.tex"],
@@ -28,6 +34,7 @@ svgCommands = [
 ]
 
 build = True  # if off, use existing media but don't create new
+cache: Optional[LatexCache] = None  # if set, built images are kept there
 
 # add standard tex install location to osx
 if isMac:
@@ -82,36 +89,114 @@ def render_latex_returning_errors(
     """Returns (text, errors).
 
     errors will be non-empty if LaTeX failed to render."""
+    html, jobs = latex_render_jobs(html, model, col, expand_clozes)
+    errors = []
+    for _job, err in save_latex_images(col, jobs):
+        if err is not None:
+            errors.append(err)
+
+    return html, errors
+
+
+@dataclass
+class LatexRenderJob:
+    "A LaTeX image missing from the media folder."
+    filename: str
+    latex: str
+    svg: bool
+
+
+def latex_render_jobs(
+    html: str,
+    model: NoteType,
+    col: anki.collection.Collection,
+    expand_clozes: bool = False,
+) -> Tuple[str, List[LatexRenderJob]]:
+    """Returns (text, jobs), with a job for each image the text refers to
+    that needs to be built."""
     svg = model.get("latexsvg", False)
     header = model["latexPre"]
     footer = model["latexPost"]
 
     proto = col.backend.extract_latex(text=html, svg=svg, expand_clozes=expand_clozes)
     out = ExtractedLatexOutput.from_proto(proto)
-    errors = []
-    html = out.html
-
+    jobs = []
+    filenames = set()
     for latex in out.latex:
-        # don't need to render?
-        if not build or col.media.have(latex.filename):
+        # don't need to render, or already have a job for it?
+        if not build or latex.filename in filenames:
             continue
+        filenames.add(latex.filename)
+        if col.media.have(latex.filename):
+            continue
+        # add header/footer
+        source = header + "\n" + latex.latex_body + "\n" + footer
+        jobs.append(LatexRenderJob(filename=latex.filename, latex=source, svg=svg))
 
-        err = _save_latex_image(col, latex, header, footer, svg)
-        if err is not None:
-            errors.append(err)
-
-    return html, errors
+    return out.html, jobs
 
 
-def _save_latex_image(
+def save_latex_images(
     col: anki.collection.Collection,
-    extracted: ExtractedLatex,
-    header: str,
-    footer: str,
-    svg: bool,
-) -> Optional[str]:
-    # add header/footer
-    latex = header + "\n" + extracted.latex_body + "\n" + footer
+    jobs: Iterable[LatexRenderJob],
+    workers: Optional[int] = None,
+) -> Iterator[Tuple[LatexRenderJob, Optional[str]]]:
+    """Render jobs on up to `workers` threads, defaulting to the number of
+    CPUs, and add the images to the media folder.
+
+    Each job runs the LaTeX tools in a folder of its own, so they can run
+    side by side. Yields (job, error) as jobs complete; error is None on
+    success. Closing the generator cancels the jobs that haven't started."""
+    workers = workers or os.cpu_count() or 1
+    running: Dict[Future, LatexRenderJob] = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            for job in jobs:
+                err = _latex_error(job.latex)
+                if err is not None:
+                    yield job, err
+                    continue
+                data = cache.get(job) if cache else None
+                if data is not None:
+                    col.media.write_data(job.filename, data)
+                    yield job, None
+                    continue
+                running[executor.submit(_build_latex_image, job)] = job
+                while len(running) >= workers * 2:
+                    yield from _save_finished(col, running)
+            while running:
+                yield from _save_finished(col, running)
+        finally:
+            for future in running:
+                future.cancel()
+
+
+def _save_finished(
+    col: anki.collection.Collection, running: Dict[Future, LatexRenderJob]
+) -> Iterator[Tuple[LatexRenderJob, Optional[str]]]:
+    "Wait for at least one job, and add the finished images to the media folder."
+    done, _pending = wait(running, return_when=FIRST_COMPLETED)
+    for future in done:
+        job = running.pop(future)
+        data, err, elapsed = future.result()
+        if data is not None:
+            col.media.write_data(job.filename, data)
+            if cache:
+                cache.put(job, data, elapsed)
+        yield job, err
+
+
+def _build_latex_image(
+    job: LatexRenderJob,
+) -> Tuple[Optional[bytes], Optional[str], float]:
+    "Render job, returning (data, error, seconds taken)."
+    start = time.time()
+    data, err = _render_latex(job.latex, job.svg)
+    return data, err, time.time() - start
+
+
+def _latex_error(latex: str) -> Optional[str]:
+    "An error message if latex uses a forbidden command."
     # it's only really secure if run in a jail, but these are the most common
     tmplatex = latex.replace("\\includegraphics", "")
     for bad in (
@@ -138,7 +223,13 @@ package in the LaTeX header instead."""
                 )
                 % bad
             )
+    return None
+
 
+def _render_latex(latex: str, svg: bool) -> Tuple[Optional[bytes], Optional[str]]:
+    """Run the LaTeX tools on latex in a new temp folder.
+
+    Returns (data, None) with the png/svg image, or (None, error)."""
     # commands to use
     if svg:
         latexCmds = svgCommands
@@ -147,36 +238,35 @@ package in the LaTeX header instead."""
         latexCmds = pngCommands
         ext = "png"
 
-    # write into a temp file
-    log = open(namedtmp("latex_log.txt"), "w")
-    texpath = namedtmp("tmp.tex")
-    texfile = open(texpath, "w", encoding="utf8")
-    texfile.write(latex)
-    texfile.close()
-    oldcwd = os.getcwd()
-    png_or_svg = namedtmp("tmp.%s" % ext)
-    try:
-        # generate png/svg
-        os.chdir(tmpdir())
+    # the folder is kept on error, so the user can inspect it
+    dir = tempfile.mkdtemp(prefix="latex-", dir=tmpdir())
+    texpath = os.path.join(dir, "tmp.tex")
+    logpath = os.path.join(dir, "latex_log.txt")
+    with open(texpath, "w", encoding="utf8") as texfile:
+        texfile.write(latex)
+    # pass the environment explicitly, as other threads may be changing it
+    env = dict(os.environ)
+    env.pop("LD_LIBRARY_PATH", None)
+    # generate png/svg
+    failed = None
+    with open(logpath, "w") as log:
         for latexCmd in latexCmds:
-            if call(latexCmd, stdout=log, stderr=log):
-                return _errMsg(latexCmd[0], texpath)
-        # add to media
-        with open(png_or_svg, "rb") as file:
-            data = file.read()
-        col.media.write_data(extracted.filename, data)
-        os.unlink(png_or_svg)
-        return None
-    finally:
-        os.chdir(oldcwd)
-        log.close()
-
-
-def _errMsg(type: str, texpath: str) -> Any:
+            if call(latexCmd, stdout=log, stderr=log, cwd=dir, env=env):
+                failed = latexCmd[0]
+                break
+    if failed:
+        return None, _errMsg(failed, texpath, logpath)
+    with open(os.path.join(dir, "tmp.%s" % ext), "rb") as file:
+        data = file.read()
+    shutil.rmtree(dir, ignore_errors=True)
+    return data, None
+
+
+def _errMsg(type: str, texpath: str, logpath: str) -> Any:
     msg = (_("Error executing %s.") % type) + "<br>"
     msg += (_("Generated file: %s") % texpath) + "<br>"
     try:
-        with open(namedtmp("latex_log.txt", rm=False)) as f:
+        with open(logpath) as f:
             log = f.read()
         if not log:
             raise Exception()
@@ -186,4 +276,118 @@ def _errMsg(type: str, texpath: str) -> Any:
     return msg
 
 
+# Render cache
+##########################################################################
+
+
+class LatexCache:
+    """Images built from LaTeX, kept on disk so that they can be reused by
+    all profiles, and after the media folder has been cleaned up.
+
+    Images are stored under a hash of their LaTeX source, header and
+    footer included, and of their format. When the cache grows beyond
+    maxSize bytes, the least recently used images are removed."""
+
+    maxSize = 100 * 1024 * 1024
+
+    def __init__(self, dir: str, maxSize: Optional[int] = None) -> None:
+        self.dir = dir
+        if maxSize is not None:
+            self.maxSize = maxSize
+        # total size of the images, computed on first write
+        self._size: Optional[int] = None
+        # counters for the current session
+        self.hits = 0
+        self.misses = 0
+        self.buildTime = 0.0
+
+    def path(self, job: LatexRenderJob) -> str:
+        source = json.dumps([job.latex, job.svg])
+        key = hashlib.sha1(source.encode("utf8")).hexdigest()
+        ext = "svg" if job.svg else "png"
+        return os.path.join(self.dir, key[:2], "%s.%s" % (key, ext))
+
+    def get(self, job: LatexRenderJob) -> Optional[bytes]:
+        "The cached image for job, or None."
+        path = self.path(job)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except OSError:
+            self.misses += 1
+            return None
+        # mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return data
+
+    def put(self, job: LatexRenderJob, data: bytes, buildTime: float = 0) -> None:
+        """Add the image built for job, which took buildTime seconds. The
+        image is not cached if it can't be written, eg if the disk is full."""
+        self.buildTime += buildTime
+        path = self.path(job)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # other processes may be reading the cache
+            (fd, tmppath) = tempfile.mkstemp(dir=os.path.dirname(path))
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(tmppath, path)
+        except OSError:
+            try:
+                os.unlink(tmppath)
+            except OSError:
+                pass
+            return
+        if self._size is None:
+            self._size = sum(size for _path, _mtime, size in self._files())
+        else:
+            self._size += len(data)
+        if self._size > self.maxSize:
+            self._evict()
+
+    def hitRate(self) -> float:
+        "The share of lookups found in the cache in this session."
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def savedTime(self) -> float:
+        """An estimate of the seconds the cache saved in this session, based
+        on the average time taken to build the other images."""
+        if not self.misses:
+            return 0.0
+        return self.hits * self.buildTime / self.misses
+
+    def _files(self) -> Iterator[Tuple[str, float, int]]:
+        "(path, mtime, size) of each image."
+        for entry in os.scandir(self.dir):
+            if not entry.is_dir():
+                continue
+            for file in os.scandir(entry.path):
+                try:
+                    stat = file.stat()
+                except FileNotFoundError:
+                    continue
+                yield file.path, stat.st_mtime, stat.st_size
+
+    def _evict(self) -> None:
+        "Remove the least recently used images, down to 3/4 of maxSize."
+        files = sorted(self._files(), key=lambda file: file[1])
+        self._size = sum(size for _path, _mtime, size in files)
+        for path, _mtime, size in files:
+            if self._size <= self.maxSize * 3 // 4:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+
+
 hooks.card_did_render.append(on_card_did_render)
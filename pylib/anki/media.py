@@ -11,11 +11,11 @@ import time
 import urllib.error
 import urllib.parse
 import urllib.request
-from typing import Any, Callable, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import anki
 from anki.consts import *
-from anki.latex import render_latex, render_latex_returning_errors
+from anki.latex import latex_render_jobs, render_latex, save_latex_images
 from anki.rsbackend import pb
 from anki.utils import intTime
 
@@ -188,34 +188,68 @@ class MediaManager:
         return output
 
     def render_all_latex(
-        self, progress_cb: Optional[Callable[[int], bool]] = None
+        self,
+        progress_cb: Optional[Callable[[int], bool]] = None,
+        workers: Optional[int] = None,
     ) -> Optional[Tuple[int, str]]:
         """Render any LaTeX that is missing.
 
-        If a progress callback is provided and it returns false, the operation
-        will be aborted.
+        The images are built on up to `workers` threads, defaulting to the
+        number of CPUs. The progress callback receives the number of notes
+        whose LaTeX has been rendered. If a progress callback is provided and
+        it returns false, the operation will be aborted.
 
         If an error is encountered, returns (note_id, error_message)
         """
         last_progress = time.time()
         checked = 0
+
+        def keep_going() -> bool:
+            "Report progress now and then; false if asked to abort."
+            nonlocal last_progress
+            if progress_cb is None or time.time() - last_progress < 0.3:
+                return True
+            last_progress = time.time()
+            return progress_cb(checked)
+
+        jobs = []
+        # image filename -> ids of the notes waiting for it
+        waiting: Dict[str, List[int]] = {}
+        # note id -> number of images still missing
+        missing: Dict[int, int] = {}
         for (nid, mid, flds) in self.col.db.execute(
             "select id, mid, flds from notes where flds like '%[%'"
         ):
-
             model = self.col.models.get(mid)
-            _html, errors = render_latex_returning_errors(
+            _html, noteJobs = latex_render_jobs(
                 flds, model, self.col, expand_clozes=True
             )
-            if errors:
-                return (nid, "\n".join(errors))
-
-            checked += 1
-            elap = time.time() - last_progress
-            if elap >= 0.3 and progress_cb is not None:
-                last_progress = intTime()
-                if not progress_cb(checked):
+            for job in noteJobs:
+                if job.filename not in waiting:
+                    waiting[job.filename] = []
+                    jobs.append(job)
+                waiting[job.filename].append(nid)
+            if noteJobs:
+                missing[nid] = len(noteJobs)
+            else:
+                checked += 1
+            if not keep_going():
+                return None
+
+        images = save_latex_images(self.col, jobs, workers)
+        try:
+            for job, err in images:
+                nids = waiting[job.filename]
+                if err is not None:
+                    return (nids[0], err)
+                for nid in nids:
+                    missing[nid] -= 1
+                    if not missing[nid]:
+                        checked += 1
+                if not keep_going():
                     return None
+        finally:
+            images.close()
 
         return None
 
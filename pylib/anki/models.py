@@ -6,14 +6,15 @@ from __future__ import annotations
 import copy
 import pprint
 import time
-from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
 
 import anki  # pylint: disable=unused-import
 import anki.backend_pb2 as pb
 from anki.consts import *
 from anki.lang import _
 from anki.rsbackend import NotFoundError, StockNoteType, from_json_bytes, to_json_bytes
-from anki.utils import checksum, ids2str, intTime, joinFields, splitFields
+from anki.utils import checksum, intTime, joinFields, splitFields
 
 # types
 NoteType = Dict[str, Any]
@@ -122,8 +123,9 @@ class ModelManager:
     def __init__(self, col: anki.collection.Collection) -> None:
         self.col = col.weakref()
         self.models = ModelsDictProxy(col)
-        # do not access this directly!
+        # do not access these directly!
         self._cache = {}
+        self._derived = {}
 
     def __repr__(self) -> str:
         d = dict(self.__dict__)
@@ -164,19 +166,49 @@ class ModelManager:
     # access the cache directly!
 
     _cache: Dict[int, NoteType] = {}
+    # ntid -> (mtime, structures derived from the notetype)
+    _derived: Dict[int, Tuple[int, Dict[str, Any]]] = {}
 
     def _update_cache(self, nt: NoteType) -> None:
         self._cache[nt["id"]] = nt
+        self._derived.pop(nt["id"], None)
 
     def _remove_from_cache(self, ntid: int) -> None:
         if ntid in self._cache:
             del self._cache[ntid]
+        self._derived.pop(ntid, None)
 
     def _get_cached(self, ntid: int) -> Optional[NoteType]:
         return self._cache.get(ntid)
 
     def _clear_cache(self):
         self._cache = {}
+        self._derived = {}
+
+    def _derived_for(self, model: NoteType) -> Dict[str, Any]:
+        """The field map, field names and template names of model. They are
+        shared by every caller, and must not be modified.
+
+        Only the cached copy of a notetype is memoized, as other copies may
+        be being edited."""
+        ntid = model["id"]
+        isCached = self._get_cached(ntid) is model
+        entry = self._derived.get(ntid)
+        if isCached and entry and entry[0] == model["mod"]:
+            return entry[1]
+        derived = dict(
+            fieldMap=MappingProxyType(
+                {
+                    fieldType["name"]: (fieldType["ord"], fieldType)
+                    for fieldType in model["flds"]
+                }
+            ),
+            fieldNames=tuple(fieldType["name"] for fieldType in model["flds"]),
+            templateNames=tuple(template["name"] for template in model["tmpls"]),
+        )
+        if isCached:
+            self._derived[ntid] = (model["mod"], derived)
+        return derived
 
     # Listing note types
     #############################################################
@@ -367,25 +399,28 @@ class ModelManager:
     # Fields
     ##################################################
 
-    def fieldMap(self, model: NoteType) -> Dict[str, Tuple[int, Field]]:
+    def fieldMap(self, model: NoteType) -> Mapping[str, Tuple[int, Field]]:
         """Mapping of (field name) -> (ord, field object).
 
+        The mapping is read-only, and shared by all notes of the model.
+
         keyword arguments:
         model : a model
         """
-        return dict(
-            (fieldType["name"], (fieldType["ord"], fieldType))
-            for fieldType in model["flds"]
-        )
+        return self._derived_for(model)["fieldMap"]
 
     def fieldNames(self, model: NoteType) -> List[str]:
         """The list of names of fields of this model."""
-        return [fieldType["name"] for fieldType in model["flds"]]
+        return list(self._derived_for(model)["fieldNames"])
 
     def sortIdx(self, model: NoteType) -> Any:
         """The index of the field used for sorting."""
         return model["sortf"]
 
+    def templateNames(self, model: NoteType) -> List[str]:
+        """The list of names of templates of this model."""
+        return list(self._derived_for(model)["templateNames"])
+
     # Adding & changing fields
     ##################################################
 
@@ -603,9 +638,11 @@ and notes.mid = ? and cards.ord = ?""",
         noteData = []
         # The list of dictionnaries, containing the information relating to the new cards
         nfields = len(newModel["flds"])
-        for (nid, flds) in self.col.db.execute(
-            "select id, flds from notes where id in " + ids2str(nids)
-        ):
+        with self.col.db.id_set(nids) as snids:
+            rows = self.col.db.execute(
+                "select id, flds from notes where id in " + snids
+            )
+        for (nid, flds) in rows:
             newflds = {}
             flds = splitFields(flds)
             for old, new in list(map.items()):
@@ -642,9 +679,11 @@ and notes.mid = ? and cards.ord = ?""",
         """
         cardData = []
         deleted = []
-        for (cid, ord) in self.col.db.execute(
-            "select id, ord from cards where nid in " + ids2str(nids)
-        ):
+        with self.col.db.id_set(nids) as snids:
+            rows = self.col.db.execute(
+                "select id, ord from cards where nid in " + snids
+            )
+        for (cid, ord) in rows:
             # if the src model is a cloze, we ignore the map, as the gui
             # doesn't currently support mapping them
             if oldModel["type"] == MODEL_CLOZE:
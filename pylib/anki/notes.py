@@ -4,7 +4,7 @@
 from __future__ import annotations
 
 import pprint
-from typing import Any, List, Optional, Sequence, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import anki  # pylint: disable=unused-import
 from anki import hooks
@@ -35,11 +35,43 @@ class Note:
     Not in the database:
     col -- its collection
     _model -- the model object
-    _fmap -- Mapping of (field name) -> (ord, field object). See models.py for field objects
+    _fmap -- Read-only mapping of (field name) -> (ord, field object), shared
+             by the notes of the model. See models.py for field objects
     scm -- schema mod time: time when "schema" was modified. As in the collection.
     newlyAdded -- used by flush, to see whether a note is new or not.
+
+    Apart from id, the attributes above are read from the backend note on
+    first use. The backend note is dropped once they all have been.
     """
 
+    __slots__ = (
+        "col",
+        "_backend_note",
+        "_unread",
+        "id",
+        "guid",
+        "mid",
+        "mod",
+        "usn",
+        "tags",
+        "fields",
+        "_fmap",
+        "__dict__",
+        "__weakref__",
+    )
+
+    # attribute -> field of the backend note it's decoded from
+    _backendFields = dict(
+        guid="guid",
+        mid="ntid",
+        mod="mtime_secs",
+        usn="usn",
+        tags="tags",
+        fields="fields",
+    )
+
+    _backend_note: Optional[BackendNote]
+
     # not currently exposed
     flags = 0
     data = ""
@@ -66,11 +98,20 @@ class Note:
 
         if id:
             # existing note
-            self.id = id
-            self.load()
+            n = self.col.backend.get_note(id)
+            assert n
+            self._set_backend_note(n)
         else:
             # new note for provided notetype
-            self._load_from_backend_note(self.col.backend.new_note(model["id"]))
+            self._set_backend_note(self.col.backend.new_note(model["id"]))
+
+    @classmethod
+    def from_backend_note(cls, col: anki.collection.Collection, n: BackendNote) -> Note:
+        "A note the backend has already fetched."
+        note = cls.__new__(cls)
+        note.col = col.weakref()
+        note._set_backend_note(n)
+        return note
 
     def load(self) -> None:
         """Given a note knowing its collection and its id, choosing this
@@ -79,8 +120,15 @@ class Note:
         assert n
         self._load_from_backend_note(n)
 
-    def _load_from_backend_note(self, n: BackendNote) -> None:
+    def _set_backend_note(self, n: BackendNote) -> None:
+        "Use n for a note none of whose attributes were read yet."
+        self._backend_note = n
+        self._unread = len(self._backendFields)
         self.id = n.id
+
+    def _load_from_backend_note(self, n: BackendNote) -> None:
+        "Use n, replacing the attributes already read."
+        self._set_backend_note(n)
         self.guid = n.guid
         self.mid = n.ntid
         self.mod = n.mtime_secs
@@ -88,6 +136,25 @@ class Note:
         self.tags = list(n.tags)
         self.fields = list(n.fields)
         self._fmap = self.col.models.fieldMap(self.model())
+        self._backend_note = None
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for attributes which are not set yet
+        if name == "_fmap":
+            value: Any = self.col.models.fieldMap(self.model())
+        else:
+            field = self._backendFields.get(name)
+            if field is None:
+                raise AttributeError(name)
+            value = getattr(self._backend_note, field)
+            if name in ("tags", "fields"):
+                value = list(value)
+            self._unread -= 1
+            if not self._unread:
+                # everything was decoded
+                self._backend_note = None
+        setattr(self, name, value)
+        return value
 
     def to_backend_note(self) -> BackendNote:
         hooks.note_will_flush(self)
@@ -116,9 +183,16 @@ class Note:
         assert self.id != 0
         self.col.backend.update_note(self.to_backend_note())
 
+    def _repr_dict(self) -> Dict[str, Any]:
+        "The attributes of the note, and any other attribute set on it."
+        d = dict(id=self.id)
+        for name in self._backendFields:
+            d[name] = getattr(self, name)
+        d.update(self.__dict__)
+        return d
+
     def __repr__(self) -> str:
-        d = dict(self.__dict__)
-        del d["col"]
+        d = self._repr_dict()
         return f"{super().__repr__()} {pprint.pformat(d, width=300)}"
 
     def joinedFields(self) -> str:
@@ -127,12 +201,9 @@ class Note:
 
     def cards(self) -> List[anki.cards.Card]:
         """The list of cards objects associated to this note."""
-        return [
-            self.col.getCard(id)
-            for id in self.col.db.list(
-                "select id from cards where nid = ? order by ord", self.id
-            )
-        ]
+        return self.col.get_cards(
+            self.col.db.list("select id from cards where nid = ? order by ord", self.id)
+        )
 
     def model(self) -> Optional[NoteType]:
         """The model object of this card."""
@@ -16,6 +16,8 @@ from __future__ import annotations
 import enum
 import json
 import os
+import threading
+import weakref
 from dataclasses import dataclass
 from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Union
 
@@ -196,6 +198,10 @@ class Progress:
 
 
 class RustBackend(RustBackendGenerated):
+    # DB rows are returned in a columnar protobuf; set to True to use
+    # the older JSON encoding instead
+    json_db_rows = False
+
     def __init__(
         self,
         ftl_folder: Optional[str] = None,
@@ -223,6 +229,24 @@ class RustBackend(RustBackendGenerated):
     def db_execute_many(self, sql: str, args: List[List[ValueForDB]]) -> List[DBRow]:
         return self._db_command(dict(kind="executemany", sql=sql, args=args))
 
+    def db_open_cursor(self, sql: str, args: Sequence[ValueForDB]) -> int:
+        return self._db_command(dict(kind="opencursor", sql=sql, args=args))[0][0]
+
+    def db_fetch(self, cursor: int, limit: int) -> List[DBRow]:
+        return self._db_command(dict(kind="fetch", cursor=cursor, limit=limit))
+
+    def db_close_cursor(self, cursor: int) -> None:
+        self._db_command(dict(kind="closecursor", cursor=cursor))
+
+    def db_batch(self, queries: List[Dict[str, Any]]) -> List[List[DBRow]]:
+        return self._db_command(dict(kind="batch", queries=queries))
+
+    def db_statement_cache_stats(self) -> DBRow:
+        return self._db_command(dict(kind="statementcachestats"))[0]
+
+    def db_set_ids(self, table: int, ids: List[int]) -> None:
+        self._db_command(dict(kind="setids", table=table, ids=ids))
+
     def db_begin(self) -> None:
         return self._db_command(dict(kind="begin"))
 
@@ -233,7 +257,14 @@ class RustBackend(RustBackendGenerated):
         return self._db_command(dict(kind="rollback"))
 
     def _db_command(self, input: Dict[str, Any]) -> Any:
-        return from_json_bytes(self._backend.db_command(to_json_bytes(input)))
+        input_bytes = to_json_bytes(input)
+        if self.json_db_rows:
+            return from_json_bytes(self._backend.db_command(input_bytes))
+        result = pb.DBResult()
+        result.ParseFromString(self._backend.db_command_proto(input_bytes))
+        if result.batch:
+            return [db_result_to_rows(r) for r in result.batch]
+        return db_result_to_rows(result)
 
     def translate(self, key: TRValue, **kwargs: Union[str, int, float]) -> str:
         return self.translate_string(translate_string_in(key, **kwargs))
@@ -259,6 +290,43 @@ class RustBackend(RustBackendGenerated):
         raise proto_exception_to_native(err)
 
 
+class BackendPool:
+    """Idle backends, used to open temporary collections such as the source
+    of an import or the target of an export. Creating a backend loads the
+    translations, so reusing one makes opening such collections faster.
+
+    Backends are kept by language, with at most maxIdle for each."""
+
+    maxIdle = 4
+
+    def __init__(self) -> None:
+        self._idle: Dict[str, List[RustBackend]] = {}
+        self._langs: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def take(self) -> RustBackend:
+        "An idle backend for the current language, or a new one."
+        lang = anki.lang.currentLang
+        with self._lock:
+            idle = self._idle.get(lang)
+            if idle:
+                return idle.pop()
+        backend = RustBackend(langs=[lang])
+        with self._lock:
+            self._langs[backend] = lang
+        return backend
+
+    def release(self, backend: RustBackend) -> None:
+        "Give back a backend from take(), once its collection is closed."
+        with self._lock:
+            idle = self._idle.setdefault(self._langs[backend], [])
+            if len(idle) < self.maxIdle:
+                idle.append(backend)
+
+
+backend_pool = BackendPool()
+
+
 def translate_string_in(
     key: TRValue, **kwargs: Union[str, int, float]
 ) -> pb.TranslateStringIn:
@@ -271,6 +339,37 @@ def translate_string_in(
     return pb.TranslateStringIn(key=key, args=args)
 
 
+def db_result_to_rows(result: pb.DBResult) -> List[DBRow]:
+    if not result.row_count:
+        return []
+    columns = []
+    for column in result.columns:
+        if column.kinds:
+            columns.append(_mixed_db_column(column))
+        elif len(column.ints) == result.row_count:
+            columns.append(column.ints)
+        elif len(column.strings) == result.row_count:
+            columns.append(column.strings)
+        elif len(column.doubles) == result.row_count:
+            columns.append(column.doubles)
+        else:
+            columns.append(column.blobs)
+    return [list(row) for row in zip(*columns)]
+
+
+def _mixed_db_column(column: pb.DBColumn) -> List[Any]:
+    values = {
+        pb.DBColumn.INT: iter(column.ints),
+        pb.DBColumn.DOUBLE: iter(column.doubles),
+        pb.DBColumn.STRING: iter(column.strings),
+        pb.DBColumn.BLOB: iter(column.blobs),
+    }
+    return [
+        None if kind == pb.DBColumn.NULL else next(values[kind])
+        for kind in column.kinds
+    ]
+
+
 # temporarily force logging of media handling
 if "RUST_LOG" not in os.environ:
     os.environ[
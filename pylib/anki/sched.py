@@ -38,6 +38,7 @@ class Scheduler(V2):
         self.revCount = 0
         self.newCount = 0
         self.today: Optional[int] = None
+        self._queuedCards: Dict[int, Card] = {}
         self._haveQueues = False
         self._updateCutoff()
 
@@ -179,25 +180,25 @@ class Scheduler(V2):
     ##########################################################################
 
     def _resetLrnCount(self) -> None:
-        # sub-day
-        self.lrnCount = (
-            self.col.db.scalar(
+        deckLimit = self._deckLimit()
+        with self.col.db.batch() as batch:
+            # sub-day
+            batch.scalar(
                 f"""
 select sum(left/1000) from (select left from cards where
 did in %s and queue = {QUEUE_TYPE_LRN} and due < ? limit %d)"""
-                % (self._deckLimit(), self.reportLimit),
+                % (deckLimit, self.reportLimit),
                 self.dayCutoff,
             )
-            or 0
-        )
-        # day
-        self.lrnCount += self.col.db.scalar(
-            f"""
+            # day
+            batch.scalar(
+                f"""
 select count() from cards where did in %s and queue = {QUEUE_TYPE_DAY_LEARN_RELEARN}
 and due <= ? limit %d"""
-            % (self._deckLimit(), self.reportLimit),
-            self.today,
-        )
+                % (deckLimit, self.reportLimit),
+                self.today,
+            )
+        self.lrnCount = sum(cnt or 0 for cnt in batch.results)
 
     def _resetLrn(self) -> None:
         self._resetLrnCount()
@@ -745,7 +746,7 @@ did = ?, queue = %s, due = ?, usn = ? where id = ?"""
         if not card.odid:
             return conf["new"]
         # dynamic deck; override some attributes, use original deck for others
-        oconf = self.col.decks.confForDid(card.odid)
+        oconf = self._confForDid(card.odid)
         delays = conf["delays"] or oconf["new"]["delays"]
         return dict(
             # original deck
@@ -764,7 +765,7 @@ did = ?, queue = %s, due = ?, usn = ? where id = ?"""
         if not card.odid:
             return conf["lapse"]
         # dynamic deck; override some attributes, use original deck for others
-        oconf = self.col.decks.confForDid(card.odid)
+        oconf = self._confForDid(card.odid)
         delays = conf["delays"] or oconf["lapse"]["delays"]
         return dict(
             # original deck
@@ -18,6 +18,7 @@ from anki.rsbackend import (
     CountsForDeckToday,
     DeckTreeNode,
     FormatTimeSpanContext,
+    NotFoundError,
     SchedTimingToday,
     from_json_bytes,
 )
@@ -37,6 +38,10 @@ class Scheduler:
     haveCustomStudy = True
     _burySiblingsOnAnswer = True
     revCount: int
+    # deck configs by deck id, while computing several intervals of a card
+    _confMemo: Optional[Dict[int, Dict[str, Any]]] = None
+    # number of cards fetched together from the new and review queues
+    cardBatchSize = 10
 
     def __init__(self, col: anki.collection.Collection) -> None:
         self.col = col.weakref()
@@ -45,6 +50,8 @@ class Scheduler:
         self.dynReportLimit = 99999
         self.reps = 0
         self.today: Optional[int] = None
+        # cards fetched with the one popped before them; see _popCard()
+        self._queuedCards: Dict[int, Card] = {}
         self._haveQueues = False
         self._lrnCutoff = 0
         self._updateCutoff()
@@ -69,7 +76,22 @@ class Scheduler:
             return card
         return None
 
+    def likelyNextCardIds(self) -> List[int]:
+        """Ids of the cards at the head of the queues. The next call to
+        getCard() is likely to return one of them, unless answering the
+        current card changes the queues. The queues are left unchanged."""
+        if not self._haveQueues:
+            return []
+        ids = []
+        if self._lrnQueue:
+            ids.append(self._lrnQueue[0][1])
+        for queue in (self._newQueue, self._revQueue, self._lrnDayQueue):
+            if queue:
+                ids.append(queue[-1])
+        return ids
+
     def reset(self) -> None:
+        self._queuedCards = {}
         self.col.decks.update_active()
         self._updateCutoff()
         self._reset_counts()
@@ -210,6 +232,8 @@ order by due"""
             review_delta=review_delta,
             millisecond_delta=milliseconds_delta,
         )
+        # the deck and its parents changed
+        self.col.decks._clear_deck_cache()
 
     def counts_for_deck_today(self, deck_id: int) -> CountsForDeckToday:
         return self.col.backend.counts_for_deck_today(deck_id)
@@ -217,6 +241,7 @@ order by due"""
     def extendLimits(self, new: int, rev: int) -> None:
         did = self.col.decks.current()["id"]
         self.col.backend.extend_limits(deck_id=did, new_delta=new, review_delta=rev)
+        self.col.decks._clear_deck_cache()
 
     # legacy
 
@@ -301,22 +326,10 @@ order by due"""
             return True
         if not self.newCount:
             return False
-        while self._newDids:
-            did = self._newDids[0]
-            lim = min(self.queueLimit, self._deckNewLimit(did))
-            if lim:
-                # fill the queue with the current did
-                self._newQueue = self.col.db.list(
-                    f"""
-                select id from cards where did = ? and queue = {QUEUE_TYPE_NEW} order by due,ord limit ?""",
-                    did,
-                    lim,
-                )
-                if self._newQueue:
-                    self._newQueue.reverse()
-                    return True
-            # nothing left in the deck; move to next
-            self._newDids.pop(0)
+        if self._newDids:
+            self._newQueue = self._newCardsForDecks()
+            if self._newQueue:
+                return True
 
         # if we didn't get a card but the count is non-zero,
         # we need to check again for any cards that were
@@ -327,12 +340,74 @@ order by due"""
         self._resetNew()
         return self._fillNew(recursing=True)
 
+    def _newCardsForDecks(self) -> List[int]:
+        """Up to queueLimit new cards, reversed. Cards are taken deck by deck
+        in the order of _newDids, within the limits of each deck and of its
+        parents, and decks with nothing left are removed from _newDids.
+
+        The candidates of all the decks are fetched in a single query, so
+        empty decks cost nothing."""
+        candidates: Dict[int, List[int]] = {}
+        for id, did in self.col.db.execute(
+            f"""
+select id, did from (select id, did, row_number() over
+(partition by did order by due, ord) as pos from cards
+where did in %s and queue = {QUEUE_TYPE_NEW}) where pos <= ? order by pos"""
+            % ids2str(self._newDids),
+            self.queueLimit,
+        ):
+            candidates.setdefault(did, []).append(id)
+        # the new cards each deck can still show, reduced as cards are taken
+        # from the deck or its children
+        remaining: Dict[int, int] = {}
+        queue: List[int] = []
+        dids = []
+        for index, did in enumerate(self._newDids):
+            if len(queue) >= self.queueLimit:
+                dids.extend(self._newDids[index:])
+                break
+            if did not in candidates:
+                continue
+            decks = [self.col.decks.get(did)] + self.col.decks.parents(did)
+            for deck in decks:
+                if deck["id"] not in remaining:
+                    remaining[deck["id"]] = self._deckNewLimitSingle(deck)
+            lim = min(remaining[deck["id"]] for deck in decks)
+            if lim <= 0:
+                continue
+            dids.append(did)
+            cids = candidates[did][: min(lim, self.queueLimit - len(queue))]
+            for deck in decks:
+                remaining[deck["id"]] -= len(cids)
+            queue.extend(cids)
+        self._newDids = dids
+        queue.reverse()
+        return queue
+
     def _getNewCard(self) -> Optional[Card]:
         if self._fillNew():
             self.newCount -= 1
-            return self.col.getCard(self._newQueue.pop())
+            return self._popCard(self._newQueue)
         return None
 
+    def _popCard(self, queue: List[int]) -> Card:
+        """Pop the card at the end of queue. On a miss, the next cards of
+        the queue are fetched along with it, and kept until they are popped
+        or the queues are reset."""
+        id = queue.pop()
+        card = self._queuedCards.pop(id, None)
+        if card:
+            return card
+        ids = queue[max(0, len(queue) - self.cardBatchSize + 1) :]
+        try:
+            cards = self.col.get_cards(ids + [id])
+        except NotFoundError:
+            # one of the next cards was deleted; fetch this one alone
+            cards = [self.col.getCard(id)]
+        card = cards.pop()
+        self._queuedCards.update((c.id, c) for c in cards)
+        return card
+
     def _updateNewCardRatio(self) -> None:
         if self.col.conf["newSpread"] == NEW_CARDS_DISTRIBUTE:
             if self.newCount:
@@ -421,32 +496,32 @@ select id from cards where did in %s and queue = {QUEUE_TYPE_NEW} limit ?)"""
             self._resetLrn()
 
     def _resetLrnCount(self) -> None:
-        # sub-day
-        self.lrnCount = (
-            self.col.db.scalar(
+        deckLimit = self._deckLimit()
+        with self.col.db.batch() as batch:
+            # sub-day
+            batch.scalar(
                 f"""
 select count() from cards where did in %s and queue = {QUEUE_TYPE_LRN}
 and due < ?"""
-                % (self._deckLimit()),
+                % deckLimit,
                 self._lrnCutoff,
             )
-            or 0
-        )
-        # day
-        self.lrnCount += self.col.db.scalar(
-            f"""
+            # day
+            batch.scalar(
+                f"""
 select count() from cards where did in %s and queue = {QUEUE_TYPE_DAY_LEARN_RELEARN}
 and due <= ?"""
-            % (self._deckLimit()),
-            self.today,
-        )
-        # previews
-        self.lrnCount += self.col.db.scalar(
-            f"""
+                % deckLimit,
+                self.today,
+            )
+            # previews
+            batch.scalar(
+                f"""
 select count() from cards where did in %s and queue = {QUEUE_TYPE_PREVIEW}
 """
-            % (self._deckLimit())
-        )
+                % deckLimit
+            )
+        self.lrnCount = sum(cnt or 0 for cnt in batch.results)
 
     def _resetLrn(self) -> None:
         self._updateLrnCutoff(force=True)
@@ -495,30 +570,40 @@ limit %d"""
             return False
         if self._lrnDayQueue:
             return True
-        while self._lrnDids:
-            did = self._lrnDids[0]
-            # fill the queue with the current did
-            self._lrnDayQueue = self.col.db.list(
+        if not self._lrnDids:
+            # shouldn't reach here
+            return False
+        # skip the decks with nothing due, in one query
+        dueDids = set(
+            self.col.db.list(
                 f"""
-select id from cards where
-did = ? and queue = {QUEUE_TYPE_DAY_LEARN_RELEARN} and due <= ? limit ?""",
-                did,
+select distinct did from cards where did in %s
+and queue = {QUEUE_TYPE_DAY_LEARN_RELEARN} and due <= ?"""
+                % ids2str(self._lrnDids),
                 self.today,
-                self.queueLimit,
             )
-            if self._lrnDayQueue:
-                # order
-                rand = random.Random()
-                rand.seed(self.today)
-                rand.shuffle(self._lrnDayQueue)
-                # is the current did empty?
-                if len(self._lrnDayQueue) < self.queueLimit:
-                    self._lrnDids.pop(0)
-                return True
-            # nothing left in the deck; move to next
+        )
+        self._lrnDids = [did for did in self._lrnDids if did in dueDids]
+        if not self._lrnDids:
+            # shouldn't reach here
+            return False
+        # fill the queue with the current did
+        self._lrnDayQueue = self.col.db.list(
+            f"""
+select id from cards where
+did = ? and queue = {QUEUE_TYPE_DAY_LEARN_RELEARN} and due <= ? limit ?""",
+            self._lrnDids[0],
+            self.today,
+            self.queueLimit,
+        )
+        # order
+        rand = random.Random()
+        rand.seed(self.today)
+        rand.shuffle(self._lrnDayQueue)
+        # is the current did empty?
+        if len(self._lrnDayQueue) < self.queueLimit:
             self._lrnDids.pop(0)
-        # shouldn't reach here
-        return False
+        return True
 
     def _getLrnDayCard(self) -> Optional[Card]:
         if self._fillLrnDay():
@@ -844,7 +929,7 @@ limit ?"""
     def _getRevCard(self) -> Optional[Card]:
         if self._fillRev():
             self.revCount -= 1
-            return self.col.getCard(self._revQueue.pop())
+            return self._popCard(self._revQueue)
         return None
 
     def totalRevForCurrentDeck(self) -> int:
@@ -1198,7 +1283,14 @@ where id = ?
     ##########################################################################
 
     def _cardConf(self, card: Card) -> Dict[str, Any]:
-        return self.col.decks.confForDid(card.did)
+        return self._confForDid(card.did)
+
+    def _confForDid(self, did: int) -> Dict[str, Any]:
+        if self._confMemo is None:
+            return self.col.decks.confForDid(did)
+        if did not in self._confMemo:
+            self._confMemo[did] = self.col.decks.confForDid(did)
+        return self._confMemo[did]
 
     def _newConf(self, card: Card) -> Any:
         conf = self._cardConf(card)
@@ -1206,7 +1298,7 @@ where id = ?
         if not card.odid:
             return conf["new"]
         # dynamic deck; override some attributes, use original deck for others
-        oconf = self.col.decks.confForDid(card.odid)
+        oconf = self._confForDid(card.odid)
         return dict(
             # original deck
             ints=oconf["new"]["ints"],
@@ -1224,7 +1316,7 @@ where id = ?
         if not card.odid:
             return conf["lapse"]
         # dynamic deck; override some attributes, use original deck for others
-        oconf = self.col.decks.confForDid(card.odid)
+        oconf = self._confForDid(card.odid)
         return dict(
             # original deck
             minInt=oconf["lapse"]["minInt"],
@@ -1242,7 +1334,7 @@ where id = ?
         if not card.odid:
             return conf["rev"]
         # dynamic deck
-        return self.col.decks.confForDid(card.odid)["rev"]
+        return self._confForDid(card.odid)["rev"]
 
     def _deckLimit(self) -> str:
         return ids2str(self.col.decks.active())
@@ -1398,13 +1490,30 @@ To study outside of the normal schedule, click the Custom Study button below."""
 
     def nextIvlStr(self, card: Card, ease: int, short: bool = False) -> str:
         "Return the next interval for CARD as a string."
-        ivl_secs = self.nextIvl(card, ease)
+        return self._ivlStr(self.nextIvl(card, ease), self.col.conf["collapseTime"])
+
+    def nextIvlStrs(self, card: Card) -> List[str]:
+        """Return the next interval for CARD as a string, for each of its
+        answer buttons in order.
+
+        The deck configs are fetched once for all the buttons."""
+        self._confMemo = {}
+        try:
+            collapseTime = self.col.conf["collapseTime"]
+            return [
+                self._ivlStr(self.nextIvl(card, ease), collapseTime)
+                for ease in range(1, self.answerButtons(card) + 1)
+            ]
+        finally:
+            self._confMemo = None
+
+    def _ivlStr(self, ivl_secs: int, collapseTime: int) -> str:
         if not ivl_secs:
             return _("(end)")
         ivlStr = self.col.format_timespan(
             ivl_secs, FormatTimeSpanContext.ANSWER_BUTTONS
         )
-        if ivl_secs < self.col.conf["collapseTime"]:
+        if ivl_secs < collapseTime:
             ivlStr = "<" + ivlStr
         return ivlStr
 
@@ -1577,6 +1686,7 @@ and (queue={QUEUE_TYPE_NEW} or (queue={QUEUE_TYPE_REV} and due<=?))""",
                 queue_obj.remove(cid)
             except ValueError:
                 pass
+            self._queuedCards.pop(cid, None)
         # then bury
         if toBury:
             self.buryCards(toBury, manual=False)
@@ -1587,11 +1697,12 @@ and (queue={QUEUE_TYPE_NEW} or (queue={QUEUE_TYPE_REV} and due<=?))""",
     def forgetCards(self, ids: List[int]) -> None:
         "Put cards at the end of the new queue."
         self.remFromDyn(ids)
-        self.col.db.execute(
-            f"update cards set type={CARD_TYPE_NEW},queue={QUEUE_TYPE_NEW},ivl=0,due=0,odue=0,factor=?"
-            " where id in " + ids2str(ids),
-            STARTING_FACTOR,
-        )
+        with self.col.db.id_set(ids) as sids:
+            self.col.db.execute(
+                f"update cards set type={CARD_TYPE_NEW},queue={QUEUE_TYPE_NEW},ivl=0,due=0,odue=0,factor=?"
+                " where id in " + sids,
+                STARTING_FACTOR,
+            )
         pmax = (
             self.col.db.scalar(f"select max(due) from cards where type={CARD_TYPE_NEW}")
             or 0
@@ -1628,17 +1739,17 @@ usn=?,mod=?,factor=? where id=?""",
 
     def resetCards(self, ids: List[int]) -> None:
         "Completely reset cards for export."
-        sids = ids2str(ids)
-        # we want to avoid resetting due number of existing new cards on export
-        nonNew = self.col.db.list(
-            f"select id from cards where id in %s and (queue != {QUEUE_TYPE_NEW} or type != {CARD_TYPE_NEW})"
-            % sids
-        )
-        # reset all cards
-        self.col.db.execute(
-            f"update cards set reps=0,lapses=0,odid=0,odue=0,queue={QUEUE_TYPE_NEW}"
-            " where id in %s" % sids
-        )
+        with self.col.db.id_set(ids) as sids:
+            # we want to avoid resetting due number of existing new cards on export
+            nonNew = self.col.db.list(
+                f"select id from cards where id in %s and (queue != {QUEUE_TYPE_NEW} or type != {CARD_TYPE_NEW})"
+                % sids
+            )
+            # reset all cards
+            self.col.db.execute(
+                f"update cards set reps=0,lapses=0,odid=0,odue=0,queue={QUEUE_TYPE_NEW}"
+                " where id in %s" % sids
+            )
         # and forget any non-new cards, changing their due numbers
         self.forgetCards(nonNew)
         self.col.log(ids)
@@ -1654,54 +1765,64 @@ usn=?,mod=?,factor=? where id=?""",
         shuffle: bool = False,
         shift: bool = False,
     ) -> None:
-        scids = ids2str(cids)
         now = intTime()
-        nids = []
-        nidsSet: Set[int] = set()
-        for id in cids:
-            nid = self.col.db.scalar("select nid from cards where id = ?", id)
-            if nid not in nidsSet:
-                nids.append(nid)
-                nidsSet.add(nid)
-        if not nids:
-            # no new cards
-            return
-        # determine nid ordering
-        due = {}
-        if shuffle:
-            random.shuffle(nids)
-        for index, nid in enumerate(nids):
-            due[nid] = start + index * step
-        # pylint: disable=undefined-loop-variable
-        high = start + index * step
-        # shift?
-        if shift:
-            low = self.col.db.scalar(
-                f"select min(due) from cards where due >= ? and type = {CARD_TYPE_NEW} "
-                "and id not in %s" % scids,
-                start,
-            )
-            if low is not None:
-                shiftby = high - low + 1
-                self.col.db.execute(
-                    f"""
+        with self.col.db.id_set(cids) as scids:
+            # the note and type of each card, in a single query
+            cardData = {
+                id: (nid, type)
+                for id, nid, type in self.col.db.execute(
+                    "select id, nid, type from cards where id in " + scids
+                )
+            }
+            nids = []
+            nidsSet: Set[int] = set()
+            for id in cids:
+                if id not in cardData:
+                    continue
+                nid = cardData[id][0]
+                if nid not in nidsSet:
+                    nids.append(nid)
+                    nidsSet.add(nid)
+            if not nids:
+                # no new cards
+                return
+            # determine nid ordering
+            due = {}
+            if shuffle:
+                random.shuffle(nids)
+            for index, nid in enumerate(nids):
+                due[nid] = start + index * step
+            # pylint: disable=undefined-loop-variable
+            high = start + index * step
+            # shift?
+            if shift:
+                low = self.col.db.scalar(
+                    f"select min(due) from cards where due >= ? and type = {CARD_TYPE_NEW} "
+                    "and id not in %s" % scids,
+                    start,
+                )
+                if low is not None:
+                    shiftby = high - low + 1
+                    self.col.db.execute(
+                        f"""
 update cards set mod=?, usn=?, due=due+? where id not in %s
 and due >= ? and queue = {QUEUE_TYPE_NEW}"""
-                    % scids,
-                    now,
-                    self.col.usn(),
-                    shiftby,
-                    low,
-                )
-        # reorder cards
-        cardData = []
-        for id, nid in self.col.db.execute(
-            f"select id, nid from cards where type = {CARD_TYPE_NEW} and id in " + scids
-        ):
-            cardData.append((due[nid], now, self.col.usn(), id))
-        self.col.db.executemany(
-            "update cards set due=?,mod=?,usn=? where id = ?", cardData
-        )
+                        % scids,
+                        now,
+                        self.col.usn(),
+                        shiftby,
+                        low,
+                    )
+            # reorder the new cards, in one batch
+            usn = self.col.usn()
+            self.col.db.executemany(
+                "update cards set due=?,mod=?,usn=? where id = ?",
+                [
+                    (due[nid], now, usn, id)
+                    for id, (nid, type) in cardData.items()
+                    if type == CARD_TYPE_NEW
+                ],
+            )
 
     def randomizeCards(self, did: int) -> None:
         cids = self.col.db.list("select id from cards where did = ?", did)
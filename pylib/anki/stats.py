@@ -4,9 +4,10 @@
 from __future__ import annotations
 
 import datetime
+import functools
 import json
 import time
-from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 import anki
 from anki.consts import *
@@ -91,6 +92,58 @@ class CardStats:
 ##########################################################################
 
 
+class StatsCache:
+    """Results of the queries behind the collection stats.
+
+    Results are kept for a single collection state and deck scope, so
+    reopening the stats or switching period doesn't query the collection
+    again. They're dropped as soon as the collection is modified or the
+    scope changes."""
+
+    def __init__(self) -> None:
+        self._key: Optional[Tuple[Any, ...]] = None
+        self._results: Dict[Tuple[Any, ...], Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        key: Optional[Tuple[Any, ...]],
+        query: Tuple[Any, ...],
+        compute: Callable[[], Any],
+    ) -> Any:
+        "The result of QUERY in state KEY; never cached if KEY is None."
+        if key != self._key:
+            self._key = key
+            self._results = {}
+        if key is not None and query in self._results:
+            self.hits += 1
+            return self._results[query]
+        self.misses += 1
+        result = compute()
+        if key is not None:
+            self._results[query] = result
+        return result
+
+    def clear(self) -> None:
+        self._key = None
+        self._results = {}
+
+
+statsCache = StatsCache()
+
+
+def _cached(fn: Callable) -> Callable:
+    "Cache the result of a CollectionStats query in statsCache."
+
+    @functools.wraps(fn)
+    def wrapper(self: CollectionStats, *args: Any) -> Any:
+        query = (fn.__name__, self.type) + args
+        return statsCache.get(self._cacheKey(), query, lambda: fn(self, *args))
+
+    return wrapper
+
+
 class CollectionStats:
     def __init__(self, col: anki.collection.Collection) -> None:
         self.col = col.weakref()
@@ -266,17 +319,12 @@ from revlog where id > ? """
             i, _("Total"), self.col.tr(TR.STATISTICS_REVIEWS, reviews=tot),
         )
         self._line(i, _("Average"), self._avgDay(tot, num, _("reviews")))
-        tomorrow = self.col.db.scalar(
-            f"""
-select count() from cards where did in %s and queue in ({QUEUE_TYPE_REV},{QUEUE_TYPE_DAY_LEARN_RELEARN})
-and due = ?"""
-            % self._limit(),
-            self.col.sched.today + 1,
-        )
+        tomorrow = self._cardTotals()["tomorrow"] or 0
         tomorrow = ngettext("%d card", "%d cards", tomorrow) % tomorrow
         self._line(i, _("Due tomorrow"), tomorrow)
         return self._lineTbl(i)
 
+    @_cached
     def _due(
         self, start: Optional[int] = None, end: Optional[int] = None, chunk: int = 1
     ) -> Any:
@@ -494,6 +542,7 @@ group by day order by day"""
                 )
         return (ret, alltot)
 
+    @_cached
     def _added(self, num: Optional[int] = 7, chunk: int = 1) -> Any:
         lims = []
         if num is not None:
@@ -522,73 +571,53 @@ group by day order by day"""
         )
 
     def _done(self, num: Optional[int] = 7, chunk: int = 1) -> Any:
-        lims = []
-        if num is not None:
-            lims.append(
-                "id > %d" % ((self.col.sched.dayCutoff - (num * chunk * 86400)) * 1000)
-            )
-        lim = self._revlogLimit()
-        if lim:
-            lims.append(lim)
-        if lims:
-            lim = "where " + " and ".join(lims)
-        else:
-            lim = ""
         if self.type == PERIOD_MONTH:
             tf = 60.0  # minutes
         else:
             tf = 3600.0  # hours
+        # fold the days into chunks; days are <= 0, so division truncates
+        done: List[List[Any]] = []
+        for row in self._revlogDays(None if num is None else num * chunk):
+            grp = int(row[0] / chunk)
+            if not done or done[-1][0] != grp:
+                done.append([grp] + [0] * 10)
+            for i in range(1, 11):
+                done[-1][i] += row[i]
+        for row in done:
+            row[6:] = [secs / tf for secs in row[6:]]
+        return done
+
+    def _daysStudied(self) -> Any:
+        days = self._revlogDays(self._periodDays())
+        if not days:
+            return (0, None)
+        return (len(days), abs(days[0][0] + 1))
+
+    @_cached
+    def _revlogDays(self, num: Optional[int]) -> Any:
+        """Revlog counts and seconds per type, for each of the last NUM days.
+
+        Shared by the reps graphs and days studied."""
         return self.col.db.all(
             f"""
 select
-(cast((id/1000.0 - ?) / 86400.0 as int))/? as day,
-sum(case when type = {REVLOG_LRN} then 1 else 0 end), -- lrn count
-sum(case when type = {REVLOG_REV} and lastIvl < 21 then 1 else 0 end), -- yng count
-sum(case when type = {REVLOG_REV} and lastIvl >= 21 then 1 else 0 end), -- mtr count
-sum(case when type = {REVLOG_RELRN} then 1 else 0 end), -- lapse count
-sum(case when type = {REVLOG_CRAM} then 1 else 0 end), -- cram count
-sum(case when type = {REVLOG_LRN} then time/1000.0 else 0 end)/?, -- lrn time
+day,
+sum(case when type = {REVLOG_LRN} then cnt else 0 end), -- lrn count
+sum(case when type = {REVLOG_REV} and not mature then cnt else 0 end), -- yng count
+sum(case when type = {REVLOG_REV} and mature then cnt else 0 end), -- mtr count
+sum(case when type = {REVLOG_RELRN} then cnt else 0 end), -- lapse count
+sum(case when type = {REVLOG_CRAM} then cnt else 0 end), -- cram count
+sum(case when type = {REVLOG_LRN} then time/1000.0 else 0 end), -- lrn time
 -- yng + mtr time
-sum(case when type = {REVLOG_REV} and lastIvl < 21 then time/1000.0 else 0 end)/?,
-sum(case when type = {REVLOG_REV} and lastIvl >= 21 then time/1000.0 else 0 end)/?,
-sum(case when type = {REVLOG_RELRN} then time/1000.0 else 0 end)/?, -- lapse time
-sum(case when type = {REVLOG_CRAM} then time/1000.0 else 0 end)/? -- cram time
-from revlog %s
+sum(case when type = {REVLOG_REV} and not mature then time/1000.0 else 0 end),
+sum(case when type = {REVLOG_REV} and mature then time/1000.0 else 0 end),
+sum(case when type = {REVLOG_RELRN} then time/1000.0 else 0 end), -- lapse time
+sum(case when type = {REVLOG_CRAM} then time/1000.0 else 0 end) -- cram time
+from (%s)
 group by day order by day"""
-            % lim,
-            self.col.sched.dayCutoff,
-            chunk,
-            tf,
-            tf,
-            tf,
-            tf,
-            tf,
+            % self._revlogTotals(num)
         )
 
-    def _daysStudied(self) -> Any:
-        lims = []
-        num = self._periodDays()
-        if num:
-            lims.append("id > %d" % ((self.col.sched.dayCutoff - (num * 86400)) * 1000))
-        rlim = self._revlogLimit()
-        if rlim:
-            lims.append(rlim)
-        if lims:
-            lim = "where " + " and ".join(lims)
-        else:
-            lim = ""
-        ret = self.col.db.first(
-            """
-select count(), abs(min(day)) from (select
-(cast((id/1000 - ?) / 86400.0 as int)+1) as day
-from revlog %s
-group by day order by day)"""
-            % lim,
-            self.col.sched.dayCutoff,
-        )
-        assert ret
-        return ret
-
     # Intervals
     ######################################################################
 
@@ -633,6 +662,7 @@ group by day order by day)"""
         self._line(i, _("Longest interval"), self.col.format_timespan(max_ * 86400))
         return txt + self._lineTbl(i)
 
+    @_cached
     def _ivls(self) -> Tuple[List[Any], int]:
         start, end, chunk = self.get_start_end_chunk()
         lim = "and grp <= %d" % end if end else ""
@@ -647,15 +677,9 @@ order by grp"""
                 chunk,
             )
         ]
+        totals = self._cardTotals()
         return (
-            data
-            + list(
-                self.col.db.first(
-                    f"""
-select count(), avg(ivl), max(ivl) from cards where did in %s and queue = {QUEUE_TYPE_REV}"""
-                    % self._limit()
-                )
-            ),
+            data + [totals["rev"] or 0, totals["avgIvl"], totals["maxIvl"]],
             chunk,
         )
 
@@ -735,20 +759,8 @@ select count(), avg(ivl), max(ivl) from cards where did in %s and queue = {QUEUE
             + "</td></tr></table></center>"
         )
 
+    @_cached
     def _eases(self) -> Any:
-        lims = []
-        lim = self._revlogLimit()
-        if lim:
-            lims.append(lim)
-        days = self._periodDays()
-        if days is not None:
-            lims.append(
-                "id > %d" % ((self.col.sched.dayCutoff - (days * 86400)) * 1000)
-            )
-        if lims:
-            lim = "where " + " and ".join(lims)
-        else:
-            lim = ""
         if self.col.schedVer() == 1:
             ease4repl = "3"
         else:
@@ -757,12 +769,12 @@ select count(), avg(ivl), max(ivl) from cards where did in %s and queue = {QUEUE
             f"""
 select (case
 when type in ({REVLOG_LRN},{REVLOG_RELRN}) then 0
-when lastIvl < 21 then 1
+when not mature then 1
 else 2 end) as thetype,
-(case when type in ({REVLOG_LRN},{REVLOG_RELRN}) and ease = 4 then %s else ease end), count() from revlog %s
+(case when type in ({REVLOG_LRN},{REVLOG_RELRN}) and ease = 4 then %s else ease end), sum(cnt) from (%s)
 group by thetype, ease
 order by thetype, ease"""
-            % (ease4repl, lim)
+            % (ease4repl, self._revlogTotals(self._periodDays()))
         )
 
     # Hourly retention
@@ -835,6 +847,7 @@ order by thetype, ease"""
         txt += _("Hours with less than 30 reviews are not shown.")
         return txt
 
+    @_cached
     def _hourRet(self) -> Any:
         lim = self._revlogLimit()
         if lim:
@@ -878,12 +891,8 @@ group by hour having count() > 30 order by hour"""
             d.append(dict(data=div[c], label="%s: %s" % (t, div[c]), color=col))
         # text data
         i: List[str] = []
-        (c, f) = self.col.db.first(
-            """
-select count(id), count(distinct nid) from cards
-where did in %s """
-            % self._limit()
-        )
+        totals = self._cardTotals()
+        (c, f) = (totals["cards"], totals["notes"])
         self._line(i, _("Total cards"), c)
         self._line(i, _("Total notes"), f)
         (low, avg, high) = self._factors()
@@ -925,27 +934,53 @@ when you answer "good" on a review."""
         return "<table width=400>" + "".join(i) + "</table>"
 
     def _factors(self) -> Any:
-        return self.col.db.first(
-            f"""
-select
-min(factor) / 10.0,
-avg(factor) / 10.0,
-max(factor) / 10.0
-from cards where did in %s and queue = {QUEUE_TYPE_REV}"""
-            % self._limit()
-        )
+        totals = self._cardTotals()
+        return (totals["minFactor"], totals["avgFactor"], totals["maxFactor"])
 
     def _cards(self) -> Any:
-        return self.col.db.first(
+        totals = self._cardTotals()
+        return (totals["mtr"], totals["yng"], totals["new"], totals["susp"])
+
+    @_cached
+    def _cardTotals(self) -> Dict[str, Any]:
+        "Card counts and averages used by several sections, in one scan."
+        row = self.col.db.first(
             f"""
 select
 sum(case when queue={QUEUE_TYPE_REV} and ivl >= 21 then 1 else 0 end), -- mtr
 sum(case when queue in ({QUEUE_TYPE_LRN},{QUEUE_TYPE_DAY_LEARN_RELEARN}) or (queue={QUEUE_TYPE_REV} and ivl < 21) then 1 else 0 end), -- yng/lrn
 sum(case when queue={QUEUE_TYPE_NEW} then 1 else 0 end), -- new
-sum(case when queue<{QUEUE_TYPE_NEW} then 1 else 0 end) -- susp
+sum(case when queue<{QUEUE_TYPE_NEW} then 1 else 0 end), -- susp
+count(id),
+count(distinct nid),
+sum(case when queue={QUEUE_TYPE_REV} then 1 else 0 end), -- review cards
+avg(case when queue={QUEUE_TYPE_REV} then ivl end),
+max(case when queue={QUEUE_TYPE_REV} then ivl end),
+min(case when queue={QUEUE_TYPE_REV} then factor end) / 10.0,
+avg(case when queue={QUEUE_TYPE_REV} then factor end) / 10.0,
+max(case when queue={QUEUE_TYPE_REV} then factor end) / 10.0,
+-- due tomorrow
+sum(case when queue in ({QUEUE_TYPE_REV},{QUEUE_TYPE_DAY_LEARN_RELEARN}) and due = ? then 1 else 0 end)
 from cards where did in %s"""
-            % self._limit()
+            % self._limit(),
+            self.col.sched.today + 1,
+        )
+        keys = (
+            "mtr",
+            "yng",
+            "new",
+            "susp",
+            "cards",
+            "notes",
+            "rev",
+            "avgIvl",
+            "maxIvl",
+            "minFactor",
+            "avgFactor",
+            "maxFactor",
+            "tomorrow",
         )
+        return dict(zip(keys, row))
 
     # Footer
     ######################################################################
@@ -1093,9 +1128,58 @@ $(function () {
             self.col.decks.active()
         )
 
+    def _cacheKey(self) -> Optional[Tuple[Any, ...]]:
+        "The collection state and scope statsCache results are valid for."
+        if self.col.db.mod:
+            # unsaved changes haven't updated the collection's mod time yet
+            return None
+        return (
+            self.col.path,
+            self.col.mod,
+            self.col.sched.dayCutoff,
+            self.col.schedVer(),
+            self.wholeCollection,
+            self._limit(),
+            self._revlogLimit(),
+        )
+
+    def _revlogTotals(self, num: Optional[int]) -> str:
+        """A query of the revlog totals of the last NUM days, with columns day,
+        type, mature, ease, cnt and time; days are <= 0.
+
+        The revlog_totals table kept by the backend holds them per 15
+        minutes, which is exact as long as days start on a quarter hour;
+        otherwise they're counted from the revlog itself."""
+        cutoff = self.col.sched.dayCutoff
+        lims = []
+        if cutoff % 900:
+            if num is not None:
+                lims.append("id > %d" % ((cutoff - (num * 86400)) * 1000))
+            lim = self._revlogLimit()
+            if lim:
+                lims.append(lim)
+            sql = (
+                "select cast((id/1000.0 - %d) / 86400.0 as int) as day, type, "
+                "lastIvl >= 21 as mature, ease, 1 as cnt, time from revlog" % cutoff
+            )
+        else:
+            if num is not None:
+                lims.append("period >= %d" % ((cutoff - (num * 86400)) // 900))
+            if not self.wholeCollection:
+                lims.append("did in %s" % ids2str(self.col.decks.active()))
+            # a period is in the same day as its middle
+            sql = (
+                "select cast((period * 900 + 450 - %d) / 86400.0 as int) as day, "
+                "type, mature, ease, cnt, time from revlog_totals" % cutoff
+            )
+        if lims:
+            sql += " where " + " and ".join(lims)
+        return sql
+
     def _title(self, title: str, subtitle: str = "") -> str:
         return "<h1>%s</h1>%s" % (title, subtitle)
 
+    @_cached
     def _deckAge(self, by: str) -> int:
         lim = self._revlogLimit()
         if lim:
@@ -62,19 +62,15 @@ class TagManager:
         "Add any missing tags from notes to the tags list."
         # when called without an argument, the old list is cleared first.
         if nids:
-            lim = " where id in " + ids2str(nids)
+            with self.col.db.id_set(nids) as snids:
+                tags = self.col.db.list(
+                    "select distinct tags from notes where id in " + snids
+                )
             clear = False
         else:
-            lim = ""
+            tags = self.col.db.list("select distinct tags from notes")
             clear = True
-        self.register(
-            set(
-                self.split(
-                    " ".join(self.col.db.list("select distinct tags from notes" + lim))
-                )
-            ),
-            clear=clear,
-        )
+        self.register(set(self.split(" ".join(tags))), clear=clear)
 
     def byDeck(self, did, children=False) -> List[str]:
         basequery = (
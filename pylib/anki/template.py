@@ -104,6 +104,18 @@ def av_tags_to_native(tags: Sequence[pb.AVTag]) -> List[AVTag]:
     return list(map(av_tag_to_native, tags))
 
 
+def extract_av_tags(
+    col: anki.collection.Collection, text: str, question_side: bool
+) -> Tuple[str, List[AVTag]]:
+    """Replace the sound and TTS tags of text with play references, returning
+    the new text and the tags. Text without any such tag is returned as is,
+    without calling the backend."""
+    if "[sound:" not in text and "[anki:tts]" not in text:
+        return text, []
+    out = col.backend.extract_av_tags(text=text, question_side=question_side)
+    return out.text, av_tags_to_native(out.av_tags)
+
+
 class TemplateRenderContext:
     """Holds information for the duration of one card render.
 
@@ -141,6 +153,7 @@ class TemplateRenderContext:
         notetype: NoteType = None,
         template: Optional[Dict] = None,
         fill_empty: bool = False,
+        partial: Optional[PartiallyRenderedCard] = None,
     ) -> None:
         self._col = col.weakref()
         self._card = card
@@ -148,6 +161,7 @@ class TemplateRenderContext:
         self._browser = browser
         self._template = template
         self._fill_empty = fill_empty
+        self._partial = partial
         self._fields: Optional[Dict] = None
         if not notetype:
             self._note_type = note.model()
@@ -215,16 +229,16 @@ class TemplateRenderContext:
             )
 
         qtext = apply_custom_filters(partial.qnodes, self, front_side=None)
-        qout = self.col().backend.extract_av_tags(text=qtext, question_side=True)
+        qtext, qtags = extract_av_tags(self.col(), qtext, question_side=True)
 
-        atext = apply_custom_filters(partial.anodes, self, front_side=qout.text)
-        aout = self.col().backend.extract_av_tags(text=atext, question_side=False)
+        atext = apply_custom_filters(partial.anodes, self, front_side=qtext)
+        atext, atags = extract_av_tags(self.col(), atext, question_side=False)
 
         output = TemplateRenderOutput(
-            question_text=qout.text,
-            answer_text=aout.text,
-            question_av_tags=av_tags_to_native(qout.av_tags),
-            answer_av_tags=av_tags_to_native(aout.av_tags),
+            question_text=qtext,
+            answer_text=atext,
+            question_av_tags=qtags,
+            answer_av_tags=atags,
             css=self.note_type()["css"],
         )
 
@@ -234,6 +248,9 @@ class TemplateRenderContext:
         return output
 
     def _partially_render(self) -> PartiallyRenderedCard:
+        if self._partial:
+            # already rendered by the backend in bulk
+            return self._partial
         if self._template:
             # card layout screen
             out = self._col.backend.render_uncommitted_card(
@@ -244,12 +261,60 @@ class TemplateRenderContext:
             )
         else:
             # existing card (eg study mode)
-            out = self._col.backend.render_existing_card(
-                card_id=self._card.id, browser=self._browser
+            return partially_render_existing_card(
+                self.col(), self._card.id, self._browser
             )
         return PartiallyRenderedCard.from_proto(out)
 
 
+def partially_render_existing_card(
+    col: anki.collection.Collection, card_id: int, browser: bool = False
+) -> PartiallyRenderedCard:
+    """Render the templates of an existing card, without applying field
+    filters or running render hooks. Pass the result to
+    TemplateRenderContext(..., partial=...) to finish rendering.
+
+    Raises TemplateError if the card's template is invalid."""
+    out = col.backend.render_existing_card(card_id=card_id, browser=browser)
+    return PartiallyRenderedCard.from_proto(out)
+
+
+def render_existing_cards(
+    col: anki.collection.Collection, card_ids: Sequence[int], browser: bool = False
+) -> List[Card]:
+    """Load and render existing cards with a single backend call.
+
+    The cards are returned with their note and render output set, so
+    .question() and .answer() don't call the backend again. Adjacent cards
+    of the same note share a Note object. Cards that no longer exist are
+    left out."""
+    cards = []
+    note: Optional[Note] = None
+    for rendered in col.backend.render_existing_cards(
+        card_ids=card_ids, browser=browser
+    ):
+        card = Card.from_backend_card(col, rendered.card)
+        if not note or note.id != rendered.note.id:
+            note = Note.from_backend_note(col, rendered.note)
+        card._note = note
+        if rendered.WhichOneof("value") == "output":
+            partial = PartiallyRenderedCard.from_proto(rendered.output)
+            output = TemplateRenderContext(
+                col, card, note, browser, partial=partial
+            ).render()
+        else:
+            error = rendered.template_error
+            output = TemplateRenderOutput(
+                question_text=error,
+                answer_text=error,
+                question_av_tags=[],
+                answer_av_tags=[],
+            )
+        card.set_render_output(output)
+        cards.append(card)
+    return cards
+
+
 @dataclass
 class TemplateRenderOutput:
     "Stores the rendered templates and extracted AV tags."
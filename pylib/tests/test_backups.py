@@ -0,0 +1,54 @@
+# coding: utf-8
+
+import os
+import tempfile
+import zipfile
+
+from anki.backups import BackupStore
+from tests.shared import getEmptyCol
+
+
+def test_incremental_backup():
+    col = getEmptyCol()
+    for i in range(100):
+        note = col.newNote()
+        note["Front"] = "x" * 1000 + str(i)
+        col.addNote(note)
+    col.close()
+    dir = tempfile.mkdtemp()
+    store = BackupStore(dir)
+    store.chunkSize = 4096
+    first = os.path.join(dir, "first.colbak")
+    store.backup(col.path, first)
+    chunks = len(os.listdir(store.chunksDir))
+    assert chunks
+    # an unchanged collection doesn't add any chunk
+    second = os.path.join(dir, "second.colbak")
+    store.backup(col.path, second)
+    assert store.manifestChunks(first) == store.manifestChunks(second)
+    # the backup can be turned back into a .colpkg
+    colpkg = os.path.join(dir, "backup.colpkg")
+    store.writeColpkg(second, colpkg)
+    with zipfile.ZipFile(colpkg) as zip:
+        data = zip.read("collection.anki2")
+    assert data == b"".join(store.collectionData(first))
+    assert data.startswith(b"SQLite format 3")
+    # chunks only used by removed backups can be cleaned up
+    assert store.removeUnusedChunks() == 0
+    os.unlink(first)
+    os.unlink(second)
+    assert store.removeUnusedChunks() > 0
+
+
+def test_remove_old_backups():
+    col = getEmptyCol()
+    col.close()
+    dir = tempfile.mkdtemp()
+    store = BackupStore(dir)
+    names = ["backup-2020-01-0%d-10.00.00.colbak" % day for day in range(1, 4)]
+    for name in names:
+        store.backup(col.path, os.path.join(dir, name))
+    assert store.removeOldBackups(2) == names[1:]
+    assert sorted(os.listdir(dir)) == ["chunks"] + names[1:]
+    # the remaining backups can still be read
+    assert b"".join(store.collectionData(os.path.join(dir, names[2])))
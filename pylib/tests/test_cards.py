@@ -1,4 +1,5 @@
 # coding: utf-8
+import copy
 
 from tests.shared import getEmptyCol
 
@@ -20,6 +21,40 @@ def test_delete():
     assert deck.db.scalar("select count() from graves") == 2
 
 
+def test_lazy_fields():
+    d = getEmptyCol()
+    f = d.newNote()
+    f["Front"] = "1"
+    f["Back"] = "2"
+    d.addNote(f)
+    c = d.getCard(f.cards()[0].id)
+    # objects have no per-instance dict until an unknown attribute is set
+    assert not c.__dict__
+    # a field changed before the others are read is kept
+    c.due = 1234
+    assert c.nid == f.id and c.due == 1234
+    c.flush()
+    # copies keep both read and unread fields
+    c2 = copy.copy(c)
+    assert c2.due == 1234 and c2.ivl == c.ivl
+    c.wasNew = True
+    assert c.__dict__ == dict(wasNew=True)
+    # reloading replaces fields already read
+    c.due = 1
+    c.load()
+    assert c.due == 1234
+    n = d.getNote(f.id)
+    n.fields[0] = "changed"
+    n.load()
+    assert n.fields == ["1", "2"] and n["Front"] == "1"
+    # the backend objects are dropped once every field was decoded
+    assert c._backend_card is None and n._backend_note is None
+    c = d.getCard(c.id)
+    for name in c._backendFields:
+        getattr(c, name)
+    assert c._backend_card is None
+
+
 def test_misc():
     d = getEmptyCol()
     f = d.newNote()
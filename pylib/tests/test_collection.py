@@ -4,9 +4,10 @@ import os
 import tempfile
 
 from anki import Collection as aopen
+from anki.collection import auxiliary_collection
 from anki.dbproxy import emulate_named_args
 from anki.lang import without_unicode_isolation
-from anki.rsbackend import TR
+from anki.rsbackend import TR, NotFoundError
 from anki.stdmodels import addBasicModel, get_stock_notetypes
 from anki.utils import isWin
 from tests.shared import assertException, getEmptyCol
@@ -170,3 +171,103 @@ def test_db_named_args(capsys):
 
     # swallow the warning
     _ = capsys.readouterr()
+
+
+def test_db_all_in_batches():
+    deck = getEmptyCol()
+    deck.db.executemany(
+        "insert into revlog values (?,?,?,?,?,?,?,?,?)",
+        ((i, 1, -1, 1, 1, 0, 2500, 6000, 0) for i in range(1, 2501)),
+    )
+    rows = deck.db.all_in_batches("select id from revlog", batch_size=100)
+    ids = [row[0] for row in rows]
+    assert ids == deck.db.list("select id from revlog")
+    assert len(ids) == 2500
+    # rows are fixed when the query is run
+    rows = deck.db.all_in_batches("select id from revlog where id < ?", 3)
+    assert next(rows) == [1]
+    deck.db.execute("delete from revlog")
+    assert next(rows) == [2]
+    assert not list(rows)
+
+
+def test_db_batch():
+    deck = getEmptyCol()
+    f = deck.newNote()
+    f["Front"] = "one"
+    deck.addNote(f)
+    with deck.db.batch() as batch:
+        batch.scalar("select count() from cards")
+        batch.list("select id from notes")
+        batch.first("select id from cards where id = ?", -1)
+        batch.all("select nid from cards")
+    assert batch.results == [1, [f.id], None, [[f.id]]]
+
+    hits, misses = deck.db.statement_cache_stats()
+    for i in range(3):
+        deck.db.scalar("select 1 from cards where id = ?", i)
+    assert deck.db.statement_cache_stats() == (hits + 2, misses + 1)
+
+
+def test_db_id_set():
+    deck = getEmptyCol()
+    deck.db.executemany(
+        "insert into revlog values (?,?,?,?,?,?,?,?,?)",
+        ((i, 1, -1, 1, 1, 0, 2500, 6000, 0) for i in range(1, 101)),
+    )
+    with deck.db.id_set(range(1, 101, 2)) as odd:
+        with deck.db.id_set([2, 4, 4, 200]) as even:
+            assert odd != even
+            assert deck.db.scalar("select count() from revlog where id in " + odd) == 50
+            assert deck.db.list("select id from revlog where id in " + even) == [2, 4]
+        # the SQL doesn't change with the ids
+        with deck.db.id_set([]) as empty:
+            assert empty == even
+            assert not deck.db.list("select id from revlog where id in " + empty)
+    # the ids aren't kept once the blocks are left
+    assert not deck.db.scalar("select count() from temp.ids0")
+
+
+def test_get_cards_and_notes():
+    deck = getEmptyCol()
+    deck.models.setCurrent(deck.models.byName("Basic (and reversed card)"))
+    notes = []
+    for i in range(3):
+        f = deck.newNote()
+        f["Front"] = str(i)
+        f["Back"] = "back"
+        deck.addNote(f)
+        notes.append(f)
+    cids = [c.id for f in reversed(notes) for c in f.cards()]
+    # results follow the order of the ids
+    cards = deck.get_cards(cids)
+    assert [c.id for c in cards] == cids
+    assert [c.ord for c in cards] == [0, 1] * 3
+    assert not cards[0]._note
+    cards = deck.get_cards(cids, with_notes=True)
+    assert cards[0].note() is cards[1].note()
+    assert cards[0].note()["Front"] == "2"
+    nids = [notes[1].id, notes[0].id]
+    assert [n["Front"] for n in deck.get_notes(nids)] == ["1", "0"]
+    assert deck.get_cards([]) == [] and deck.get_notes([]) == []
+    assertException(NotFoundError, lambda: deck.get_cards([cids[0], 123]))
+
+
+def test_auxiliary_collection():
+    paths = []
+    for i in range(2):
+        (fd, path) = tempfile.mkstemp(suffix=".anki2")
+        os.close(fd)
+        os.unlink(path)
+        paths.append(path)
+    col = auxiliary_collection(paths[0])
+    backend = col.backend
+    col.close()
+    # the backend is reused once the first collection is closed
+    col = auxiliary_collection(paths[1])
+    assert col.backend is backend
+    assert col.cardCount() == 0
+    other = auxiliary_collection(paths[0])
+    assert other.backend is not backend
+    other.close()
+    col.close()
@@ -1,5 +1,6 @@
 # coding: utf-8
 
+from anki.decks import DeckIndex
 from anki.errors import DeckRenameError
 from tests.shared import assertException, getEmptyCol
 
@@ -143,3 +144,78 @@ def test_renameForDragAndDrop():
     # '' is a convenient alias for the top level DID
     d.decks.renameForDragAndDrop(hsk_did, "")
     assert deckNames() == ["Chinese", "HSK", "Languages"]
+
+
+def test_cache():
+    d = getEmptyCol()
+    parent = d.decks.id("parent")
+    child = d.decks.id("parent::child")
+    # decoded decks and configs are reused
+    assert d.decks.get(child) is d.decks.get(child)
+    conf = d.decks.confForDid(child)
+    assert d.decks.confForDid(parent) is conf
+    # renaming the parent renames the cached child
+    d.decks.rename(d.decks.get(parent), "other")
+    assert d.decks.name(child) == "other::child"
+    # changing a config is seen by its decks
+    conf["new"]["perDay"] = 5
+    d.decks.save(conf)
+    assert d.decks.confForDid(child)["new"]["perDay"] == 5
+    confId = d.decks.add_config_returning_id("new conf")
+    d.decks.setConf(d.decks.get(child), confId)
+    assert d.decks.confForDid(child)["id"] == confId
+    d.decks.remove_config(confId)
+    assert d.decks.confForDid(child)["id"] == 1
+    # so are the daily counts updated by the scheduler
+    d.sched.update_stats(child, new_delta=2)
+    assert d.decks.get(parent)["newToday"][1] == 2
+    # the database may be rolled back behind the cache
+    deck = d.decks.get(child)
+    d.rollback()
+    assert d.decks.get(child) is not deck
+    # and removals
+    d.decks.rem(parent)
+    assert not d.decks.get(child, default=False)
+
+
+def test_index():
+    d = getEmptyCol()
+
+    def assertIndexUpToDate():
+        index = d.decks._deck_index()
+        fresh = DeckIndex((deck.id, deck.name) for deck in d.decks.all_names_and_ids())
+        assert index.names == fresh.names
+        assert index.parentIds == fresh.parentIds
+        assert index.childIds == fresh.childIds
+
+    a = d.decks.id("a")
+    # missing parents are created by the backend
+    c = d.decks.id("a::b::c")
+    b = d.decks.id("a::b", create=False)
+    assert d.decks._deck_index().parentIds[c] == (a, b)
+    assert d.decks.deck_and_child_ids(a) == [a, b, c]
+    assert [deck["id"] for deck in d.decks.parents(c)] == [a, b]
+    assert [deck["id"] for deck in d.decks.parentsByName("A::B::x")] == [a, b]
+    assertIndexUpToDate()
+    # children move with their parent
+    d.decks.rename(d.decks.get(b), "x::y")
+    assert d.decks.children(d.decks.id("x")) == [("x::y", b), ("x::y::c", c)]
+    assert d.decks.childMap()[a] == {}
+    assertIndexUpToDate()
+    # an adjusted name
+    d.decks.rename(d.decks.get(a), "X")
+    assert d.decks.name(a) == "X+"
+    assertIndexUpToDate()
+    d.decks.rem(b)
+    assert d.decks.id_for_name("x::y::c") is None
+    assertIndexUpToDate()
+    # a rollback forgets decks added since the last save
+    d.save()
+    parent = d.decks.id("p")
+    assert d.decks.deck_and_child_ids(parent) == [parent]
+    child = d.decks.id("p::c")
+    assert d.decks.deck_and_child_ids(parent) == [parent, child]
+    d.rollback()
+    assert d.decks.id_for_name("p") is None
+    assert d.decks.deck_and_child_ids(1) == [1]
+    assertIndexUpToDate()
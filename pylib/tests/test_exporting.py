@@ -1,9 +1,12 @@
 # coding: utf-8
 
+import json
 import os
 import tempfile
+import zipfile
 
 from anki import Collection as aopen
+from anki import hooks
 from anki.exporting import *
 from anki.importing import Anki2Importer
 from tests.shared import errorsAfterMidnight
@@ -98,6 +101,38 @@ def test_export_ankipkg():
     e.exportInto(newname)
 
 
+def test_export_ankipkg_media():
+    setup1()
+    names = ["a%d.mp3" % i for i in range(20)] + ["b.svg"]
+    for name in names:
+        with open(os.path.join(deck.media.dir(), name), "w") as f:
+            f.write(name * 10)
+    n = deck.newNote()
+    n["Front"] = "".join("[sound:%s]" % name for name in names)
+    deck.addNote(n)
+    e = AnkiPackageExporter(deck)
+    e.mediaWorkers = 3
+    # half of the files are streamed rather than read ahead
+    e.mediaReadAheadLimit = 60
+    exported = []
+    hooks.media_files_did_export.append(exported.append)
+    fd, newname = tempfile.mkstemp(prefix="ankitest", suffix=".apkg")
+    os.close(fd)
+    os.unlink(newname)
+    try:
+        e.exportInto(newname)
+    finally:
+        hooks.media_files_did_export.remove(exported.append)
+    assert exported == list(range(len(names)))
+    with zipfile.ZipFile(newname) as z:
+        media = json.loads(z.read("media").decode("utf8"))
+        assert sorted(media.values()) == sorted(names)
+        for num, name in media.items():
+            assert z.read(num) == (name * 10).encode("utf8")
+            svg = z.getinfo(num).compress_type == zipfile.ZIP_DEFLATED
+            assert svg == name.endswith(".svg")
+
+
 @errorsAfterMidnight
 def test_export_anki_due():
     setup1()
@@ -143,6 +178,18 @@ def test_export_anki_due():
 #     e.exportInto(f)
 
 
+def test_export_textcard_batches():
+    setup1()
+    e = TextCardExporter(deck)
+    e.renderBatchSize = 1
+    fd, f = tempfile.mkstemp(prefix="ankitest")
+    os.close(fd)
+    os.unlink(f)
+    e.exportInto(f)
+    with open(f, encoding="utf-8") as file:
+        assert file.read() == "foo\tbar\nbaz\tqux\n"
+
+
 def test_export_textnote():
     setup1()
     e = TextNoteExporter(deck)
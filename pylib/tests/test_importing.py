@@ -1,6 +1,7 @@
 # coding: utf-8
 
 import os
+import unicodedata
 from tempfile import NamedTemporaryFile
 
 import pytest
@@ -75,6 +76,85 @@ def test_anki2_mediadupes():
     assert "_" in n.fields[0]
 
 
+def test_anki2_media_read_once():
+    tmp = getEmptyCol()
+    # several notes referencing the same sound
+    for i in range(5):
+        n = tmp.newNote()
+        n["Front"] = "%d [sound:foo.mp3]" % i
+        tmp.addNote(n)
+    with open(os.path.join(tmp.media.dir(), "foo.mp3"), "w") as f:
+        f.write("foo")
+    tmp.close()
+    # which already exists with the same content locally
+    empty = getEmptyCol()
+    with open(os.path.join(empty.media.dir(), "foo.mp3"), "w") as f:
+        f.write("foo")
+    imp = Anki2Importer(empty, tmp.path)
+    opened = []
+    srcOpen = imp._srcMediaOpen
+    imp._srcMediaOpen = lambda fname: opened.append(fname) or srcOpen(fname)
+    imp.run()
+    assert os.listdir(empty.media.dir()) == ["foo.mp3"]
+    assert opened == ["foo.mp3"]
+
+
+def test_anki2_media_normalized_once():
+    tmp = getEmptyCol()
+    # several notes referencing a file whose name isn't normalized
+    fname = unicodedata.normalize("NFD", "café.mp3")
+    for i in range(3):
+        n = tmp.newNote()
+        n["Front"] = str(i)
+        tmp.addNote(n)
+    tmp.db.execute("update notes set flds = ?", "[sound:%s]\x1f" % fname)
+    with open(os.path.join(tmp.media.dir(), fname), "w") as f:
+        f.write("foo")
+    tmp.close()
+    # is copied under its normalized name, once
+    empty = getEmptyCol()
+    imp = Anki2Importer(empty, tmp.path)
+    copied = []
+    srcCopy = imp._copySrcMedia
+
+    def copy(fname, dstName):
+        copied.append(fname)
+        srcCopy(fname, dstName)
+
+    imp._copySrcMedia = copy
+    imp.run()
+    assert os.listdir(empty.media.dir()) == [unicodedata.normalize("NFC", fname)]
+    assert copied == [fname]
+
+
+def test_anki2_revlog():
+    tmp = getEmptyCol()
+    n = tmp.newNote()
+    n["Front"] = "foo"
+    tmp.addNote(n)
+    tmp.reset()
+    c = tmp.sched.getCard()
+    tmp.sched.answerCard(c, 1)
+    tmp.sched.answerCard(c, 3)
+    # entries from another usn, and one whose card doesn't exist
+    tmp.db.execute("update revlog set usn = 5")
+    tmp.db.execute("insert into revlog values (1, 12345, 5, 3, 1, 0, 2500, 1000, 0)")
+    srcRevlog = tmp.db.all("select * from revlog where cid = ? order by id", c.id)
+    tmp.close()
+    # a card with the same id forces the imported card to get a new one
+    dst = getEmptyCol()
+    n = dst.newNote()
+    n["Front"] = "bar"
+    dst.addNote(n)
+    dst.db.execute("update cards set id = ?", c.id)
+    imp = Anki2Importer(dst, tmp.path)
+    imp.run()
+    cid = c.id + 999
+    assert dst.db.scalar("select nid from cards where id = ?", cid)
+    expected = [[rev[0], cid, dst.usn()] + rev[3:] for rev in srcRevlog]
+    assert dst.db.all("select * from revlog order by id") == expected
+
+
 def test_apkg():
     tmp = getEmptyCol()
     apkg = str(os.path.join(testDir, "support/media.apkg"))
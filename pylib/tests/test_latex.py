@@ -2,6 +2,8 @@
 
 import os
 import shutil
+import sys
+import tempfile
 
 from tests.shared import getEmptyCol
 
@@ -86,6 +88,105 @@ def test_latex():
     assert not result, msg
 
 
+# a stand-in for latex and dvipng that copies the source into the image
+_copyCommands = [
+    [sys.executable, "-c", "import shutil; shutil.copy('tmp.tex', 'tmp.png')"]
+]
+
+
+def test_latex_pool():
+    d = getEmptyCol()
+    import anki.latex
+
+    oldCommands = anki.latex.pngCommands
+    anki.latex.pngCommands = _copyCommands
+    try:
+        for i in range(10):
+            f = d.newNote()
+            f["Front"] = "[latex]%d[/latex] [$]shared[/$]" % i
+            d.addNote(f)
+        cwd = os.getcwd()
+        progress = []
+
+        def progress_cb(count):
+            progress.append(count)
+            return True
+
+        assert d.media.render_all_latex(progress_cb, workers=3) is None
+        assert os.getcwd() == cwd
+        assert len(os.listdir(d.media.dir())) == 11
+        assert progress == sorted(progress)
+        assert ".png" in f.cards()[0].q()
+        for name in os.listdir(d.media.dir()):
+            with open(os.path.join(d.media.dir(), name), encoding="utf8") as file:
+                assert "\\begin{document}" in file.read()
+    finally:
+        anki.latex.pngCommands = oldCommands
+
+
+def test_latex_jobs_unique():
+    d = getEmptyCol()
+    from anki.latex import latex_render_jobs
+
+    # a snippet used twice is only built once
+    _html, jobs = latex_render_jobs("[$]x[/$] [$]x[/$]", d.models.current(), d)
+    assert len(jobs) == 1
+
+
+def test_latex_cache():
+    import anki.latex
+
+    cache = anki.latex.LatexCache(tempfile.mkdtemp())
+    oldCommands = anki.latex.pngCommands
+    anki.latex.pngCommands = _copyCommands
+    anki.latex.cache = cache
+    try:
+        d = getEmptyCol()
+        f = d.newNote()
+        f["Front"] = "[latex]hello[/latex]"
+        d.addNote(f)
+        assert ".png" in f.cards()[0].q()
+        assert (cache.hits, cache.misses) == (0, 1)
+        # another collection reuses the image without running latex
+        anki.latex.pngCommands = [["nolatex"]]
+        d = getEmptyCol()
+        f = d.newNote()
+        f["Front"] = "[latex]hello[/latex]"
+        d.addNote(f)
+        assert ".png" in f.cards()[0].q()
+        assert len(os.listdir(d.media.dir())) == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert cache.hitRate() == 0.5
+    finally:
+        anki.latex.pngCommands = oldCommands
+        anki.latex.cache = None
+
+
+def test_latex_cache_eviction():
+    import anki.latex
+
+    def job(body):
+        return anki.latex.LatexRenderJob(filename="", latex=body, svg=False)
+
+    cache = anki.latex.LatexCache(tempfile.mkdtemp(), maxSize=280)
+    cache.put(job("a"), b"a" * 100)
+    cache.put(job("b"), b"b" * 100)
+    os.utime(cache.path(job("a")), (0, 0))
+    os.utime(cache.path(job("b")), (1, 1))
+    # reading a makes b the least recently used
+    assert cache.get(job("a")) == b"a" * 100
+    cache.put(job("c"), b"c" * 100)
+    assert os.path.exists(cache.path(job("a")))
+    assert not os.path.exists(cache.path(job("b")))
+    assert os.path.exists(cache.path(job("c")))
+    # an unwritable cache is skipped
+    (fd, path) = tempfile.mkstemp()
+    os.close(fd)
+    cache = anki.latex.LatexCache(path)
+    cache.put(job("a"), b"a")
+    assert cache.get(job("a")) is None
+
+
 def _test_includes_bad_command(bad):
     d = getEmptyCol()
     f = d.newNote()
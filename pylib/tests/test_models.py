@@ -79,6 +79,36 @@ def test_fields():
     assert d.getNote(d.models.nids(m)[0]).fields == ["", "2", "1"]
 
 
+def test_field_map_shared():
+    d = getEmptyCol()
+    f = d.newNote()
+    f["Front"] = "1"
+    d.addNote(f)
+    m = d.models.current()
+    n1 = d.getNote(f.id)
+    n2 = d.getNote(f.id)
+    # notes of the same notetype share one read-only map
+    assert n1._fmap is n2._fmap
+    assert n1._fmap is d.models.fieldMap(m)
+    try:
+        n1._fmap["Front"] = (0, {})
+        assert False
+    except TypeError:
+        pass
+    assert d.models.fieldNames(m) == ["Front", "Back"]
+    assert d.models.templateNames(m) == ["Card 1"]
+    # copies being edited are not memoized
+    m2 = d.models.copy(m)
+    d.models.addField(m2, d.models.newField("Extra"))
+    assert d.models.fieldNames(m2) == ["Front", "Back", "Extra"]
+    # saving the notetype drops the shared structures
+    d.models.renameField(m, m["flds"][0], "NewFront")
+    n3 = d.getNote(f.id)
+    assert n3._fmap is not n1._fmap
+    assert "NewFront" in n3
+    assert d.models.fieldNames(d.models.get(m["id"])) == ["NewFront", "Back"]
+
+
 def test_templates():
     d = getEmptyCol()
     m = d.models.current()
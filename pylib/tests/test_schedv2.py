@@ -79,6 +79,24 @@ def test_new():
     #     d.sched.answerCard(c, 2)
 
 
+def test_likely_next_cards():
+    d = getEmptyCol()
+    assert d.sched.likelyNextCardIds() == []
+    for i in range(3):
+        f = d.newNote()
+        f["Front"] = str(i)
+        d.addNote(f)
+    d.reset()
+    ids = d.sched.likelyNextCardIds()
+    # peeking doesn't change the queues
+    assert d.sched.likelyNextCardIds() == ids
+    c = d.sched.getCard()
+    assert c.id in ids
+    d.sched.answerCard(c, 1)
+    # the failed card is now at the head of the learning queue
+    assert c.id in d.sched.likelyNextCardIds()
+
+
 def test_newLimits():
     d = getEmptyCol()
     # add some notes
@@ -112,6 +130,65 @@ def test_newLimits():
     assert d.sched.newCount == 9
 
 
+def test_new_queue_across_decks():
+    d = getEmptyCol()
+    parent = d.decks.id("parent")
+    # many empty subdecks, and two with cards
+    for i in range(50):
+        d.decks.id("parent::empty%d" % i)
+    a = d.decks.id("parent::a")
+    b = d.decks.id("parent::b")
+    for did in a, b:
+        for i in range(10):
+            f = d.newNote()
+            f["Front"] = str(i)
+            f.model()["did"] = did
+            d.addNote(f)
+    # the parent limit is shared by its children
+    conf = d.decks.add_config_returning_id("parent conf")
+    d.decks.setConf(d.decks.get(parent), conf)
+    conf = d.decks.get_config(conf)
+    conf["new"]["perDay"] = 15
+    d.decks.save(conf)
+    d.decks.select(parent)
+    d.reset()
+    assert d.sched.newCount == 15
+    cards = []
+    for i in range(15):
+        c = d.sched.getCard()
+        cards.append((c.did, c.due))
+        d.sched.answerCard(c, 3)
+    # decks are studied in order, cards in due order within each deck
+    assert [did for did, due in cards] == [a] * 10 + [b] * 5
+    assert cards == sorted(cards, key=lambda card: (card[0] != a, card[1]))
+    # the empty decks are only looked at once
+    assert d.sched._newDids == [a, b]
+    assert not d.sched._getNewCard()
+
+
+def test_card_batches():
+    d = getEmptyCol()
+    for i in range(5):
+        f = d.newNote()
+        f["Front"] = str(i)
+        d.addNote(f)
+    d.sched.cardBatchSize = 3
+    d.reset()
+    c = d.sched.getCard()
+    assert c.due == 1
+    # the next cards were fetched with it
+    assert sorted(card.due for card in d.sched._queuedCards.values()) == [2, 3]
+    d.sched.answerCard(c, 3)
+    assert d.sched.getCard().due == 2
+    # changes made before a reset are seen
+    card = d.getCard(d.sched._newQueue[-1])
+    card.due = 100
+    card.flush()
+    d.reset()
+    assert not d.sched._queuedCards
+    assert [d.sched.getCard().due for i in range(4)] == [2, 4, 5, 100]
+
+
 def test_newBoxes():
     d = getEmptyCol()
     f = d.newNote()
@@ -483,6 +560,8 @@ def test_button_spacing():
     assert wo(ni(c, 2)) == "2d"
     assert wo(ni(c, 3)) == "3d"
     assert wo(ni(c, 4)) == "4d"
+    # all buttons at once
+    assert d.sched.nextIvlStrs(c) == [ni(c, ease) for ease in range(1, 5)]
 
     # if hard factor is <= 1, then hard may not increase
     conf = d.decks.confForDid(1)
@@ -1117,6 +1196,32 @@ def test_reorder():
     assert f4.cards()[0].due == 2
 
 
+def test_sort_cards():
+    d = getEmptyCol()
+    d.models.setCurrent(d.models.byName("Basic (and reversed card)"))
+    notes = []
+    for i in range(3):
+        f = d.newNote()
+        f["Front"] = str(i)
+        f["Back"] = str(i)
+        d.addNote(f)
+        notes.append(f)
+    # a review card keeps its due
+    c = notes[2].cards()[1]
+    c.type = CARD_TYPE_REV
+    c.queue = QUEUE_TYPE_REV
+    c.due = 100
+    c.flush()
+    # notes are ordered by their first card in the list, siblings sharing
+    # a position; unknown ids are ignored
+    cids = [notes[2].cards()[1].id, 123, notes[0].cards()[1].id]
+    cids += [card.id for f in notes for card in f.cards()]
+    d.sched.sortCards(cids, start=10, step=5)
+    assert [card.due for card in notes[2].cards()] == [10, 100]
+    assert [card.due for card in notes[0].cards()] == [15, 15]
+    assert [card.due for card in notes[1].cards()] == [20, 20]
+
+
 def test_forget():
     d = getEmptyCol()
     f = d.newNote()
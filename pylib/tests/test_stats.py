@@ -4,6 +4,7 @@
 import os
 import tempfile
 
+from anki.stats import statsCache
 from tests.shared import getEmptyCol
 
 
@@ -27,6 +28,62 @@ def test_graphs_empty():
     assert d.stats().report()
 
 
+def test_graphs_cached():
+    d = getEmptyCol()
+    for front in ("foo", "bar"):
+        f = d.newNote()
+        f["Front"] = front
+        d.addNote(f)
+    d.reset()
+    d.sched.answerCard(d.sched.getCard(), 3)
+    d.save()
+    d.stats().report()
+    misses = statsCache.misses
+    # reopening the unchanged collection doesn't query it again
+    d.stats().report()
+    assert statsCache.misses == misses
+    # but a change does
+    d.sched.answerCard(d.sched.getCard(), 3)
+    d.stats().report()
+    assert statsCache.misses > misses
+    d.save()
+    misses = statsCache.misses
+    d.stats().report()
+    assert statsCache.misses > misses
+
+
+def test_revlog_totals():
+    d = getEmptyCol()
+    f = d.newNote()
+    f["Front"] = "foo"
+    d.addNote(f)
+    d.reset()
+    c = d.sched.getCard()
+    d.sched.answerCard(c, 1)
+    d.sched.answerCard(c, 3)
+    # kept up to date as cards are answered
+    sql = "select did, sum(cnt) from revlog_totals group by did"
+    assert d.db.all(sql) == [[1, 2]]
+    # reviews follow their card to another deck
+    did = d.decks.id("other")
+    c.load()
+    c.did = did
+    c.flush()
+    assert d.db.all(sql) == [[did, 2]]
+    d.save()
+    stats = d.stats()
+    stats.report()
+    assert not stats._revlogDays(None)
+    stats.wholeCollection = True
+    rows = stats._revlogDays(None)
+    assert sum(row[1] + row[2] + row[3] + row[4] for row in rows) == 2
+    # and reading them doesn't change the collection
+    assert not d.db.mod
+    # removed reviews are removed from the totals
+    d.db.execute("delete from revlog")
+    assert d.db.scalar("select count() from revlog_totals") == 0
+
+
 def test_graphs():
     dir = tempfile.gettempdir()
     d = getEmptyCol()
@@ -1,3 +1,4 @@
+from anki.template import render_existing_cards
 from tests.shared import getEmptyCol
 
 
@@ -13,3 +14,35 @@ def test_deferred_frontside():
     d.addNote(f)
 
     assert "xxtest" in f.cards()[0].a()
+
+
+def test_render_existing_cards():
+    d = getEmptyCol()
+    m = d.models.byName("Basic (and reversed card)")
+    d.models.setCurrent(m)
+    f = d.newNote()
+    f["Front"] = "one"
+    f["Back"] = "two"
+    d.addNote(f)
+    cards = f.cards()
+    rendered = render_existing_cards(d, [c.id for c in reversed(cards)])
+    assert [c.id for c in rendered] == [c.id for c in reversed(cards)]
+    for card, expected in zip(rendered, reversed(cards)):
+        assert card.q() == expected.q()
+        assert card.a() == expected.a()
+        assert card.note().id == f.id
+    # a broken template only affects its own card
+    m["tmpls"][1]["qfmt"] = "{{Back}"
+    d.models.save(m)
+    rendered = render_existing_cards(d, [c.id for c in cards])
+    assert "one" in rendered[0].q()
+    assert "two" not in rendered[1].q()
+    # missing cards are left out
+    rendered = render_existing_cards(d, [cards[0].id, 12345])
+    assert [c.id for c in rendered] == [cards[0].id]
+    # sound tags are still extracted
+    f["Front"] = "[sound:a.mp3]"
+    f.flush()
+    (card,) = render_existing_cards(d, [cards[0].id])
+    assert card.question_av_tags()[0].filename == "a.mp3"
+    assert "[anki:play:q:0]" in card.q()
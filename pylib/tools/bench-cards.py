@@ -0,0 +1,108 @@
+# a quick script to measure the memory and construction time of many card
+# and note objects, compared with plain objects decoding every field upfront.
+# The backend messages are built in the measured code, and memory is measured
+# once every field has been read, so it is what each object really costs.
+#
+# usage: python tools/bench-cards.py [objects]
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from anki import Collection
+from anki.cards import Card
+from anki.notes import Note
+from anki.rsbackend import BackendCard, BackendNote
+
+objects = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+
+def tmppath(suffix):
+    (fd, path) = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    os.unlink(path)
+    return path
+
+
+class EagerCard:
+    "A card as older versions built it, with a __dict__ per object."
+
+    def __init__(self, col, c):
+        self.col = col.weakref()
+        self.timerStarted = None
+        self._render_output = None
+        self._note = None
+        self.id = c.id
+        for name, field in Card._backendFields.items():
+            setattr(self, name, getattr(c, field))
+
+
+class EagerNote:
+    "A note as older versions built it, with a __dict__ per object."
+
+    def __init__(self, col, n):
+        self.col = col.weakref()
+        self.id = n.id
+        self.guid = n.guid
+        self.mid = n.ntid
+        self.mod = n.mtime_secs
+        self.usn = n.usn
+        self.tags = list(n.tags)
+        self.fields = list(n.fields)
+        self._fmap = col.models.fieldMap(col.models.get(self.mid))
+
+
+def measure(label, build, read):
+    tracemalloc.start()
+    t = time.time()
+    objs = build()
+    built = time.time() - t
+    t = time.time()
+    read(objs)
+    elapsed = time.time() - t
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(
+        f"{label:<12} {size / len(objs):6.0f} bytes/object, "
+        f"built in {built:.2f}s, read in {elapsed:.2f}s"
+    )
+
+
+def readCards(cards):
+    for card in cards:
+        for name in Card._backendFields:
+            getattr(card, name)
+
+
+def readNotes(notes):
+    for note in notes:
+        for name in Note._backendFields:
+            getattr(note, name)
+
+
+col = Collection(tmppath(".anki2"))
+mid = col.models.current()["id"]
+
+
+def backendCards():
+    for id in range(1, objects + 1):
+        yield BackendCard(id=id, nid=id, did=1, due=id, ivl=1, factor=2500)
+
+
+def backendNotes():
+    for id in range(1, objects + 1):
+        yield BackendNote(id=id, guid=str(id), ntid=mid, fields=[f"front {id}", "back"])
+
+
+measure(
+    "Card", lambda: [Card.from_backend_card(col, c) for c in backendCards()], readCards,
+)
+measure("dict card", lambda: [EagerCard(col, c) for c in backendCards()], readCards)
+measure(
+    "Note", lambda: [Note.from_backend_note(col, n) for n in backendNotes()], readNotes,
+)
+measure("dict note", lambda: [EagerNote(col, n) for n in backendNotes()], readNotes)
+
+col.close()
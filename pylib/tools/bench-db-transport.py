@@ -0,0 +1,45 @@
+# a quick script to compare the JSON and protobuf DB row transports
+#
+# usage: python tools/bench-db-transport.py [rows]
+
+import os
+import sys
+import tempfile
+import time
+
+from anki import Collection
+
+rows = int(sys.argv[1]) if len(sys.argv) > 1 else 400_000
+
+(fd, path) = tempfile.mkstemp(suffix=".anki2")
+os.close(fd)
+os.unlink(path)
+col = Collection(path)
+
+# synthetic revlog entries; contents don't matter, only size and types
+col.db.executemany(
+    "insert into revlog values (?,?,?,?,?,?,?,?,?)",
+    (
+        (i + 1, i // 4 + 1, -1, i % 4 + 1, i % 100, 0, 2500, 6000, 1)
+        for i in range(rows)
+    ),
+)
+
+
+def bench(label, sql):
+    for json_rows in (True, False):
+        col.backend.json_db_rows = json_rows
+        t = time.time()
+        result = col.db.all(sql)
+        transport = "json" if json_rows else "proto"
+        print(
+            f"{label:<20} {transport:<6} {len(result):>8} rows {time.time() - t:.3f}s"
+        )
+
+
+bench("revlog scan", "select * from revlog")
+bench("revlog ids", "select id from revlog")
+bench("single row", "select * from revlog limit 1")
+
+col.close()
+os.unlink(path)
@@ -0,0 +1,58 @@
+# a quick script to time bulk card operations on 1k, 10k and 100k ids,
+# binding the ids with col.db.id_set() or formatting them with ids2str()
+#
+# usage: python tools/bench-id-set.py
+
+import os
+import tempfile
+import time
+
+from anki import Collection
+from anki.utils import ids2str, intTime
+
+sizes = (1_000, 10_000, 100_000)
+repeats = 5
+
+
+def tmppath(suffix):
+    (fd, path) = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    os.unlink(path)
+    return path
+
+
+def withIds2str(col, cids):
+    scids = ids2str(cids)
+    col.db.list("select nid from cards where id in " + scids)
+    col.db.execute("update cards set flags = 1 where id in " + scids)
+
+
+def withIdSet(col, cids):
+    with col.db.id_set(cids) as scids:
+        col.db.list("select nid from cards where id in " + scids)
+        col.db.execute("update cards set flags = 1 where id in " + scids)
+
+
+# cards are inserted directly, as the operations don't look at notes
+col = Collection(tmppath(".anki2"))
+now = intTime()
+col.db.executemany(
+    "insert into cards values (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+    (
+        (cid, cid, 1, 0, now, -1, 0, 0, cid, 0, 0, 0, 0, 0, 0, 0, 0, "")
+        for cid in range(1, max(sizes) * 2 + 1)
+    ),
+)
+col.save()
+
+for size in sizes:
+    # every other card, so the ids don't form a range
+    cids = list(range(1, size * 2 + 1, 2))
+    for label, operation in (("ids2str", withIds2str), ("id_set", withIdSet)):
+        t = time.time()
+        for i in range(repeats):
+            operation(col, cids)
+        elapsed = (time.time() - t) / repeats
+        print(f"{label:<8} {size:>7} ids: {elapsed * 1000:.1f}ms")
+
+col.close()
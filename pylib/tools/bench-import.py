@@ -0,0 +1,111 @@
+# a quick script to time importing an .apkg with review history, using
+# both the single-pass revlog import and the older per-card queries
+#
+# usage: python tools/bench-import.py [cards]
+
+import os
+import sys
+import tempfile
+import time
+
+from anki import Collection
+from anki.exporting import AnkiPackageExporter
+from anki.importing.apkg import AnkiPackageImporter
+from anki.utils import fieldChecksum, guid64, intTime
+
+cards = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+
+def tmppath(suffix):
+    (fd, path) = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    os.unlink(path)
+    return path
+
+
+class PerCardRevlogImporter(AnkiPackageImporter):
+    "Fetches the revlog of each card separately, as older versions did."
+
+    def _revlogRows(self, cidMap, usn):
+        for srcCid, cid in cidMap.items():
+            for rev in self.src.db.execute(
+                "select * from revlog where cid = ?", srcCid
+            ):
+                rev = list(rev)
+                rev[1] = cid
+                rev[2] = self.dst.usn()
+                yield rev
+
+
+# build a collection with one reviewed card per note
+src = Collection(tmppath(".anki2"))
+mid = src.models.current()["id"]
+now = intTime()
+src.db.executemany(
+    "insert into notes values (?,?,?,?,?,?,?,?,?,?,?)",
+    (
+        (
+            nid,
+            guid64(),
+            mid,
+            now,
+            -1,
+            "",
+            f"front {nid}\x1fback",
+            f"front {nid}",
+            fieldChecksum(f"front {nid}"),
+            0,
+            "",
+        )
+        for nid in range(1, cards + 1)
+    ),
+)
+src.db.executemany(
+    "insert into cards values (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+    (
+        (
+            cid,
+            cid,
+            1,
+            0,
+            now,
+            -1,
+            2,
+            2,
+            src.sched.today + cid % 30,
+            10,
+            2500,
+            3,
+            0,
+            0,
+            0,
+            0,
+            0,
+            "",
+        )
+        for cid in range(1, cards + 1)
+    ),
+)
+src.db.executemany(
+    "insert into revlog values (?,?,?,?,?,?,?,?,?)",
+    ((i + 1, i // 3 + 1, -1, 3, 10, 1, 2500, 6000, 1) for i in range(cards * 3)),
+)
+src.save()
+
+apkg = tmppath(".apkg")
+exporter = AnkiPackageExporter(src)
+exporter.includeSched = True
+exporter.exportInto(apkg)
+src.close()
+
+for label, importer in (
+    ("single pass", AnkiPackageImporter),
+    ("per card", PerCardRevlogImporter),
+):
+    dst = Collection(tmppath(".anki2"))
+    t = time.time()
+    importer(dst, apkg).run()
+    elapsed = time.time() - t
+    revlog = dst.db.scalar("select count() from revlog")
+    print(f"{label:<12} {cards} cards, {revlog} revlog entries: {elapsed:.2f}s")
+    dst.close()
@@ -0,0 +1,112 @@
+# a quick script to time repositioning the new cards of a large deck,
+# using both the bulk sortCards() and the older per-card queries
+#
+# usage: python tools/bench-sort-cards.py [cards]
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from anki import Collection
+from anki.consts import CARD_TYPE_NEW
+from anki.utils import fieldChecksum, guid64, ids2str, intTime
+
+cards = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+
+def tmppath(suffix):
+    (fd, path) = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    os.unlink(path)
+    return path
+
+
+def perCardSortCards(col, cids, shuffle):
+    "Looks up the note of each card separately, as older versions did."
+    now = intTime()
+    nids = []
+    nidsSet = set()
+    for id in cids:
+        nid = col.db.scalar("select nid from cards where id = ?", id)
+        if nid not in nidsSet:
+            nids.append(nid)
+            nidsSet.add(nid)
+    if shuffle:
+        random.shuffle(nids)
+    due = {nid: index + 1 for index, nid in enumerate(nids)}
+    cardData = []
+    for id, nid in col.db.execute(
+        f"select id, nid from cards where type = {CARD_TYPE_NEW} and id in "
+        + ids2str(cids)
+    ):
+        cardData.append((due[nid], now, col.usn(), id))
+    col.db.executemany("update cards set due=?,mod=?,usn=? where id = ?", cardData)
+
+
+# build a deck with two new cards per note
+col = Collection(tmppath(".anki2"))
+col.changeSchedulerVer(2)
+mid = col.models.current()["id"]
+now = intTime()
+notes = cards // 2
+col.db.executemany(
+    "insert into notes values (?,?,?,?,?,?,?,?,?,?,?)",
+    (
+        (
+            nid,
+            guid64(),
+            mid,
+            now,
+            -1,
+            "",
+            f"front {nid}\x1fback",
+            f"front {nid}",
+            fieldChecksum(f"front {nid}"),
+            0,
+            "",
+        )
+        for nid in range(1, notes + 1)
+    ),
+)
+col.db.executemany(
+    "insert into cards values (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+    (
+        (
+            cid,
+            (cid + 1) // 2,
+            1,
+            cid % 2,
+            now,
+            -1,
+            0,
+            0,
+            cid,
+            0,
+            0,
+            0,
+            0,
+            0,
+            0,
+            0,
+            0,
+            "",
+        )
+        for cid in range(1, notes * 2 + 1)
+    ),
+)
+col.save()
+cids = col.db.list("select id from cards where did = 1")
+
+for label, sort in (
+    ("randomize", lambda: col.sched.randomizeCards(1)),
+    ("order", lambda: col.sched.orderCards(1)),
+    ("per card", lambda: perCardSortCards(col, cids, shuffle=True)),
+):
+    t = time.time()
+    sort()
+    elapsed = time.time() - t
+    print(f"{label:<10} {len(cids)} cards: {elapsed:.2f}s")
+
+col.close()
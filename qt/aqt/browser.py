@@ -6,10 +6,11 @@ from __future__ import annotations
 
 import html
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from enum import Enum
 from operator import itemgetter
-from typing import Callable, List, Optional, Sequence, Union
+from typing import Callable, List, Optional, Sequence, Tuple, Union
 
 import anki
 import aqt
@@ -20,7 +21,8 @@ from anki.consts import *
 from anki.lang import _, ngettext
 from anki.models import NoteType
 from anki.notes import Note
-from anki.rsbackend import TR, DeckTreeNode, InvalidInput
+from anki.rsbackend import TR, DeckTreeNode, InvalidInput, NotFoundError
+from anki.template import render_existing_cards
 from anki.utils import htmlToTextLine, ids2str, intTime, isMac, isWin
 from aqt import AnkiQt, gui_hooks
 from aqt.editor import Editor
@@ -87,10 +89,12 @@ class DataModel(QAbstractTableModel):
     sortKey -- never used
     activeCols -- the list of name of columns to display in the browser
     cards -- the set of cards corresponding to current browser's search
-    cardObjs -- dictionnady from card's id to the card object. It
-    allows to avoid reloading cards already seen since browser was
-    opened. If a nose is «refreshed» then it is remove from the
-    dic. It is emptied during reset.
+    cardObjs -- ordered dictionnary from card's id to the card object,
+    with the least recently used cards first. It allows to avoid
+    reloading cards recently seen. Missing cards are loaded together
+    with the rest of the viewport, and the oldest cards are dropped
+    beyond cardCacheSize. If a note is «refreshed» then its cards are
+    removed from the dic. It is emptied during reset.
     focusedCard -- the last thing focused, assuming it was a single line. Used to restore a selection after edition/deletion. (Notes keep by compatibility, but it may be a note id)
     selectedCards -- a dictionnary containing the set of selected card's id, associating them to True. Seems that the associated value is never used. Used to restore a selection after some edition
     """
@@ -104,15 +108,70 @@ class DataModel(QAbstractTableModel):
             "activeCols", ["noteFld", "template", "cardDue", "deck"]
         )
         self.cards: Sequence[int] = []
-        self.cardObjs: Dict[int, Card] = {}
+        self.cardObjs: OrderedDict[int, Card] = OrderedDict()
+
+    # number of cards kept in cardObjs
+    cardCacheSize = 1000
+    # number of rows loaded above and below the viewport
+    prefetchMargin = 100
 
     def getCard(self, index: QModelIndex) -> Card:
         """The card object at position index in the list"""
         id = self.cards[index.row()]
-        if not id in self.cardObjs:
+        if id not in self.cardObjs:
+            self._prefetch(index.row())
+        if id not in self.cardObjs:
+            # deleted since the search; only this row fails
             self.cardObjs[id] = self.col.getCard(id)
+        self.cardObjs.move_to_end(id)
         return self.cardObjs[id]
 
+    def _prefetch(self, row: int) -> None:
+        """Load the cards of the visible rows and the surrounding ones with
+        their notes, rendered for the browser if a question or answer column
+        is shown, and drop the least recently used cards beyond
+        cardCacheSize. Cards deleted since the search are left out."""
+        start, stop = self._prefetchRows(row)
+        ids = [id for id in self.cards[start:stop] if id not in self.cardObjs]
+        if "question" in self.activeCols or "answer" in self.activeCols:
+            cards = render_existing_cards(self.col, ids, browser=True)
+        else:
+            try:
+                cards = self.col.get_cards(ids, with_notes=True)
+            except NotFoundError:
+                # a card or note was deleted; load the others one by one
+                cards = []
+                for id in ids:
+                    try:
+                        cards.extend(self.col.get_cards([id], with_notes=True))
+                    except NotFoundError:
+                        pass
+        for card in cards:
+            self.cardObjs[card.id] = card
+        if self.cards[row] in self.cardObjs:
+            self.cardObjs.move_to_end(self.cards[row])
+        while len(self.cardObjs) > self.cardCacheSize:
+            self.cardObjs.popitem(last=False)
+
+    def _prefetchRows(self, row: int) -> Tuple[int, int]:
+        """The range of rows to load with row: the viewport and
+        prefetchMargin rows on each side, or the rows around row if it is
+        not visible."""
+        tv = self.browser.form.tableView
+        first = tv.rowAt(0)
+        last = tv.rowAt(tv.viewport().height() - 1)
+        if last < 0:
+            # the viewport extends past the last row
+            last = len(self.cards) - 1
+        if first < 0 or not first <= row <= last:
+            first = last = row
+        start = max(0, first - self.prefetchMargin)
+        stop = min(len(self.cards), last + self.prefetchMargin + 1)
+        # never load more cards than the cache can hold
+        start = max(start, row + 1 - self.cardCacheSize // 2)
+        stop = min(stop, row + self.cardCacheSize // 2)
+        return start, stop
+
     def refreshNote(self, note):
         """Remove cards of this note from cardObjs, and potentially signal
         that the layout need to be changed if one cards was in this dict."""
@@ -262,7 +321,7 @@ class DataModel(QAbstractTableModel):
         self.browser.mw.progress.start()
         self.saveSelection()
         self.beginResetModel()
-        self.cardObjs = {}
+        self.cardObjs = OrderedDict()
 
     def endReset(self):
         self.endResetModel()
@@ -324,7 +324,7 @@ where id > ?""",
 
     def _collapse(self, did: int) -> None:
         self.mw.col.decks.collapse(did)
-        node = self.mw.col.decks.find_deck_in_tree(self._dueTree, did)
+        node = self.mw.col.decks.find_deck_in_tree_by_path(self._dueTree, did)
         if node:
             node.collapsed = not node.collapsed
         self._renderPage(reuse=True)
@@ -342,7 +342,7 @@ where id > ?""",
         self.mw.checkpoint(_("Delete Deck"))
         deck = self.mw.col.decks.get(did)
         if not deck["dyn"]:
-            dids = [did] + [r[1] for r in self.mw.col.decks.children(did)]
+            dids = self.mw.col.decks.deck_and_child_ids(did)
             cnt = self.mw.col.db.scalar(
                 "select count() from cards where did in {0} or "
                 "odid in {0}".format(ids2str(dids))
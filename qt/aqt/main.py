@@ -26,12 +26,22 @@ import aqt.stats
 import aqt.toolbar
 import aqt.webview
 from anki import hooks
+from anki.backups import BackupStore
 from anki.collection import Collection
 from anki.hooks import runHook
 from anki.lang import _, ngettext
+from anki.latex import LatexCache
 from anki.rsbackend import RustBackend
 from anki.sound import AVTag, SoundOrVideoTag
-from anki.utils import devMode, ids2str, intTime, isMac, isWin, splitFields
+from anki.utils import (
+    devMode,
+    ids2str,
+    intTime,
+    isMac,
+    isWin,
+    splitFields,
+    tmpfile,
+)
 from aqt import gui_hooks
 from aqt.addons import DownloadLogEntry, check_and_prompt_for_updates, show_log_to_user
 from aqt.dbcheck import check_db
@@ -155,6 +165,7 @@ class AnkiQt(QMainWindow):
         self.setupMediaServer()
         self.setupSound()
         self.setupSpellCheck()
+        self.setupLatexCache()
         self.setupStyle()
         self.setupMainWindow()
         self.setupSystemSpecific()
@@ -342,11 +353,24 @@ Replace your collection with an earlier backup?"""
             self.profileDiag,
             _("Revert to backup"),
             cb=doOpen,
-            filter="*.colpkg",
+            filter="*.colpkg *.colbak",
             dir=self.pm.backupFolder(),
         )
 
     def _openBackup(self, path):
+        if path.endswith(".colbak"):
+            # incremental backups are restored from a .colpkg built from them
+            colpkg = tmpfile(suffix=".colpkg")
+            self.progress.start(immediate=True)
+            try:
+                BackupStore(os.path.dirname(path)).writeColpkg(path, colpkg)
+            except Exception as e:
+                showWarning(_("Unable to read backup: %s") % e)
+                return
+            finally:
+                self.progress.finish()
+            path = colpkg
+
         try:
             # move the existing collection to the trash, as it may not open
             self.pm.trashCollection()
@@ -596,6 +620,22 @@ from the profile screen."
             zip.writestr("media", "{}")
             zip.close()
 
+    class IncrementalBackupThread(Thread):
+        """Adds the changed parts of the collection to the backup folder,
+        then removes the old backups and the chunks only they used."""
+
+        def __init__(self, dir, colPath, manifestPath, nbacks):
+            Thread.__init__(self)
+            self.dir = dir
+            self.colPath = colPath
+            self.manifestPath = manifestPath
+            self.nbacks = nbacks
+
+        def run(self):
+            store = BackupStore(self.dir)
+            store.backup(self.colPath, self.manifestPath)
+            store.removeOldBackups(self.nbacks)
+
     def backup(self) -> None:
         nbacks = self.pm.profile["numBackups"]
         if not nbacks or devMode:
@@ -604,31 +644,28 @@ from the profile screen."
         path = self.pm.collectionPath()
 
         # do backup
-        fname = time.strftime(
-            "backup-%Y-%m-%d-%H.%M.%S.colpkg", time.localtime(time.time())
-        )
-        newpath = os.path.join(dir, fname)
+        fname = time.strftime("backup-%Y-%m-%d-%H.%M.%S", time.localtime(time.time()))
+        if self.pm.profile.get("incrementalBackups"):
+            # the collection is read in the thread, and old backups are
+            # removed there once the new one is complete
+            newpath = os.path.join(dir, fname + ".colbak")
+            self.IncrementalBackupThread(dir, path, newpath, nbacks).start()
+            gui_hooks.backup_did_complete()
+            return
+        newpath = os.path.join(dir, fname + ".colpkg")
         with open(path, "rb") as file_object:
             data = file_object.read()
         self.BackupThread(newpath, data).start()
 
-        # find existing backups
-        backups = []
-        for file_name in os.listdir(dir):
-            # only look for new-style format
-            match = re.match(r"backup-\d{4}-\d{2}-.+.colpkg", file_name)
-            if not match:
-                continue
-            backups.append(file_name)
-        backups.sort()
-
-        # remove old ones
-        while len(backups) > nbacks:
-            fname = backups.pop(0)
-            path = os.path.join(dir, fname)
-            os.unlink(path)
+        self.removeOldBackups(dir, nbacks)
         gui_hooks.backup_did_complete()
 
+    @staticmethod
+    def removeOldBackups(dir: str, nbacks: int) -> List[str]:
+        """Remove the oldest backups of dir, keeping nbacks of them. Returns
+        the file names of the remaining ones."""
+        return BackupStore(dir).removeOldBackups(nbacks)
+
     def maybeOptimize(self) -> None:
         # have two weeks passed?
         if (intTime() - self.pm.profile["lastOptimize"]) < 86400 * 14:
@@ -880,6 +917,9 @@ title="%s" %s>%s</button>""" % (
             self.pm.base, "dictionaries"
         )
 
+    def setupLatexCache(self) -> None:
+        anki.latex.cache = LatexCache(os.path.join(self.pm.base, "latex"))
+
     def setupThreads(self) -> None:
         self._mainThread = QThread.currentThread()
 
@@ -1500,7 +1540,7 @@ will be lost. Continue?"""
             sys.stdout = self._oldStdout
 
     def _card_repr(self, card: anki.cards.Card) -> None:
-        import pprint, copy
+        import pprint
 
         if not card:
             print("no card")
@@ -1511,19 +1551,17 @@ will be lost. Continue?"""
         print("Back:", card.answer())
 
         print("\nNote:")
-        note = copy.copy(card.note())
+        note = card.note()
         for k, v in note.items():
             print(f"- {k}:", v)
 
         print("\n")
-        del note.fields
-        del note._fmap
-        pprint.pprint(note.__dict__)
+        d = note._repr_dict()
+        del d["fields"]
+        pprint.pprint(d)
 
         print("\nCard:")
-        c = copy.copy(card)
-        c._render_output = None
-        pprint.pprint(c.__dict__)
+        pprint.pprint(card._repr_dict())
 
     def _debugCard(self) -> Optional[anki.cards.Card]:
         card = self.reviewer.card
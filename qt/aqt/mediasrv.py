@@ -1,13 +1,15 @@
 # Copyright: Ankitects Pty Ltd and contributors
 # -*- coding: utf-8 -*-
 # License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
+import datetime
+import email.utils
 import http.server
 import re
 import socket
 import socketserver
 import threading
 from http import HTTPStatus
-from typing import Optional
+from typing import BinaryIO, Optional, Tuple, Union
 
 from anki.collection import Collection
 from anki.utils import devMode
@@ -73,14 +75,23 @@ class MediaServer(threading.Thread):
 
 class RequestHandler(http.server.SimpleHTTPRequestHandler):
 
-    timeout = 1
+    # a hung connection only blocks its own thread, so the timeout can be
+    # long enough for slow reads of large videos
+    timeout = 10
     mw: Optional[Collection] = None
+    # pasted media are named after a checksum of their content, so never
+    # change. LaTeX images aren't: their name doesn't cover the notetype's
+    # LaTeX header and footer, so they're revalidated with their ETag.
+    immutableMedia = re.compile(r"paste-[0-9a-f]{40}\.\w+")
 
     def do_GET(self):
         head = self.send_head()
         if head:
+            file_object, offset, length = head
             try:
-                self.copyfile(head, self.wfile)
+                # send the file directly from the kernel if possible
+                if length:
+                    self.connection.sendfile(file_object, offset, length)
             except Exception as e:
                 if devMode:
                     print("http server caught exception:", e)
@@ -90,9 +101,17 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
                     # downloading
                     pass
             finally:
-                head.close()
+                file_object.close()
 
-    def send_head(self):
+    def do_HEAD(self):
+        head = self.send_head()
+        if head:
+            head[0].close()
+
+    def send_head(self) -> Optional[Tuple[BinaryIO, int, int]]:
+        """Send the headers of the response, and return the file to send with
+        the offset and length of the part to send, or None if there is no
+        body."""
         path = self.translate_path(self.path)
         path = self._redirectWebExports(path)
         try:
@@ -113,18 +132,102 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
             self.send_error(HTTPStatus.NOT_FOUND, "File not found")
             return None
         try:
-            self.send_response(HTTPStatus.OK)
-            self.send_header("Content-type", ctype)
             fs = os.fstat(file_object.fileno())
-            self.send_header("Content-Length", str(fs[6]))
-            self.send_header("Last-Modified", self.date_time_string(fs.st_mtime))
+            size = fs.st_size
+            etag = '"%x-%x"' % (fs.st_mtime_ns, size)
+            if self._notModified(etag, fs.st_mtime):
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self._sendCacheHeaders(path, etag, fs.st_mtime)
+                self.end_headers()
+                file_object.close()
+                return None
+
+            byteRange = self._byteRange(etag, size)
+            if byteRange is False:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", "bytes */%d" % size)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                file_object.close()
+                return None
+            if byteRange:
+                offset, length = byteRange
+                self.send_response(HTTPStatus.PARTIAL_CONTENT)
+                self.send_header(
+                    "Content-Range",
+                    "bytes %d-%d/%d" % (offset, offset + length - 1, size),
+                )
+            else:
+                offset, length = 0, size
+                self.send_response(HTTPStatus.OK)
+            self.send_header("Content-type", ctype)
+            self.send_header("Content-Length", str(length))
+            self.send_header("Accept-Ranges", "bytes")
+            self._sendCacheHeaders(path, etag, fs.st_mtime)
             self.send_header("Access-Control-Allow-Origin", "*")
             self.end_headers()
-            return file_object
+            return file_object, offset, length
         except:
             file_object.close()
             raise
 
+    def _sendCacheHeaders(self, path: str, etag: str, mtime: float) -> None:
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", self.date_time_string(mtime))
+        inMediaFolder = os.path.dirname(path) == os.getcwd()
+        if inMediaFolder and self.immutableMedia.fullmatch(os.path.basename(path)):
+            self.send_header("Cache-Control", "max-age=31536000, immutable")
+        else:
+            # other files may be edited, so the browser must check them
+            self.send_header("Cache-Control", "no-cache")
+
+    def _notModified(self, etag: str, mtime: float) -> bool:
+        "Whether the request's conditions show the client has the file."
+        ifNoneMatch = self.headers.get("If-None-Match")
+        if ifNoneMatch:
+            return ifNoneMatch.strip() == "*" or etag in (
+                tag.strip() for tag in ifNoneMatch.split(",")
+            )
+        ifModifiedSince = self.headers.get("If-Modified-Since")
+        if ifModifiedSince:
+            try:
+                since = email.utils.parsedate_to_datetime(ifModifiedSince)
+            except (TypeError, IndexError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=datetime.timezone.utc)
+            return int(mtime) <= since.timestamp()
+        return False
+
+    def _byteRange(self, etag: str, size: int) -> Union[Tuple[int, int], bool, None]:
+        """(offset, length) of the range requested, None to send the whole
+        file, or False if the range can't be satisfied."""
+        header = self.headers.get("Range")
+        if not header:
+            return None
+        ifRange = self.headers.get("If-Range")
+        if ifRange and ifRange.strip() != etag:
+            # the client's copy is outdated
+            return None
+        match = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", header)
+        if not match or not any(match.groups()):
+            # multiple ranges are not supported; send the whole file
+            return None
+        start, end = match.groups()
+        if not start:
+            # the last bytes of the file
+            length = min(int(end), size)
+            if not length:
+                return False
+            return size - length, length
+        offset = int(start)
+        if offset >= size:
+            return False
+        last = min(int(end), size - 1) if end else size - 1
+        if last < offset:
+            return None
+        return offset, last - offset + 1
+
     def log_message(self, format, *args):
         if not devMode:
             return
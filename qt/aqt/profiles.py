@@ -43,6 +43,8 @@ profileConf: Dict[str, Any] = dict(
     mainWindowGeom=None,
     mainWindowState=None,
     numBackups=50,
+    # not exposed in gui; store backups as chunks shared between them
+    incrementalBackups=False,
     lastOptimize=intTime(),
     # editing
     fullSearch=False,
@@ -7,15 +7,22 @@ from __future__ import annotations
 import difflib
 import html
 import json
+import os
 import re
 import unicodedata as ucd
-from typing import Callable, List, Optional, Sequence, Tuple, Union
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
 
 from PyQt5.QtCore import Qt
 
 from anki import hooks
 from anki.cards import Card
 from anki.lang import _, ngettext
+from anki.rsbackend import NotFoundError, TemplateError
+from anki.template import (
+    PartiallyRenderedCard,
+    TemplateRenderContext,
+    partially_render_existing_card,
+)
 from anki.utils import stripHTML
 from aqt import AnkiQt, gui_hooks
 from aqt.qt import *
@@ -54,6 +61,11 @@ class Reviewer:
         self.typeCorrect: str = None  # web init happens before this is set
         self.state: Optional[str] = None
         self.bottom = BottomBar(mw, mw.bottomWeb)
+        # the card likely to be shown next, partly rendered in the background
+        self._prefetched: Optional[
+            Tuple[int, Tuple[Any, ...], PartiallyRenderedCard]
+        ] = None
+        self._prefetchGeneration = 0
         hooks.card_did_leech.append(self.onLeech)
 
     def show(self) -> None:
@@ -62,6 +74,7 @@ class Reviewer:
         self.web.set_bridge_command(self._linkHandler, self)
         self.bottom.web.set_bridge_command(self._linkHandler, ReviewerBottomBar(self))
         self._reps: int = None
+        self._discardPrefetched()
         self.nextCard()
 
     def lastCard(self) -> Optional[Card]:
@@ -108,6 +121,9 @@ class Reviewer:
                 self.mw.col.reset()
                 self.hadCardQueue = False
             card = self.mw.col.sched.getCard()
+            if card:
+                self._usePrefetched(card)
+        self._discardPrefetched()
         self.card = card
         if not card:
             self.mw.moveToState("overview")
@@ -117,6 +133,86 @@ class Reviewer:
             self._initWeb()
         self._showQuestion()
 
+    # Prefetching the next card
+    ##########################################################################
+
+    # bytes read from each media file to get it in the OS cache
+    prefetchMediaBytes = 1024 * 1024
+
+    def _prefetchNextCard(self) -> None:
+        """Once the question is shown, have the backend render the card likely
+        to follow the current one, and read its media in the background.
+
+        Field filters and render hooks are left until the card is shown, so
+        they only run for cards the user sees."""
+        self._prefetchGeneration += 1
+        generation = self._prefetchGeneration
+
+        def prefetch() -> None:
+            if generation != self._prefetchGeneration or not self.card:
+                # a card was shown or the queues were reset meanwhile
+                return
+            ids = self.mw.col.sched.likelyNextCardIds()
+            id = next((id for id in ids if id != self.card.id), None)
+            if not id:
+                return
+            try:
+                card = self.mw.col.getCard(id)
+                partial = partially_render_existing_card(self.mw.col, id)
+            except (NotFoundError, TemplateError):
+                # removed meanwhile, or shown with the error when it comes up
+                return
+            self._prefetched = (id, self._renderKey(card), partial)
+            paths = self._mediaPaths(card, partial)
+            self.mw.taskman.run_in_background(lambda: self._warmMedia(paths))
+
+        self.mw.progress.timer(0, prefetch, False)
+
+    def _mediaPaths(self, card: Card, partial: PartiallyRenderedCard) -> List[str]:
+        "The paths of the images, sounds and videos of the card."
+        media = self.mw.col.media
+        text = "".join(
+            node if isinstance(node, str) else node.current_text
+            for node in partial.qnodes + partial.anodes
+        )
+        names = set(media.filesInStr(card.note().mid, text))
+        return [os.path.join(media.dir(), name) for name in names]
+
+    def _warmMedia(self, paths: List[str]) -> None:
+        "Read the start of media files, so the webview gets them faster."
+        for path in paths:
+            try:
+                with open(path, "rb") as file:
+                    file.read(self.prefetchMediaBytes)
+            except OSError:
+                pass
+
+    def _renderKey(self, card: Card) -> Tuple[Any, ...]:
+        """What the rendering of card depends on: the card, its note, its
+        notetype and templates, and the name of its deck."""
+        return (
+            card.mod,
+            card.did,
+            card.note().mod,
+            card.note_type()["mod"],
+            self.mw.col.decks.name(card.did),
+        )
+
+    def _usePrefetched(self, card: Card) -> None:
+        """Finish the rendering of card started after the previous question,
+        unless anything it depends on changed since."""
+        if not self._prefetched:
+            return
+        id, key, partial = self._prefetched
+        if id == card.id and key == self._renderKey(card):
+            ctx = TemplateRenderContext(self.mw.col, card, card.note(), partial=partial)
+            card.set_render_output(ctx.render())
+
+    def _discardPrefetched(self) -> None:
+        self._prefetched = None
+        # results of prefetches still running will be ignored
+        self._prefetchGeneration += 1
+
     # Audio
     ##########################################################################
 
@@ -202,6 +298,7 @@ class Reviewer:
             self.mw.web.setFocus()
         # user hook
         gui_hooks.reviewer_did_show_question(card)
+        self._prefetchNextCard()
 
     def autoplay(self, card: Card) -> bool:
         print("use card.autoplay() instead of reviewer.autoplay(card)")
@@ -629,13 +726,17 @@ time = %(time)d;
 
     def _answerButtons(self) -> str:
         default = self._defaultEase()
+        if self.mw.col.conf["estTimes"]:
+            ivlStrs: Optional[List[str]] = self.mw.col.sched.nextIvlStrs(self.card)
+        else:
+            ivlStrs = None
 
         def but(ease, label):
             if ease == default:
                 extra = "id=defease"
             else:
                 extra = ""
-            due = self._buttonTime(ease)
+            due = self._buttonTime(ease, ivlStrs)
             return """
 <td align=center>%s<button %s title="%s" data-ease="%s" onclick='pycmd("ease%d");'>\
 %s</button></td>""" % (
@@ -655,10 +756,16 @@ time = %(time)d;
 <script>$(function () { $("#defease").focus(); });</script>"""
         return buf + script
 
-    def _buttonTime(self, ease: int) -> str:
-        if not self.mw.col.conf["estTimes"]:
+    def _buttonTime(self, ease: int, ivlStrs: Optional[List[str]] = None) -> str:
+        """The interval shown above the button. ivlStrs are the intervals of
+        all buttons, if they were already computed."""
+        if ivlStrs is not None and 0 < ease <= len(ivlStrs):
+            txt = ivlStrs[ease - 1]
+        elif not self.mw.col.conf["estTimes"]:
             return "<div class=spacer></div>"
-        txt = self.mw.col.sched.nextIvlStr(self.card, ease, True) or "&nbsp;"
+        else:
+            txt = self.mw.col.sched.nextIvlStr(self.card, ease, True)
+        txt = txt or "&nbsp;"
         return "<span class=nobold>%s</span><br>" % txt
 
     # Leeches
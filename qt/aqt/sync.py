@@ -95,6 +95,8 @@ def sync_collection(mw: aqt.main.AnkiQt, on_done: Callable[[], None]) -> None:
 
     def on_future_done(fut):
         mw.col.db.begin()
+        # the sync may have changed decks
+        mw.col.decks._clear_cache()
         timer.stop()
         try:
             out: SyncOutput = fut.result()
@@ -0,0 +1,132 @@
+import hashlib
+import http.client
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+
+from aqt.mediasrv import RequestHandler, ThreadedHTTPServer
+
+
+def _media(dir):
+    "A mix of small images, audio and a larger video."
+    rand = random.Random(0)
+    files = {}
+    for i in range(5):
+        data = bytes(rand.getrandbits(8) for _ in range(2000 + i))
+        name = "paste-%s.png" % hashlib.sha1(data).hexdigest()
+        files[name] = data
+    files["latex-%s.png" % hashlib.sha1(b"x").hexdigest()] = b"latex"
+    files["audio.mp3"] = os.urandom(64 * 1024)
+    files["video.mp4"] = os.urandom(4 * 1024 * 1024)
+    for name, data in files.items():
+        with open(os.path.join(dir, name), "wb") as file:
+            file.write(data)
+    return files
+
+
+def _serve(dir):
+    oldcwd = os.getcwd()
+    os.chdir(dir)
+    server = ThreadedHTTPServer(("127.0.0.1", 0), RequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, oldcwd
+
+
+def _get(port, name, headers={}):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        conn.request("GET", "/" + name, headers=headers)
+        resp = conn.getresponse()
+        return resp.status, dict(resp.getheaders()), resp.read()
+    finally:
+        conn.close()
+
+
+def test_ranges_and_conditional_requests():
+    with TemporaryDirectory() as dir:
+        files = _media(dir)
+        server, oldcwd = _serve(dir)
+        port = server.server_port
+        try:
+            video = files["video.mp4"]
+            status, headers, body = _get(port, "video.mp4")
+            assert status == 200 and body == video
+            assert headers["Accept-Ranges"] == "bytes"
+            assert headers["Cache-Control"] == "no-cache"
+            etag = headers["ETag"]
+
+            status, headers, body = _get(port, "video.mp4", {"Range": "bytes=10-19"})
+            assert status == 206 and body == video[10:20]
+            assert headers["Content-Range"] == "bytes 10-19/%d" % len(video)
+            status, _headers, body = _get(port, "video.mp4", {"Range": "bytes=-5"})
+            assert status == 206 and body == video[-5:]
+            status, _headers, body = _get(port, "video.mp4", {"Range": "bytes=100-"})
+            assert status == 206 and body == video[100:]
+            status, _headers, body = _get(
+                port, "video.mp4", {"Range": "bytes=%d-" % len(video)}
+            )
+            assert status == 416
+            # an outdated If-Range gets the whole file
+            status, _headers, body = _get(
+                port, "video.mp4", {"Range": "bytes=0-0", "If-Range": '"old"'}
+            )
+            assert status == 200 and body == video
+
+            status, _headers, body = _get(port, "video.mp4", {"If-None-Match": etag})
+            assert status == 304 and not body
+            status, _headers, body = _get(
+                port, "video.mp4", {"If-Modified-Since": headers["Last-Modified"]}
+            )
+            assert status == 304
+
+            image = next(name for name in files if name.startswith("paste-"))
+            status, headers, _body = _get(port, image)
+            assert "immutable" in headers["Cache-Control"]
+            # the name of a LaTeX image doesn't cover the LaTeX header
+            latex = next(name for name in files if name.startswith("latex-"))
+            status, headers, _body = _get(port, latex)
+            assert headers["Cache-Control"] == "no-cache"
+            assert _get(port, "missing.png")[0] == 404
+        finally:
+            server.shutdown()
+            server.server_close()
+            os.chdir(oldcwd)
+
+
+def test_concurrent_mixed_media_load():
+    with TemporaryDirectory() as dir:
+        files = _media(dir)
+        server, oldcwd = _serve(dir)
+        port = server.server_port
+        names = sorted(files)
+        rand = random.Random(1)
+        requests = []
+        for _ in range(300):
+            name = rand.choice(names)
+            size = len(files[name])
+            if rand.random() < 0.5:
+                start = rand.randrange(size)
+                end = rand.randrange(start, size)
+                requests.append((name, start, end))
+            else:
+                requests.append((name, None, None))
+
+        def fetch(request):
+            name, start, end = request
+            headers = (
+                {"Range": "bytes=%d-%d" % (start, end)} if start is not None else {}
+            )
+            status, _headers, body = _get(port, name, headers)
+            if start is None:
+                return status == 200 and body == files[name]
+            return status == 206 and body == files[name][start : end + 1]
+
+        try:
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                assert all(executor.map(fetch, requests))
+        finally:
+            server.shutdown()
+            server.server_close()
+            os.chdir(oldcwd)
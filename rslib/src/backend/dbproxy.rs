@@ -1,11 +1,15 @@
 // Copyright: Ankitects Pty Ltd and contributors
 // License: GNU AGPL, version 3 or later; http://www.gnu.org/licenses/agpl.html
 
+use crate::backend_proto as pb;
 use crate::err::Result;
 use crate::storage::SqliteStorage;
+use pb::db_column::Kind as ColumnKind;
+use prost::Message;
 use rusqlite::types::{FromSql, FromSqlError, ToSql, ToSqlOutput, ValueRef};
-use rusqlite::OptionalExtension;
+use rusqlite::{CachedStatement, OptionalExtension, StatementStatus, NO_PARAMS};
 use serde_derive::{Deserialize, Serialize};
+use std::collections::HashMap;
 
 #[derive(Deserialize)]
 #[serde(tag = "kind", rename_all = "lowercase")]
@@ -22,12 +26,109 @@ pub(super) enum DBRequest {
         sql: String,
         args: Vec<Vec<SqlValue>>,
     },
+    /// Run a query and hold all its rows in the backend, returning a
+    /// cursor id that they can be fetched from in batches.
+    OpenCursor {
+        sql: String,
+        args: Vec<SqlValue>,
+    },
+    Fetch {
+        cursor: u32,
+        limit: usize,
+    },
+    CloseCursor {
+        cursor: u32,
+    },
+    /// Run several queries in one call, returning the rows of each.
+    Batch {
+        queries: Vec<BatchQuery>,
+    },
+    /// Return the (hits, misses) of the prepared statement cache, for the
+    /// statements run through the proxy.
+    StatementCacheStats,
+    /// Replace the content of the temporary table temp.ids{table}, so
+    /// that long lists of ids can be used in queries without being
+    /// formatted into the SQL. An empty list clears the table.
+    SetIds {
+        table: u32,
+        ids: Vec<i64>,
+    },
+}
+
+#[derive(Deserialize)]
+pub(super) struct BatchQuery {
+    sql: String,
+    args: Vec<SqlValue>,
+    first_row_only: bool,
+}
+
+/// State kept by the backend between DB proxy calls.
+#[derive(Default)]
+pub(super) struct DBProxyState {
+    pub(super) cursors: DBCursors,
+    statements: StatementCacheStats,
+}
+
+/// How often the statements prepared by the proxy were found in the
+/// connection's prepared statement cache.
+#[derive(Default)]
+struct StatementCacheStats {
+    hits: u64,
+    misses: u64,
+}
+
+impl StatementCacheStats {
+    /// Prepare sql using the connection's statement cache. A statement
+    /// taken from the cache has been run before, while a newly prepared
+    /// one hasn't, so SQLite's run counter tells the two apart.
+    fn prepare<'a>(&mut self, ctx: &'a SqliteStorage, sql: &str) -> Result<CachedStatement<'a>> {
+        let stmt = ctx.db.prepare_cached(sql)?;
+        if stmt.get_status(StatementStatus::Run) > 0 {
+            self.hits += 1;
+        } else {
+            self.misses += 1;
+        }
+        Ok(stmt)
+    }
+}
+
+/// Query results that are being handed to the frontend a batch at a
+/// time. The whole result is read when the cursor is opened; a live
+/// statement can't be kept, as it borrows the connection.
+#[derive(Default)]
+pub(super) struct DBCursors {
+    next_id: u32,
+    cursors: HashMap<u32, std::vec::IntoIter<Vec<SqlValue>>>,
+}
+
+impl DBCursors {
+    fn open(&mut self, rows: Vec<Vec<SqlValue>>) -> u32 {
+        self.next_id = self.next_id.wrapping_add(1);
+        self.cursors.insert(self.next_id, rows.into_iter());
+        self.next_id
+    }
+
+    fn fetch(&mut self, cursor: u32, limit: usize) -> Vec<Vec<SqlValue>> {
+        match self.cursors.get_mut(&cursor) {
+            Some(rows) => rows.take(limit).collect(),
+            None => vec![],
+        }
+    }
+
+    fn close(&mut self, cursor: u32) {
+        self.cursors.remove(&cursor);
+    }
+
+    pub(super) fn clear(&mut self) {
+        self.cursors.clear();
+    }
 }
 
 #[derive(Serialize)]
 #[serde(untagged)]
 pub(super) enum DBResult {
     Rows(Vec<Vec<SqlValue>>),
+    Batch(Vec<Vec<Vec<SqlValue>>>),
     None,
 }
 
@@ -67,7 +168,45 @@ impl FromSql for SqlValue {
     }
 }
 
-pub(super) fn db_command_bytes(ctx: &SqliteStorage, input: &[u8]) -> Result<String> {
+impl SqlValue {
+    fn kind(&self) -> ColumnKind {
+        match self {
+            SqlValue::Null => ColumnKind::Null,
+            SqlValue::String(_) => ColumnKind::String,
+            SqlValue::Int(_) => ColumnKind::Int,
+            SqlValue::Double(_) => ColumnKind::Double,
+            SqlValue::Blob(_) => ColumnKind::Blob,
+        }
+    }
+}
+
+pub(super) fn db_command_bytes(
+    ctx: &SqliteStorage,
+    state: &mut DBProxyState,
+    input: &[u8],
+) -> Result<String> {
+    let resp = db_command_inner(ctx, state, input)?;
+    Ok(serde_json::to_string(&resp)?)
+}
+
+/// Like db_command_bytes(), but returns the rows as an encoded
+/// pb::DbResult instead of JSON.
+pub(super) fn db_command_proto(
+    ctx: &SqliteStorage,
+    state: &mut DBProxyState,
+    input: &[u8],
+) -> Result<Vec<u8>> {
+    let resp = db_command_inner(ctx, state, input)?;
+    let mut out_bytes = Vec::new();
+    db_result_to_proto(resp).encode(&mut out_bytes)?;
+    Ok(out_bytes)
+}
+
+fn db_command_inner(
+    ctx: &SqliteStorage,
+    state: &mut DBProxyState,
+    input: &[u8],
+) -> Result<DBResult> {
     let req: DBRequest = serde_json::from_slice(input)?;
     let resp = match req {
         DBRequest::Query {
@@ -75,10 +214,11 @@ pub(super) fn db_command_bytes(ctx: &SqliteStorage, input: &[u8]) -> Result<Stri
             args,
             first_row_only,
         } => {
+            let stats = &mut state.statements;
             if first_row_only {
-                db_query_row(ctx, &sql, &args)?
+                db_query_row(ctx, stats, &sql, &args)?
             } else {
-                db_query(ctx, &sql, &args)?
+                db_query(ctx, stats, &sql, &args)?
             }
         }
         DBRequest::Begin => {
@@ -93,13 +233,104 @@ pub(super) fn db_command_bytes(ctx: &SqliteStorage, input: &[u8]) -> Result<Stri
             ctx.rollback_trx()?;
             DBResult::None
         }
-        DBRequest::ExecuteMany { sql, args } => db_execute_many(ctx, &sql, &args)?,
+        DBRequest::ExecuteMany { sql, args } => {
+            db_execute_many(ctx, &mut state.statements, &sql, &args)?
+        }
+        DBRequest::OpenCursor { sql, args } => {
+            let rows = db_query(ctx, &mut state.statements, &sql, &args)?.into_rows();
+            let cursor = state.cursors.open(rows);
+            DBResult::Rows(vec![vec![SqlValue::Int(cursor as i64)]])
+        }
+        DBRequest::Fetch { cursor, limit } => DBResult::Rows(state.cursors.fetch(cursor, limit)),
+        DBRequest::CloseCursor { cursor } => {
+            state.cursors.close(cursor);
+            DBResult::None
+        }
+        DBRequest::Batch { queries } => {
+            let mut results = Vec::with_capacity(queries.len());
+            for query in queries {
+                let stats = &mut state.statements;
+                let result = if query.first_row_only {
+                    db_query_row(ctx, stats, &query.sql, &query.args)?
+                } else {
+                    db_query(ctx, stats, &query.sql, &query.args)?
+                };
+                results.push(result.into_rows());
+            }
+            DBResult::Batch(results)
+        }
+        DBRequest::StatementCacheStats => DBResult::Rows(vec![vec![
+            SqlValue::Int(state.statements.hits as i64),
+            SqlValue::Int(state.statements.misses as i64),
+        ]]),
+        DBRequest::SetIds { table, ids } => db_set_ids(ctx, &mut state.statements, table, &ids)?,
     };
-    Ok(serde_json::to_string(&resp)?)
+    Ok(resp)
+}
+
+impl DBResult {
+    fn into_rows(self) -> Vec<Vec<SqlValue>> {
+        match self {
+            DBResult::Rows(rows) => rows,
+            DBResult::Batch(_) | DBResult::None => vec![],
+        }
+    }
+}
+
+fn db_result_to_proto(result: DBResult) -> pb::DbResult {
+    match result {
+        DBResult::Rows(rows) => rows_to_proto(rows),
+        DBResult::Batch(results) => pb::DbResult {
+            batch: results.into_iter().map(rows_to_proto).collect(),
+            ..Default::default()
+        },
+        DBResult::None => pb::DbResult::default(),
+    }
+}
+
+fn rows_to_proto(rows: Vec<Vec<SqlValue>>) -> pb::DbResult {
+    let row_count = rows.len();
+    let column_count = rows.first().map(Vec::len).unwrap_or_default();
+    let mut columns = vec![pb::DbColumn::default(); column_count];
+
+    for row in rows {
+        for (column, value) in columns.iter_mut().zip(row.into_iter()) {
+            column.kinds.push(value.kind() as u8);
+            match value {
+                SqlValue::Null => (),
+                SqlValue::String(v) => column.strings.push(v),
+                SqlValue::Int(v) => column.ints.push(v),
+                SqlValue::Double(v) => column.doubles.push(v),
+                SqlValue::Blob(v) => column.blobs.push(v),
+            }
+        }
+    }
+
+    // drop the kinds of uniformly-typed columns, as they can be inferred
+    for column in &mut columns {
+        let uniform = column.ints.len() == row_count
+            || column.strings.len() == row_count
+            || column.doubles.len() == row_count
+            || column.blobs.len() == row_count;
+        if uniform {
+            column.kinds.clear();
+        }
+    }
+
+    pb::DbResult {
+        row_count: row_count as u32,
+        columns,
+        batch: vec![],
+    }
 }
 
-pub(super) fn db_query_row(ctx: &SqliteStorage, sql: &str, args: &[SqlValue]) -> Result<DBResult> {
-    let mut stmt = ctx.db.prepare_cached(sql)?;
+fn db_query_row(
+    ctx: &SqliteStorage,
+    stats: &mut StatementCacheStats,
+    sql: &str,
+    args: &[SqlValue],
+) -> Result<DBResult> {
+    let mut stmt = stats.prepare(ctx, sql)?;
     let columns = stmt.column_count();
 
     let row = stmt
@@ -122,8 +353,13 @@ pub(super) fn db_query_row(ctx: &SqliteStorage, sql: &str, args: &[SqlValue]) ->
     Ok(DBResult::Rows(rows))
 }
 
-pub(super) fn db_query(ctx: &SqliteStorage, sql: &str, args: &[SqlValue]) -> Result<DBResult> {
-    let mut stmt = ctx.db.prepare_cached(sql)?;
+fn db_query(
+    ctx: &SqliteStorage,
+    stats: &mut StatementCacheStats,
+    sql: &str,
+    args: &[SqlValue],
+) -> Result<DBResult> {
+    let mut stmt = stats.prepare(ctx, sql)?;
     let columns = stmt.column_count();
 
     let res: std::result::Result<Vec<Vec<_>>, rusqlite::Error> = stmt
@@ -140,12 +376,13 @@ pub(super) fn db_query(ctx: &SqliteStorage, sql: &str, args: &[SqlValue]) -> Res
     Ok(DBResult::Rows(res?))
 }
 
-pub(super) fn db_execute_many(
+fn db_execute_many(
     ctx: &SqliteStorage,
+    stats: &mut StatementCacheStats,
     sql: &str,
     args: &[Vec<SqlValue>],
 ) -> Result<DBResult> {
-    let mut stmt = ctx.db.prepare_cached(sql)?;
+    let mut stmt = stats.prepare(ctx, sql)?;
 
     for params in args {
         stmt.execute(params)?;
@@ -153,3 +390,27 @@ pub(super) fn db_execute_many(
 
     Ok(DBResult::None)
 }
+
+fn db_set_ids(
+    ctx: &SqliteStorage,
+    stats: &mut StatementCacheStats,
+    table: u32,
+    ids: &[i64],
+) -> Result<DBResult> {
+    ctx.db.execute_batch(&format!(
+        "create temp table if not exists ids{} (id integer primary key)",
+        table
+    ))?;
+    stats
+        .prepare(ctx, &format!("delete from temp.ids{}", table))?
+        .execute(NO_PARAMS)?;
+    let mut stmt = stats.prepare(
+        ctx,
+        &format!("insert or ignore into temp.ids{} values (?)", table),
+    )?;
+    for id in ids {
+        stmt.execute(&[id])?;
+    }
+
+    Ok(DBResult::None)
+}
@@ -3,7 +3,7 @@
 
 pub use crate::backend_proto::BackendMethod;
 use crate::{
-    backend::dbproxy::db_command_bytes,
+    backend::dbproxy::{db_command_bytes, db_command_proto, DBProxyState},
     backend_proto as pb,
     backend_proto::builtin_search_order::BuiltinSortKind,
     backend_proto::{
@@ -100,6 +100,7 @@ pub struct Backend {
 struct BackendState {
     remote_sync_status: RemoteSyncStatus,
     media_sync_abort: Option<AbortHandle>,
+    db_proxy: DBProxyState,
 }
 
 #[derive(Default, Debug)]
@@ -281,6 +282,32 @@ impl BackendService for Backend {
         })
     }
 
+    fn render_existing_cards(
+        &mut self,
+        input: pb::RenderExistingCardsIn,
+    ) -> BackendResult<pb::RenderExistingCardsOut> {
+        let cids: Vec<CardID> = input.card_ids.into_iter().map(CardID).collect();
+        self.with_col(|col| {
+            let cards = col
+                .render_existing_cards(&cids, input.browser)?
+                .into_iter()
+                .map(|(card, note, output)| {
+                    use pb::rendered_existing_card::Value as V;
+                    let value = match output {
+                        Ok(output) => V::Output(output.into()),
+                        Err(err) => V::TemplateError(err.localized_description(&col.i18n)),
+                    };
+                    pb::RenderedExistingCard {
+                        card: Some(card_to_pb(card)),
+                        note: Some(note.into()),
+                        value: Some(value),
+                    }
+                })
+                .collect();
+            Ok(pb::RenderExistingCardsOut { cards })
+        })
+    }
+
     fn render_uncommitted_card(
         &mut self,
         input: pb::RenderUncommittedCardIn,
@@ -677,6 +704,22 @@ impl BackendService for Backend {
         })
     }
 
+    fn get_cards(&mut self, input: pb::GetCardsIn) -> BackendResult<pb::GetCardsOut> {
+        self.with_col(|col| {
+            let cards = input
+                .card_ids
+                .into_iter()
+                .map(|cid| {
+                    col.storage
+                        .get_card(CardID(cid))
+                        .and_then(|opt| opt.ok_or(AnkiError::NotFound))
+                        .map(card_to_pb)
+                })
+                .collect::<Result<_>>()?;
+            Ok(pb::GetCardsOut { cards })
+        })
+    }
+
     fn update_card(&mut self, input: pb::Card) -> BackendResult<Empty> {
         let mut card = pbcard_to_native(input)?;
         self.with_col(|col| {
@@ -747,6 +790,22 @@ impl BackendService for Backend {
         })
     }
 
+    fn get_notes(&mut self, input: pb::GetNotesIn) -> BackendResult<pb::GetNotesOut> {
+        self.with_col(|col| {
+            let notes = input
+                .note_ids
+                .into_iter()
+                .map(|nid| {
+                    col.storage
+                        .get_note(NoteID(nid))?
+                        .ok_or(AnkiError::NotFound)
+                        .map(Into::into)
+                })
+                .collect::<Result<_>>()?;
+            Ok(pb::GetNotesOut { notes })
+        })
+    }
+
     fn remove_notes(&mut self, input: pb::RemoveNotesIn) -> BackendResult<Empty> {
         self.with_col(|col| {
             if !input.note_ids.is_empty() {
@@ -1061,6 +1120,7 @@ impl BackendService for Backend {
         }
 
         let col_inner = col.take().unwrap();
+        self.state.lock().unwrap().db_proxy.cursors.clear();
         if input.downgrade_to_schema11 {
             let log = log::terminal();
             if let Err(e) = col_inner.close(input.downgrade_to_schema11) {
@@ -1526,7 +1586,17 @@ impl Backend {
     }
 
     pub fn db_command(&self, input: &[u8]) -> Result<String> {
-        self.with_col(|col| db_command_bytes(&col.storage, input))
+        self.with_col(|col| {
+            let mut state = self.state.lock().unwrap();
+            db_command_bytes(&col.storage, &mut state.db_proxy, input)
+        })
+    }
+
+    pub fn db_command_proto(&self, input: &[u8]) -> Result<Vec<u8>> {
+        self.with_col(|col| {
+            let mut state = self.state.lock().unwrap();
+            db_command_proto(&col.storage, &mut state.db_proxy, input)
+        })
     }
 }
 
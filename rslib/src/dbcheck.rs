@@ -346,6 +346,7 @@ impl Collection {
             self.storage.set_schema_modified()?;
             out.revlog_properties_invalid = cnt;
         }
+        self.storage.rebuild_revlog_totals()?;
 
         Ok(())
     }
@@ -451,6 +452,15 @@ mod test {
             true
         );
 
+        // the totals are rebuilt if they've gone out of sync
+        col.storage.db.execute_batch("delete from revlog_totals")?;
+        col.check_database(progress_fn)?;
+        assert_eq!(
+            col.storage
+                .db_scalar::<u32>("select sum(cnt) from revlog_totals")?,
+            1
+        );
+
         Ok(())
     }
 
@@ -33,7 +33,7 @@ pub(crate) struct TransformNoteOutput {
     pub mark_modified: bool,
 }
 
-#[derive(Debug, PartialEq)]
+#[derive(Debug, Clone, PartialEq)]
 pub struct Note {
     pub id: NoteID,
     pub guid: String,
@@ -28,6 +28,48 @@ impl Collection {
             .storage
             .get_note(card.nid)?
             .ok_or_else(|| AnkiError::invalid_input("no such note"))?;
+
+        self.render_existing_card_with_note(&card, &note, browser)
+    }
+
+    /// Render multiple existing cards, returning each card with its note.
+    /// Template errors are returned per card, so one broken template does
+    /// not prevent the other cards from being rendered. Cards that no
+    /// longer exist, or whose note is missing, are skipped.
+    pub fn render_existing_cards(
+        &mut self,
+        cids: &[CardID],
+        browser: bool,
+    ) -> Result<Vec<(Card, Note, Result<RenderCardOutput>)>> {
+        let mut out: Vec<(Card, Note, Result<RenderCardOutput>)> = Vec::with_capacity(cids.len());
+        for &cid in cids {
+            let card = match self.storage.get_card(cid)? {
+                Some(card) => card,
+                None => continue,
+            };
+            // cards of the same note are usually adjacent
+            let note = match out.last() {
+                Some((_, note, _)) if note.id == card.nid => note.clone(),
+                _ => match self.storage.get_note(card.nid)? {
+                    Some(note) => note,
+                    None => continue,
+                },
+            };
+            let output = match self.render_existing_card_with_note(&card, &note, browser) {
+                Err(err @ AnkiError::TemplateError { .. }) => Err(err),
+                other => Ok(other?),
+            };
+            out.push((card, note, output));
+        }
+        Ok(out)
+    }
+
+    fn render_existing_card_with_note(
+        &mut self,
+        card: &Card,
+        note: &Note,
+        browser: bool,
+    ) -> Result<RenderCardOutput> {
         let nt = self
             .get_notetype(note.ntid)?
             .ok_or_else(|| AnkiError::invalid_input("no such notetype"))?;
@@ -37,7 +79,7 @@ impl Collection {
         }
         .ok_or_else(|| AnkiError::invalid_input("missing template"))?;
 
-        self.render_card_inner(&note, &card, &nt, template, browser)
+        self.render_card_inner(note, card, &nt, template, browser)
     }
 
     /// Render a card that may not yet have been added.
@@ -1,5 +1,4 @@
-insert
-  or replace into cards (
+insert into cards (
     id,
     nid,
     did,
@@ -39,4 +38,22 @@ values
     ?,
     ?,
     ?
-  )
\ No newline at end of file
+  ) on conflict (id) do
+update
+set nid = excluded.nid,
+  did = excluded.did,
+  ord = excluded.ord,
+  mod = excluded.mod,
+  usn = excluded.usn,
+  type = excluded.type,
+  queue = excluded.queue,
+  due = excluded.due,
+  ivl = excluded.ivl,
+  factor = excluded.factor,
+  reps = excluded.reps,
+  lapses = excluded.lapses,
+  left = excluded.left,
+  odue = excluded.odue,
+  odid = excluded.odid,
+  flags = excluded.flags,
+  data = excluded.data
\ No newline at end of file
@@ -14,6 +14,14 @@ impl SqliteStorage {
             .map_err(Into::into)
     }
 
+    /// Recalculate the revlog totals from scratch. The triggers keep them
+    /// up to date, but can't see changes made with "insert or replace".
+    pub(crate) fn rebuild_revlog_totals(&self) -> Result<()> {
+        self.db
+            .execute_batch(include_str!("rebuild_totals.sql"))
+            .map_err(Into::into)
+    }
+
     pub(crate) fn clear_pending_revlog_usns(&self) -> Result<()> {
         self.db
             .prepare("update revlog set usn = 0 where usn = -1")?
@@ -0,0 +1,16 @@
+delete from revlog_totals;
+insert into revlog_totals
+select r.id / 900000,
+  coalesce(c.did, 0),
+  r.type,
+  r.lastIvl >= 21,
+  r.ease,
+  count(),
+  sum(r.time)
+from revlog r
+  left join cards c on c.id = r.cid
+group by 1,
+  2,
+  3,
+  4,
+  5;
@@ -20,6 +20,11 @@ impl SqliteStorage {
             self.upgrade_decks_to_schema15()?;
             self.upgrade_deck_conf_to_schema15()?;
         }
+        if ver < 16 {
+            self.db
+                .execute_batch(include_str!("schema16_upgrade.sql"))?;
+            self.rebuild_revlog_totals()?;
+        }
 
         Ok(())
     }
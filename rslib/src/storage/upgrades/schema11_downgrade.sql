@@ -1,3 +1,10 @@
+drop trigger revlog_totals_add;
+drop trigger revlog_totals_remove;
+drop trigger revlog_totals_update;
+drop trigger revlog_totals_card_moved;
+drop trigger revlog_totals_card_added;
+drop trigger revlog_totals_card_removed;
+drop table revlog_totals;
 drop table config;
 drop table deck_config;
 drop table tags;
@@ -0,0 +1,249 @@
+-- Totals of the revlog for each 15 minute period, deck, review type,
+-- young/mature and ease, read by the stats graphs. A review counts
+-- towards the current deck of its card, or deck 0 if the card is gone.
+-- All day rollover times fall on a period boundary. The table is filled
+-- by rebuild_totals.sql, and kept up to date by the triggers below.
+create table revlog_totals (
+  period integer not null,
+  did integer not null,
+  type integer not null,
+  mature integer not null,
+  ease integer not null,
+  cnt integer not null,
+  time integer not null,
+  primary key (period, did, type, mature, ease)
+) without rowid;
+create trigger revlog_totals_add
+after
+insert on revlog begin
+insert into revlog_totals
+values (
+    new.id / 900000,
+    coalesce(
+      (
+        select did
+        from cards
+        where id = new.cid
+      ),
+      0
+    ),
+    new.type,
+    new.lastIvl >= 21,
+    new.ease,
+    1,
+    new.time
+  ) on conflict (period, did, type, mature, ease) do
+update
+set cnt = cnt + 1,
+  time = time + excluded.time;
+end;
+create trigger revlog_totals_remove
+after delete on revlog begin
+update revlog_totals
+set cnt = cnt - 1,
+  time = time - old.time
+where period = old.id / 900000
+  and did = coalesce(
+    (
+      select did
+      from cards
+      where id = old.cid
+    ),
+    0
+  )
+  and type = old.type
+  and mature = (old.lastIvl >= 21)
+  and ease = old.ease;
+delete from revlog_totals
+where period = old.id / 900000
+  and cnt = 0;
+end;
+create trigger revlog_totals_update
+after
+update on revlog begin
+update revlog_totals
+set cnt = cnt - 1,
+  time = time - old.time
+where period = old.id / 900000
+  and did = coalesce(
+    (
+      select did
+      from cards
+      where id = old.cid
+    ),
+    0
+  )
+  and type = old.type
+  and mature = (old.lastIvl >= 21)
+  and ease = old.ease;
+insert into revlog_totals
+values (
+    new.id / 900000,
+    coalesce(
+      (
+        select did
+        from cards
+        where id = new.cid
+      ),
+      0
+    ),
+    new.type,
+    new.lastIvl >= 21,
+    new.ease,
+    1,
+    new.time
+  ) on conflict (period, did, type, mature, ease) do
+update
+set cnt = cnt + 1,
+  time = time + excluded.time;
+delete from revlog_totals
+where period = old.id / 900000
+  and cnt = 0;
+end;
+-- moving a card, or adding or removing it, moves its reviews between decks
+create trigger revlog_totals_card_moved
+after
+update of did on cards
+  when old.did != new.did begin
+insert into revlog_totals
+select id / 900000,
+  old.did,
+  type,
+  lastIvl >= 21,
+  ease,
+  - count(),
+  - sum(time)
+from revlog
+where cid = old.id
+group by 1,
+  2,
+  3,
+  4,
+  5 on conflict (period, did, type, mature, ease) do
+update
+set cnt = cnt + excluded.cnt,
+  time = time + excluded.time;
+insert into revlog_totals
+select id / 900000,
+  new.did,
+  type,
+  lastIvl >= 21,
+  ease,
+  count(),
+  sum(time)
+from revlog
+where cid = new.id
+group by 1,
+  2,
+  3,
+  4,
+  5 on conflict (period, did, type, mature, ease) do
+update
+set cnt = cnt + excluded.cnt,
+  time = time + excluded.time;
+delete from revlog_totals
+where did = old.did
+  and cnt = 0
+  and period in (
+    select id / 900000
+    from revlog
+    where cid = old.id
+  );
+end;
+create trigger revlog_totals_card_added
+after
+insert on cards begin
+insert into revlog_totals
+select id / 900000,
+  0,
+  type,
+  lastIvl >= 21,
+  ease,
+  - count(),
+  - sum(time)
+from revlog
+where cid = new.id
+group by 1,
+  2,
+  3,
+  4,
+  5 on conflict (period, did, type, mature, ease) do
+update
+set cnt = cnt + excluded.cnt,
+  time = time + excluded.time;
+insert into revlog_totals
+select id / 900000,
+  new.did,
+  type,
+  lastIvl >= 21,
+  ease,
+  count(),
+  sum(time)
+from revlog
+where cid = new.id
+group by 1,
+  2,
+  3,
+  4,
+  5 on conflict (period, did, type, mature, ease) do
+update
+set cnt = cnt + excluded.cnt,
+  time = time + excluded.time;
+delete from revlog_totals
+where did = 0
+  and cnt = 0
+  and period in (
+    select id / 900000
+    from revlog
+    where cid = new.id
+  );
+end;
+create trigger revlog_totals_card_removed
+after delete on cards begin
+insert into revlog_totals
+select id / 900000,
+  old.did,
+  type,
+  lastIvl >= 21,
+  ease,
+  - count(),
+  - sum(time)
+from revlog
+where cid = old.id
+group by 1,
+  2,
+  3,
+  4,
+  5 on conflict (period, did, type, mature, ease) do
+update
+set cnt = cnt + excluded.cnt,
+  time = time + excluded.time;
+insert into revlog_totals
+select id / 900000,
+  0,
+  type,
+  lastIvl >= 21,
+  ease,
+  count(),
+  sum(time)
+from revlog
+where cid = old.id
+group by 1,
+  2,
+  3,
+  4,
+  5 on conflict (period, did, type, mature, ease) do
+update
+set cnt = cnt + excluded.cnt,
+  time = time + excluded.time;
+delete from revlog_totals
+where did = old.did
+  and cnt = 0
+  and period in (
+    select id / 900000
+    from revlog
+    where cid = old.id
+  );
+end;
+update col
+set ver = 16;
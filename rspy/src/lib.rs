@@ -39,6 +39,7 @@ fn want_release_gil(method: u32) -> bool {
             BackendMethod::ExtractLatex => false,
             BackendMethod::GetEmptyCards => true,
             BackendMethod::RenderExistingCard => false,
+            BackendMethod::RenderExistingCards => true,
             BackendMethod::RenderUncommittedCard => false,
             BackendMethod::StripAVTags => false,
             BackendMethod::SearchCards => true,
@@ -63,12 +64,14 @@ fn want_release_gil(method: u32) -> bool {
             BackendMethod::NewDeckConfigLegacy => false,
             BackendMethod::RemoveDeckConfig => true,
             BackendMethod::GetCard => true,
+            BackendMethod::GetCards => true,
             BackendMethod::UpdateCard => true,
             BackendMethod::AddCard => true,
             BackendMethod::NewNote => true,
             BackendMethod::AddNote => true,
             BackendMethod::UpdateNote => true,
             BackendMethod::GetNote => true,
+            BackendMethod::GetNotes => true,
             BackendMethod::AddNoteTags => true,
             BackendMethod::UpdateNoteTags => true,
             BackendMethod::ClozeNumbersInNote => true,
@@ -151,6 +154,18 @@ impl Backend {
         let out_obj = PyBytes::new(py, out_string.as_bytes());
         Ok(out_obj.into())
     }
+
+    fn db_command_proto(&mut self, py: Python, input: &PyBytes) -> PyResult<PyObject> {
+        let in_bytes = input.as_bytes();
+        let out_res = py.allow_threads(move || {
+            self.backend
+                .db_command_proto(in_bytes)
+                .map_err(|e| DBError::py_err(e.localized_description(&self.backend.i18n())))
+        });
+        let out_bytes = out_res?;
+        let out_obj = PyBytes::new(py, &out_bytes);
+        Ok(out_obj.into())
+    }
 }
 
 // Module definition